@@ -1,38 +1,70 @@
-from solutions.SUM.sum_solution import SumSolution
-from solutions.HLO.hello_solution import HelloSolution
-from solutions.FIZ.fizz_buzz_solution import FizzBuzzSolution
-from solutions.CHK.checkout_solution import CheckoutSolution
-from solutions.RBT.rabbit_hole_solution import RabbitHoleSolution
-from solutions.HOC.house_of_cards_solution import HouseOfCardsSolution
-from solutions.AMZ.amazing_solution import AmazingSolution
-from solutions.ULT.ultimate_solution import UltimateSolution
-from solutions.DMO.demo_round1_solution import DemoRound1Solution
-from solutions.DMO.demo_round2_solution import DemoRound2Solution
-from solutions.DMO.demo_round3_solution import DemoRound3Solution
-from solutions.DMO.inventory_item import InventoryItem
-from solutions.DMO.demo_round4n5_solution import DemoRound4n5Solution
-from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
-
+import importlib
 from dataclasses import is_dataclass, asdict
 
-from solutions.IWC.task_types import TaskSubmission
+from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+
+
+class _LazySolution:
+    """Imports and instantiates a solution class the first time it is accessed.
+
+    The instance is cached on the owning object, so later lookups are plain
+    attribute reads and never go through the descriptor again.
+    """
+
+    def __init__(self, module_name: str, class_name: str) -> None:
+        self._module_name = module_name
+        self._class_name = class_name
+        self._attribute_name = class_name
+
+    def __set_name__(self, owner, name):
+        self._attribute_name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        module = importlib.import_module(self._module_name)
+        solution = getattr(module, self._class_name)()
+        instance.__dict__[self._attribute_name] = solution
+        return solution
 
 
 class EntryPointMapping:
-    def __init__(self):
-        self.sum_solution = SumSolution()
-        self.hello_solution = HelloSolution()
-        self.fizz_buzz_solution = FizzBuzzSolution()
-        self.checkout_solution = CheckoutSolution()
-        self.rabbit_hole_solution = RabbitHoleSolution()
-        self.house_of_cards_solution = HouseOfCardsSolution()
-        self.amazing_solution = AmazingSolution()
-        self.ultimate_solution = UltimateSolution()
-        self.demo_round1_solution = DemoRound1Solution()
-        self.demo_round2_solution = DemoRound2Solution()
-        self.demo_round3_solution = DemoRound3Solution()
-        self.demo_round4n5_solution = DemoRound4n5Solution()
-        self.queue_solution_entrypoint = QueueSolutionEntrypoint()
+    sum_solution = _LazySolution("solutions.SUM.sum_solution", "SumSolution")
+    hello_solution = _LazySolution("solutions.HLO.hello_solution", "HelloSolution")
+    fizz_buzz_solution = _LazySolution(
+        "solutions.FIZ.fizz_buzz_solution", "FizzBuzzSolution"
+    )
+    checkout_solution = _LazySolution(
+        "solutions.CHK.checkout_solution", "CheckoutSolution"
+    )
+    rabbit_hole_solution = _LazySolution(
+        "solutions.RBT.rabbit_hole_solution", "RabbitHoleSolution"
+    )
+    house_of_cards_solution = _LazySolution(
+        "solutions.HOC.house_of_cards_solution", "HouseOfCardsSolution"
+    )
+    amazing_solution = _LazySolution(
+        "solutions.AMZ.amazing_solution", "AmazingSolution"
+    )
+    ultimate_solution = _LazySolution(
+        "solutions.ULT.ultimate_solution", "UltimateSolution"
+    )
+    demo_round1_solution = _LazySolution(
+        "solutions.DMO.demo_round1_solution", "DemoRound1Solution"
+    )
+    demo_round2_solution = _LazySolution(
+        "solutions.DMO.demo_round2_solution", "DemoRound2Solution"
+    )
+    demo_round3_solution = _LazySolution(
+        "solutions.DMO.demo_round3_solution", "DemoRound3Solution"
+    )
+    demo_round4n5_solution = _LazySolution(
+        "solutions.DMO.demo_round4n5_solution", "DemoRound4n5Solution"
+    )
+    queue_solution_entrypoint = _LazySolution(
+        "solutions.IWC.queue_solution_entrypoint", "QueueSolutionEntrypoint"
+    )
+    tenant_queues = _LazySolution("solutions.IWC.tenancy", "TenantQueues")
 
     # ~~~~~~~~ Single method challenges ~~~~~~
 
@@ -64,7 +96,11 @@ class EntryPointMapping:
 
     def enqueue(self, task):
         task_submission = TaskSubmission(**task)
-        return self.queue_solution_entrypoint.enqueue(task_submission)
+        response = self.queue_solution_entrypoint.enqueue(task_submission)
+        if is_dataclass(response):
+            # noinspection PyDataclass
+            return asdict(response)
+        return response
 
     def dequeue(self):
         response = self.queue_solution_entrypoint.dequeue()
@@ -73,14 +109,43 @@ class EntryPointMapping:
             return asdict(response)
         return response
 
+    def retry(self, dispatch, delay=None):
+        return self.queue_solution_entrypoint.retry(TaskDispatch(**dispatch), delay)
+
+    def peek(self, k=1):
+        return [asdict(dispatch) for dispatch in self.queue_solution_entrypoint.peek(k)]
+
     def size(self):
         return self.queue_solution_entrypoint.size()
 
     def age(self):
         return self.queue_solution_entrypoint.age()
 
-    def purge(self):
-        return self.queue_solution_entrypoint.purge()
+    def purge(self, user_id=None, provider=None):
+        return self.queue_solution_entrypoint.purge(user_id=user_id, provider=provider)
+
+    def cancel(self, user_id, provider):
+        return self.queue_solution_entrypoint.cancel(user_id, provider)
+
+    def add_tenant(self, name, weight=1.0):
+        self.tenant_queues.add_tenant(name, weight=weight)
+
+    def tenant_enqueue(self, tenant, task):
+        response = self.tenant_queues.enqueue(tenant, TaskSubmission(**task))
+        if is_dataclass(response):
+            # noinspection PyDataclass
+            return asdict(response)
+        return response
+
+    def tenant_dequeue(self):
+        response = self.tenant_queues.dequeue()
+        if is_dataclass(response):
+            # noinspection PyDataclass
+            return asdict(response)
+        return response
+
+    def tenant_size(self, tenant=None):
+        return self.tenant_queues.size(tenant)
 
     # ~~~~~~~~ Demo rounds ~~~~~~
 
@@ -108,6 +173,8 @@ class EntryPointMapping:
 
     # Round 3
     def inventory_add(self, inventory_item, number):
+        from solutions.DMO.inventory_item import InventoryItem
+
         item = InventoryItem(**inventory_item)
         return self.demo_round3_solution.inventory_add(item, number)
 
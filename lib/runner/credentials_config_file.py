@@ -1,25 +1,123 @@
 import os
 
 
+ENV_OVERRIDE_PREFIX = "TDL_"
+
+
 def read_from_config_file(key):
-    properties = read_properties_file()
-    return properties[key]
+    return get_credentials_config()[key]
 
 
 def read_from_config_file_with_default(key, default_value):
-    properties = read_properties_file()
-    return properties.get(key, default_value)
+    return get_credentials_config().get(key, default_value)
+
+
+class CredentialsConfig:
+    """
+    Parsed view of the credentials.config properties.
+
+    Values from the environment take precedence over the file: a key such as
+    ``tdl_hostname`` is overridden by the ``TDL_HOSTNAME`` variable.
+    """
+
+    def __init__(self, properties):
+        self._properties = dict(properties)
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def get(self, key, default_value=None):
+        return self._properties.get(key, default_value)
+
+    @property
+    def journey_id(self) -> str:
+        return self["tdl_journey_id"]
+
+    @property
+    def hostname(self) -> str:
+        return self["tdl_hostname"]
+
+    @property
+    def request_queue_name(self) -> str:
+        return self["tdl_request_queue_name"]
+
+    @property
+    def response_queue_name(self) -> str:
+        return self["tdl_response_queue_name"]
+
+    @property
+    def use_coloured_output(self) -> bool:
+        return self.get("tdl_use_coloured_output", True)
+
+    @property
+    def require_rec(self) -> bool:
+        return self.get("tdl_require_rec", True)
+
+
+class CredentialsConfigFile:
+    """
+    Loads a properties file once and reloads it only when its mtime changes.
+    """
+
+    def __init__(self, filepath, environ=None):
+        self._filepath = filepath
+        self._environ = os.environ if environ is None else environ
+        self._config = None
+        self._mtime_ns = None
+
+    def get(self) -> CredentialsConfig:
+        mtime_ns = self._current_mtime_ns()
+        if self._config is None or mtime_ns != self._mtime_ns:
+            self._config = self._load()
+            self._mtime_ns = mtime_ns
+        return self._config
+
+    def reload(self) -> CredentialsConfig:
+        self._config = None
+        return self.get()
+
+    def _current_mtime_ns(self):
+        try:
+            return os.stat(self._filepath).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> CredentialsConfig:
+        properties = load_properties(self._filepath)
+        for name, raw_value in self._environ.items():
+            if name.startswith(ENV_OVERRIDE_PREFIX):
+                properties[name.lower()] = parse_property_value(raw_value)
+        return CredentialsConfig(properties)
 
 
 # ~~~~ Helpers
 
 
-def read_properties_file():
+def credentials_config_path():
     current_dir = os.path.dirname(__file__)
-    properties = load_properties(
-        os.path.join(current_dir, "..", "..", "config", "credentials.config")
-    )
-    return properties
+    return os.path.join(current_dir, "..", "..", "config", "credentials.config")
+
+
+_credentials_config_file = CredentialsConfigFile(credentials_config_path())
+
+
+def get_credentials_config() -> CredentialsConfig:
+    return _credentials_config_file.get()
+
+
+def read_properties_file():
+    return load_properties(credentials_config_path())
+
+
+def parse_property_value(raw_value):
+    value = raw_value.strip().strip('"')
+    value = value.replace("\\=", "=")
+    if value in ["true", "false"]:
+        value = value == "true"
+    return value
 
 
 def load_properties(filepath, sep="=", comment_char="#"):
@@ -34,11 +132,7 @@ def load_properties(filepath, sep="=", comment_char="#"):
                 if l and not l.startswith(comment_char):
                     key_value = l.split(sep)
                     key = key_value[0].strip()
-                    value = sep.join(key_value[1:]).strip().strip('"')
-                    value = value.replace("\=", "=")
-                    if value in ["true", "false"]:
-                        value = value == "true"
-                    props[key] = value
+                    props[key] = parse_property_value(sep.join(key_value[1:]))
         return props
     except IOError as e:
         print(
@@ -0,0 +1,107 @@
+"""Capacity limits applied by ``Queue.enqueue`` before any task is stored.
+
+Every check is a comparison of counters the queue already maintains, so
+admission is O(1) per submission.  When shedding is enabled, a submission that
+would overflow the queue may evict tasks it outranks instead of being
+rejected.  A deadline outranks every priority level and a lower level outranks
+a higher one.  Victims are taken from the highest level first; within a level
+bank_statements go first, since those are dispatched last anyway, and then
+the most recently admitted.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from solutions.IWC.ordering_index import DEPRIORITISED_PROVIDER, QueuedTask
+from solutions.IWC.queue_metrics import AdmissionStats
+
+QUEUE_FULL = "queue_full"
+USER_LIMIT = "user_limit"
+INVALID_PRIORITY = "invalid_priority"
+
+
+@dataclass
+class AdmissionPolicy:
+    """Global and per-user limits on pending tasks; ``None`` means unbounded."""
+
+    max_size: int | None = None
+    max_per_user: int | None = None
+    shed_lower_priority: bool = False
+
+    def __post_init__(self) -> None:
+        for name in ("max_size", "max_per_user"):
+            limit = getattr(self, name)
+            if limit is not None and limit < 1:
+                raise ValueError(f"{name} must be at least 1")
+
+
+class AdmissionController:
+    def __init__(self, policy: AdmissionPolicy | None = None) -> None:
+        self.policy = policy or AdmissionPolicy()
+        self.stats = AdmissionStats()
+        # Candidates by (priority, deprioritised), each insertion-ordered so
+        # the most recently admitted candidate is last.
+        self._sheddable: dict[tuple[int, bool], dict[QueuedTask, None]] = {}
+        self._tracked: dict[QueuedTask, tuple[int, bool]] = {}
+
+    def rejection_reason(
+        self, new_tasks: int, user_size: int, queue_size: int
+    ) -> str | None:
+        if new_tasks == 0:
+            return None
+        policy = self.policy
+        if (
+            policy.max_per_user is not None
+            and user_size + new_tasks > policy.max_per_user
+        ):
+            return USER_LIMIT
+        if policy.max_size is not None and queue_size + new_tasks > policy.max_size:
+            return QUEUE_FULL
+        return None
+
+    def track(self, entry: QueuedTask) -> None:
+        """Register a task without a deadline as a shedding candidate.
+
+        Tracking an entry again files it under its current priority.
+        """
+        if not self.policy.shed_lower_priority:
+            return
+        self.untrack(entry)
+        key = (entry.priority, entry.provider == DEPRIORITISED_PROVIDER)
+        self._sheddable.setdefault(key, {})[entry] = None
+        self._tracked[entry] = key
+
+    def untrack(self, entry: QueuedTask) -> None:
+        key = self._tracked.pop(entry, None)
+        if key is not None:
+            candidates = self._sheddable[key]
+            del candidates[entry]
+            if not candidates:
+                del self._sheddable[key]
+
+    def can_shed(self, entry: QueuedTask, rank: int) -> bool:
+        """Whether a submission of ``rank`` (-1 for a deadline) outranks ``entry``."""
+        key = self._tracked.get(entry)
+        return key is not None and key[0] > rank
+
+    def shedding_candidates(self, rank: int) -> Iterator[QueuedTask]:
+        """Tracked tasks outranked by ``rank``, the first to shed first."""
+        for key in sorted(self._sheddable, reverse=True):
+            if key[0] <= rank:
+                return
+            yield from reversed(self._sheddable[key])
+
+    def clear(self) -> None:
+        self._sheddable.clear()
+        self._tracked.clear()
+
+
+__all__ = [
+    "INVALID_PRIORITY",
+    "QUEUE_FULL",
+    "USER_LIMIT",
+    "AdmissionController",
+    "AdmissionPolicy",
+]
@@ -0,0 +1,200 @@
+"""Memory footprint of a queue engine, for sizing hosts.
+
+``measure_footprint`` fills a fresh ``QueueSolutionEntrypoint`` with synthetic
+submissions drawn from a ``WorkloadMix`` and uses ``tracemalloc`` to measure
+the bytes still allocated once the submissions are queued.  That covers the
+``TaskSubmission`` objects and their ``metadata`` dicts as well as every index
+the engine keeps per task (ordering heaps, per-user and per-provider maps,
+timestamp range, timing wheel).  The engine is any factory returning a
+``Queue``, so fair, admission-controlled or expiring queues are measured the
+same way.  Run ``python -m solutions.IWC.capacity`` for a report.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import tracemalloc
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from solutions.IWC.fair_scheduling import FairnessPolicy
+from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+
+SYNTHETIC_BASE = datetime(2025, 1, 1, 12, 0)
+
+
+@dataclass
+class WorkloadMix:
+    """Shape of the synthetic submissions used to fill a queue.
+
+    ``provider_weights`` gives the relative share of submissions per provider;
+    submissions for a dependant provider also queue its dependencies.  Each
+    submission goes to one of ``users`` users (by default one per three
+    submissions, so the rule of 3 comes into play) and is timestamped within
+    ``spread_minutes`` of the start.  ``deadline_share`` and ``ttl_share`` are
+    the fractions that carry a deadline or a TTL in their metadata.
+    """
+
+    provider_weights: dict[str, float] = field(
+        default_factory=lambda: {
+            "bank_statements": 0.2,
+            "companies_house": 0.2,
+            "credit_check": 0.3,
+            "id_verification": 0.3,
+        }
+    )
+    users: int | None = None
+    spread_minutes: int = 60
+    deadline_share: float = 0.1
+    ttl_share: float = 0.1
+
+    def __post_init__(self) -> None:
+        if not self.provider_weights or any(
+            weight < 0 for weight in self.provider_weights.values()
+        ):
+            raise ValueError("provider_weights must be non-empty and non-negative")
+        if self.users is not None and self.users < 1:
+            raise ValueError("users must be at least 1")
+        for name in ("deadline_share", "ttl_share"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+
+def synthetic_submissions(
+    count: int, mix: WorkloadMix | None = None, seed: int = 0
+) -> Iterator[TaskSubmission]:
+    """Yield ``count`` reproducible submissions following ``mix``."""
+    mix = mix or WorkloadMix()
+    rng = random.Random(seed)
+    providers = list(mix.provider_weights)
+    weights = list(mix.provider_weights.values())
+    users = mix.users or max(1, count // 3)
+    for _ in range(count):
+        timestamp = SYNTHETIC_BASE + timedelta(
+            seconds=rng.randrange(mix.spread_minutes * 60 + 1)
+        )
+        metadata: dict[str, object] = {}
+        if rng.random() < mix.deadline_share:
+            metadata["deadline"] = timestamp + timedelta(minutes=rng.randrange(5, 60))
+        if rng.random() < mix.ttl_share:
+            metadata["ttl_seconds"] = 3600.0
+        yield TaskSubmission(
+            provider=rng.choices(providers, weights)[0],
+            user_id=rng.randrange(users),
+            timestamp=timestamp,
+            metadata=metadata,
+        )
+
+
+@dataclass
+class FootprintReport:
+    """Retained memory of one engine filled with ``tasks`` queued tasks.
+
+    ``baseline_bytes`` is what the empty engine holds; the remainder of
+    ``retained_bytes`` is attributed evenly to the queued tasks.
+    """
+
+    engine: str
+    submissions: int
+    tasks: int
+    baseline_bytes: int
+    retained_bytes: int
+    peak_bytes: int
+
+    @property
+    def bytes_per_task(self) -> float:
+        if not self.tasks:
+            return 0.0
+        return (self.retained_bytes - self.baseline_bytes) / self.tasks
+
+    def max_backlog(self, memory_budget_bytes: int) -> int:
+        """Queued tasks that fit in ``memory_budget_bytes``, projected linearly."""
+        available = memory_budget_bytes - self.baseline_bytes
+        if available <= 0 or self.bytes_per_task <= 0:
+            return 0
+        return int(available // self.bytes_per_task)
+
+
+def measure_footprint(
+    count: int,
+    engine: Callable[[], Queue] = Queue,
+    mix: WorkloadMix | None = None,
+    seed: int = 0,
+    name: str | None = None,
+) -> FootprintReport:
+    """Fill a new entrypoint built on ``engine()`` and measure what it retains.
+
+    Submissions are generated inside the traced region, so their objects
+    count towards the result; anything the queue did not keep is collected
+    before the measurement is taken.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    gc.collect()
+    start, _ = tracemalloc.get_traced_memory()
+    try:
+        entrypoint = QueueSolutionEntrypoint(engine())
+        gc.collect()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for submission in synthetic_submissions(count, mix, seed):
+            entrypoint.enqueue(submission)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tasks = entrypoint.size()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    if not name:
+        name = str(getattr(engine, "__name__", repr(engine)))
+    return FootprintReport(
+        engine=name,
+        submissions=count,
+        tasks=tasks,
+        baseline_bytes=baseline - start,
+        retained_bytes=retained - start,
+        peak_bytes=peak - start,
+    )
+
+
+ENGINES: dict[str, Callable[[], Queue]] = {
+    "legacy": Queue,
+    "fair": lambda: Queue(fairness=FairnessPolicy()),
+}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--budget-mib", type=float, default=512.0)
+    parser.add_argument("--engine", choices=ENGINES, action="append")
+    args = parser.parse_args(argv)
+
+    budget = int(args.budget_mib * 1024 * 1024)
+    mix = WorkloadMix(users=args.users)
+    print(f"{'engine':<10}{'tasks':>10}{'bytes/task':>12}{'max backlog':>14}")
+    for name in args.engine or ENGINES:
+        report = measure_footprint(args.tasks, ENGINES[name], mix, name=name)
+        print(
+            f"{name:<10}{report.tasks:>10}{report.bytes_per_task:>12.0f}"
+            f"{report.max_backlog(budget):>14}"
+        )
+
+
+__all__ = [
+    "FootprintReport",
+    "WorkloadMix",
+    "measure_footprint",
+    "synthetic_submissions",
+]
+
+
+if __name__ == "__main__":
+    main()
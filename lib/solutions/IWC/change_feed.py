@@ -0,0 +1,131 @@
+"""Async feed of queue events for downstream consumers.
+
+``Queue.events()`` returns an ``EventSubscription`` that is consumed with
+``async for``.  The queue never waits on a subscriber: each one has a bounded
+buffer, and when it is full the oldest event is dropped and counted, so a slow
+consumer loses history rather than holding up enqueue or dequeue.  Events may
+be published from any thread; the consumer is woken on its own event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+ENQUEUED = "enqueued"
+REPLACED = "replaced"
+PROMOTED = "promoted"
+DISPATCHED = "dispatched"
+CANCELLED = "cancelled"
+SHED = "shed"
+EXPIRED = "expired"
+PURGED = "purged"
+
+
+@dataclass(frozen=True)
+class QueueEvent:
+    """One change to the queued tasks.
+
+    ``replaced`` means a queued task was superseded by an older submission for
+    the same user and provider; ``shed`` that admission control evicted it to
+    make room for a task that outranks it, either by priority or by having a
+    deadline, which outranks every priority.  A ``purged`` event covers a
+    whole ``purge`` call: ``provider`` and ``user_id`` are its filters
+    (``None`` for all) and ``count`` is how many tasks it removed.
+    """
+
+    kind: str
+    provider: str | None
+    user_id: int | None
+    at: datetime
+    count: int = 1
+
+
+class EventSubscription:
+    """Bounded, drop-oldest buffer of ``QueueEvent`` read as an async iterator."""
+
+    def __init__(
+        self,
+        max_buffer: int = 1024,
+        on_close: Callable[[EventSubscription], None] | None = None,
+    ) -> None:
+        if max_buffer < 1:
+            raise ValueError("max_buffer must be at least 1")
+        self._buffer: deque[QueueEvent] = deque(maxlen=max_buffer)
+        self._on_close = on_close
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._waiter: asyncio.Future[None] | None = None
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def publish(self, event: QueueEvent) -> None:
+        if self._closed:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(event)
+        self._wake()
+
+    def drain(self) -> list[QueueEvent]:
+        """Remove and return the buffered events without waiting, oldest first."""
+        buffer = self._buffer
+        events = []
+        while buffer:
+            events.append(buffer.popleft())
+        return events
+
+    def close(self) -> None:
+        """Stop receiving events; iteration ends once the buffer is drained."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._on_close is not None:
+            self._on_close(self)
+        self._wake()
+
+    def __aiter__(self) -> EventSubscription:
+        return self
+
+    async def __anext__(self) -> QueueEvent:
+        while True:
+            if self._buffer:
+                return self._buffer.popleft()
+            if self._closed:
+                raise StopAsyncIteration
+            self._loop = asyncio.get_running_loop()
+            self._waiter = self._loop.create_future()
+            # Re-check after publishing the waiter, in case an event arrived
+            # from another thread in between.
+            if not self._buffer and not self._closed:
+                await self._waiter
+            self._waiter = None
+
+    def _wake(self) -> None:
+        waiter = self._waiter
+        if waiter is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(_resolve, waiter)
+
+
+def _resolve(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+__all__ = [
+    "CANCELLED",
+    "DISPATCHED",
+    "ENQUEUED",
+    "EXPIRED",
+    "PROMOTED",
+    "PURGED",
+    "REPLACED",
+    "SHED",
+    "EventSubscription",
+    "QueueEvent",
+]
@@ -0,0 +1,79 @@
+"""Coalesces dispatches for the same provider into bulk calls.
+
+Dispatches leave the queue one at a time; providers that accept many users in
+one call set ``Provider.batch_size`` and ``Provider.batch_window_seconds`` so
+the worker can hand them over together.  A batch opens with its first
+dispatch and is released as soon as it is full or its window has elapsed,
+whichever comes first.  Providers left at the defaults are released
+immediately as batches of one.  Dispatches from ``TenantQueues`` are batched
+per tenant, so one bulk call never mixes the users of different tenants.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Provider
+from solutions.IWC.task_types import TaskBatch, TaskDispatch, TenantDispatch
+
+
+class DispatchCoalescer:
+    def __init__(
+        self,
+        providers: list[Provider] | None = None,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        self._clock = clock
+        self._limits = {
+            provider.name: (
+                provider.batch_size,
+                timedelta(seconds=provider.batch_window_seconds),
+            )
+            for provider in (REGISTERED_PROVIDERS if providers is None else providers)
+        }
+        # Keyed by (tenant, provider) and insertion-ordered, so the batch that
+        # opened first is released first.
+        self._open: dict[tuple[str | None, str], tuple[TaskBatch, datetime]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(batch.user_ids) for batch, _ in self._open.values())
+
+    def add(self, dispatch: TaskDispatch) -> TaskBatch | None:
+        """Add ``dispatch`` to its provider's batch; return the batch if full."""
+        batch_size, window = self._limits.get(dispatch.provider, (1, timedelta()))
+        tenant = dispatch.tenant if isinstance(dispatch, TenantDispatch) else None
+        key = (tenant, dispatch.provider)
+        pending = self._open.get(key)
+        if pending is None:
+            pending = self._open[key] = (
+                TaskBatch(dispatch.provider, [], tenant),
+                self._clock() + window,
+            )
+        batch = pending[0]
+        # A user fetched twice within one window is served by the same call.
+        if dispatch.user_id not in batch.user_ids:
+            batch.user_ids.append(dispatch.user_id)
+        if len(batch.user_ids) >= batch_size or window <= timedelta():
+            del self._open[key]
+            return batch
+        return None
+
+    def due(self) -> list[TaskBatch]:
+        """Release the batches whose window has elapsed."""
+        now = self._clock()
+        expired = [key for key, (_, due_at) in self._open.items() if due_at <= now]
+        return [self._open.pop(key)[0] for key in expired]
+
+    def flush(self) -> list[TaskBatch]:
+        """Release every open batch regardless of its window."""
+        batches = [batch for batch, _ in self._open.values()]
+        self._open.clear()
+        return batches
+
+    @property
+    def next_due(self) -> datetime | None:
+        return min((due_at for _, due_at in self._open.values()), default=None)
+
+
+__all__ = ["DispatchCoalescer"]
@@ -0,0 +1,185 @@
+"""Optional weighted fair queueing across users for ``Queue.dequeue``.
+
+In fair mode each user keeps their own legacy ordering (rule of 3, bank
+statements deprioritisation, timestamps) and the scheduler decides whose turn
+it is.  Users are served by self-clocked fair queueing: every active user
+carries a virtual finish tag, the smallest tag is served next, and serving a
+user advances their tag by ``1 / weight``.  Selecting a user is O(log U).
+
+Tasks with a deadline are not part of any user's turn: they are kept in one
+earliest-deadline-first heap shared by all users and served before the
+scheduler picks a user, exactly as without fairness.
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from solutions.IWC.ordering_index import DeadlineHeap, OrderingIndex, QueuedTask
+from solutions.IWC.ordering_policy import COMPILED_LEGACY_ORDERING, CompiledOrdering
+
+
+@dataclass
+class FairnessPolicy:
+    """Configuration for fair dispatch across users.
+
+    ``max_consecutive`` caps how many tasks one user may receive back to back
+    while another user is waiting, whatever their weights.
+    """
+
+    weights: dict[int, float] = field(default_factory=dict)
+    default_weight: float = 1.0
+    max_consecutive: int = 1
+
+    def __post_init__(self) -> None:
+        if self.default_weight <= 0:
+            raise ValueError("default_weight must be positive")
+        if any(weight <= 0 for weight in self.weights.values()):
+            raise ValueError("user weights must be positive")
+        if self.max_consecutive < 1:
+            raise ValueError("max_consecutive must be at least 1")
+
+    def weight_for(self, user_id: int) -> float:
+        return self.weights.get(user_id, self.default_weight)
+
+
+class FairOrderingIndex:
+    """Per-user ``OrderingIndex`` instances drained in weighted fair order."""
+
+    def __init__(
+        self,
+        policy: FairnessPolicy,
+        ordering: CompiledOrdering = COMPILED_LEGACY_ORDERING,
+    ) -> None:
+        self._policy = policy
+        self._ordering = ordering
+        self._user_orders: dict[int, OrderingIndex] = {}
+        self._deadlines = DeadlineHeap()
+        self._user_heap: list[tuple[float, int, int]] = []
+        self._user_tags: dict[int, tuple[float, int]] = {}
+        self._tag_sequence = 0
+        self._virtual_time = 0.0
+        self._last_user: int | None = None
+        self._streak = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, entry: QueuedTask) -> None:
+        if entry.deadline is not None:
+            self._deadlines.add(entry)
+            self._size += 1
+            return
+        user_order = self._user_orders.get(entry.user_id)
+        if user_order is None:
+            user_order = self._user_orders[entry.user_id] = OrderingIndex(
+                self._ordering
+            )
+            self._schedule(entry.user_id, self._virtual_time)
+        user_order.add(entry)
+        self._size += 1
+
+    def discard(self, entry: QueuedTask) -> None:
+        if entry.deadline is not None:
+            entry.generation += 1
+            self._deadlines.discard(entry)
+            self._size -= 1
+            return
+        user_order = self._user_orders[entry.user_id]
+        user_order.discard(entry)
+        self._size -= 1
+        if not user_order:
+            self._deactivate(entry.user_id)
+
+    def peek(self, boost_cutoff: datetime) -> QueuedTask | None:
+        if self._deadlines:
+            return self._deadlines.peek()
+        user_id = self._next_user()
+        if user_id is None:
+            return None
+        return self._user_orders[user_id].peek(boost_cutoff)
+
+    def pop(self, boost_cutoff: datetime) -> QueuedTask | None:
+        if self._deadlines:
+            entry = self._deadlines.peek()
+            if entry is not None:
+                self.discard(entry)
+            return entry
+        user_id = self._next_user()
+        if user_id is None:
+            return None
+        user_order = self._user_orders[user_id]
+        entry = user_order.pop(boost_cutoff)
+        self._size -= 1
+
+        finish_tag, _ = self._user_tags[user_id]
+        self._virtual_time = finish_tag
+        self._streak = self._streak + 1 if user_id == self._last_user else 1
+        self._last_user = user_id
+        if user_order:
+            self._schedule(user_id, finish_tag)
+        else:
+            self._deactivate(user_id)
+        return entry
+
+    def snapshot(self) -> tuple:
+        """Capture the scheduler state so a rehearsed dequeue can be undone."""
+        return (
+            list(self._user_heap),
+            dict(self._user_tags),
+            self._tag_sequence,
+            self._virtual_time,
+            self._last_user,
+            self._streak,
+        )
+
+    def restore(self, state: tuple) -> None:
+        (
+            user_heap,
+            user_tags,
+            self._tag_sequence,
+            self._virtual_time,
+            self._last_user,
+            self._streak,
+        ) = state
+        self._user_heap = user_heap
+        self._user_tags = user_tags
+
+    def _schedule(self, user_id: int, start_tag: float) -> None:
+        finish_tag = start_tag + 1.0 / self._policy.weight_for(user_id)
+        self._tag_sequence += 1
+        self._user_tags[user_id] = (finish_tag, self._tag_sequence)
+        heapq.heappush(self._user_heap, (finish_tag, self._tag_sequence, user_id))
+
+    def _deactivate(self, user_id: int) -> None:
+        del self._user_orders[user_id]
+        del self._user_tags[user_id]
+
+    def _valid_head(self, position: int = 0) -> bool:
+        finish_tag, sequence, user_id = self._user_heap[position]
+        return self._user_tags.get(user_id) == (finish_tag, sequence)
+
+    def _next_user(self) -> int | None:
+        heap = self._user_heap
+        while heap and not self._valid_head():
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        user_id = heap[0][2]
+        if user_id != self._last_user or self._streak < self._policy.max_consecutive:
+            return user_id
+
+        # The head user has used up their consecutive allowance; serve the best
+        # other active user if there is one.
+        capped = heapq.heappop(heap)
+        while heap and not self._valid_head():
+            heapq.heappop(heap)
+        runner_up = heap[0][2] if heap else user_id
+        heapq.heappush(heap, capped)
+        return runner_up
+
+
+__all__ = ["FairOrderingIndex", "FairnessPolicy"]
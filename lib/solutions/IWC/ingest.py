@@ -0,0 +1,128 @@
+"""Streaming ingest of JSONL task submissions into a ``Queue``.
+
+Each line is one submission, e.g.
+``{"provider": "companies_house", "user_id": 1, "timestamp": "2025-10-20 12:00:00"}``
+with an optional ``metadata`` object.  Lines are read lazily, parsed into
+``TaskSubmission`` objects with their timestamps already converted to
+``datetime`` (so the queue never parses them again), their ``deadline`` and
+``ttl_seconds`` metadata validated the same way, and handed to
+``Queue.enqueue_many`` in chunks of ``chunk_size``, so memory held by the
+ingest itself stays bounded however large the input is.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from os import PathLike
+
+from solutions.IWC.ordering_index import priority_level
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import (
+    TaskSubmission,
+    normalise_timestamp,
+    normalise_ttl,
+)
+
+MAX_MALFORMED_SAMPLES = 20
+
+
+@dataclass
+class IngestReport:
+    rows: int = 0
+    enqueued: int = 0
+    rejected: int = 0
+    malformed: int = 0
+    elapsed_seconds: float = 0.0
+    # Line numbers of the first few malformed lines, for diagnosis.
+    malformed_lines: list[int] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def parse_submission(line: str | bytes) -> TaskSubmission:
+    """Parse one JSONL row.
+
+    Raises ``TypeError`` if a field has the wrong type and ``ValueError`` if
+    the row is otherwise malformed.
+    """
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise TypeError("row is not an object")
+    provider = row.get("provider")
+    user_id = row.get("user_id")
+    metadata = row.get("metadata", {})
+    if not isinstance(provider, str):
+        raise TypeError("provider must be a string")
+    if not provider:
+        raise ValueError("provider must not be empty")
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        raise TypeError("user_id must be an integer")
+    if not isinstance(row.get("timestamp"), str):
+        raise TypeError("timestamp must be an ISO string")
+    if not isinstance(metadata, dict):
+        raise TypeError("metadata must be an object")
+    if metadata.get("priority") is not None:
+        priority_level(metadata["priority"])
+    if metadata.get("deadline") is not None:
+        if not isinstance(metadata["deadline"], str):
+            raise TypeError("deadline must be an ISO string")
+        metadata["deadline"] = normalise_timestamp(metadata["deadline"])
+    if metadata.get("ttl_seconds") is not None:
+        metadata["ttl_seconds"] = normalise_ttl(metadata["ttl_seconds"])
+    return TaskSubmission(
+        provider=provider,
+        user_id=user_id,
+        timestamp=normalise_timestamp(row["timestamp"]),
+        metadata=metadata,
+    )
+
+
+def ingest_lines(
+    queue: Queue, lines: Iterable[str | bytes], chunk_size: int = 1000
+) -> IngestReport:
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    report = IngestReport()
+    started = time.perf_counter()
+    chunk: list[TaskSubmission] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        report.rows += 1
+        try:
+            chunk.append(parse_submission(line))
+        except (TypeError, ValueError):
+            # json.JSONDecodeError and bad ISO timestamps are ValueErrors too.
+            report.malformed += 1
+            if len(report.malformed_lines) < MAX_MALFORMED_SAMPLES:
+                report.malformed_lines.append(line_number)
+            continue
+        if len(chunk) >= chunk_size:
+            _flush(queue, chunk, report)
+    _flush(queue, chunk, report)
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+def ingest_file(
+    queue: Queue, path: str | PathLike[str], chunk_size: int = 1000
+) -> IngestReport:
+    with open(path, "rb") as lines:
+        return ingest_lines(queue, lines, chunk_size)
+
+
+def _flush(queue: Queue, chunk: list[TaskSubmission], report: IngestReport) -> None:
+    if not chunk:
+        return
+    rejected = len(queue.enqueue_many(chunk))
+    report.rejected += rejected
+    report.enqueued += len(chunk) - rejected
+    chunk.clear()
+
+
+__all__ = ["IngestReport", "ingest_file", "ingest_lines", "parse_submission"]
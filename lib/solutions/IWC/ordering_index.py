@@ -0,0 +1,364 @@
+"""Incremental ordering structures backing ``Queue.dequeue``.
+
+The legacy queue re-sorted every pending task on each dequeue using the key
+``(priority, group_earliest_timestamp, provider_priority, timestamp,
+provider_tiebreaker)``.  That order is now described by an ``OrderingPolicy``
+whose compiled group and lane keys are computed once per task on insertion.
+Only the provider components depend on the state of the whole queue (a
+bank_statements task is boosted once it is five minutes older than the newest
+task), so tasks are kept in static per-group heaps and the boost is resolved
+when the heads of two lanes are compared.
+
+Priorities are small integers in ``range(PRIORITY_LEVELS)``, lower first, so
+the buckets are kept in a bucket queue: one slot per level holding that
+level's group buckets, plus a bitmask of non-empty levels whose lowest set bit
+is the next level to serve.  Finding that level is O(1); only the rule-of-3
+level ever holds more than one group, ordered by a small heap.
+
+Tasks carrying a deadline bypass the buckets: they are kept in a single
+earliest-deadline-first heap that is served before any best-effort task.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from solutions.IWC.ordering_policy import (
+    BOOST_AGE,
+    COMPILED_LEGACY_ORDERING,
+    DEPRIORITISED_PROVIDER,
+    CompiledOrdering,
+)
+from solutions.IWC.task_types import TaskSubmission
+from solutions.IWC.timing_wheel import TimerHandle
+
+if TYPE_CHECKING:
+    from solutions.IWC.tracing import TaskTrace
+
+PRIORITY_LEVELS = 16
+
+_EPOCH = datetime(1, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def priority_level(value: object) -> int:
+    """Validate ``metadata['priority']``.
+
+    Raises ``TypeError`` if it is not an integer and ``ValueError`` if it is
+    out of range.
+    """
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError(f"priority must be an integer, not {value!r}")
+    if not 0 <= value < PRIORITY_LEVELS:
+        raise ValueError(f"priority must be in range({PRIORITY_LEVELS}), not {value}")
+    return int(value)
+
+
+class QueuedTask:
+    """Bookkeeping for one pending task.
+
+    ``generation`` is bumped whenever the task leaves an ordering structure, so
+    heap items pushed for an older placement are recognised as stale and
+    skipped lazily instead of being searched for and removed.
+    """
+
+    __slots__ = (
+        "deadline",
+        "expiry",
+        "generation",
+        "group_key",
+        "group_timestamp",
+        "live",
+        "priority",
+        "provider",
+        "seq",
+        "task",
+        "timestamp",
+        "trace",
+        "user_id",
+    )
+
+    def __init__(
+        self,
+        task: TaskSubmission,
+        timestamp: datetime,
+        seq: int,
+        priority: int,
+        group_timestamp: datetime,
+        deadline: datetime | None = None,
+    ) -> None:
+        self.task = task
+        self.user_id = task.user_id
+        self.provider = task.provider
+        self.timestamp = timestamp
+        self.seq = seq
+        self.priority = priority
+        self.group_timestamp = group_timestamp
+        self.group_key: object = None
+        self.deadline = deadline
+        self.expiry: TimerHandle[QueuedTask] | None = None
+        self.generation = 0
+        self.live = True
+        self.trace: TaskTrace | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"QueuedTask(provider={self.provider!r}, user_id={self.user_id!r}, "
+            f"timestamp={self.timestamp!r}, priority={self.priority!r})"
+        )
+
+
+# Heap items are ``(*key, generation, entry)``, flat so that comparing two
+# items never descends into a nested tuple.  Keys end with ``seq``, so they are
+# unique and the generation and entry are never compared.
+_HeapItem = tuple
+
+
+def _head(heap: list[_HeapItem]) -> _HeapItem | None:
+    while heap:
+        item = heap[0]
+        if item[-2] == item[-1].generation:
+            return item
+        heapq.heappop(heap)
+    return None
+
+
+def _compact(heap: list[_HeapItem]) -> None:
+    heap[:] = [item for item in heap if item[-2] == item[-1].generation]
+    heapq.heapify(heap)
+
+
+class DeadlineHeap:
+    """Tasks carrying a deadline, earliest deadline first, then by ``seq``.
+
+    Callers bump ``entry.generation`` before ``discard``; the stale heap item
+    is dropped when it surfaces.
+    """
+
+    __slots__ = ("_heap", "_size")
+
+    def __init__(self) -> None:
+        self._heap: list[_HeapItem] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, entry: QueuedTask) -> None:
+        heapq.heappush(self._heap, (entry.deadline, entry.seq, entry.generation, entry))
+        self._size += 1
+
+    def discard(self, entry: QueuedTask) -> None:
+        self._size -= 1
+        if len(self._heap) > 2 * self._size + 64:
+            _compact(self._heap)
+
+    def peek(self) -> QueuedTask | None:
+        item = _head(self._heap) if self._size else None
+        return None if item is None else item[-1]
+
+
+class _Bucket:
+    """Tasks sharing a priority and group key, split into two lanes."""
+
+    __slots__ = ("deprioritised", "other", "size")
+
+    def __init__(self) -> None:
+        self.other: list[_HeapItem] = []
+        self.deprioritised: list[_HeapItem] = []
+        self.size = 0
+
+    def best(
+        self, ordering: CompiledOrdering, boost_cutoff: datetime
+    ) -> QueuedTask | None:
+        other = _head(self.other)
+        deprioritised = _head(self.deprioritised)
+        if deprioritised is None:
+            return None if other is None else other[-1]
+        if other is None:
+            return deprioritised[-1]
+        # A boosted deprioritised task ranks with everything else on the lane
+        # key; otherwise it always sorts after the other lane.
+        if deprioritised[-1].timestamp <= boost_cutoff and ordering.boost_wins(
+            deprioritised[:-2], other[:-2]
+        ):
+            return deprioritised[-1]
+        return other[-1]
+
+    def compact(self) -> None:
+        _compact(self.other)
+        _compact(self.deprioritised)
+
+
+class _Level:
+    """Group buckets sharing one priority, ordered by group key."""
+
+    __slots__ = ("buckets", "groups", "size")
+
+    def __init__(self) -> None:
+        self.buckets: dict[object, _Bucket] = {}
+        self.groups: list = []
+        self.size = 0
+
+
+class OrderingIndex:
+    """Pending tasks in the order given by a compiled ``OrderingPolicy``.
+
+    Insertion and removal are O(log n); removal is lazy, so ``discard`` only
+    updates counters and the stale heap item is dropped when it surfaces.
+    """
+
+    def __init__(self, ordering: CompiledOrdering = COMPILED_LEGACY_ORDERING) -> None:
+        self._ordering = ordering
+        self._levels: list[_Level | None] = [None] * PRIORITY_LEVELS
+        self._occupied = 0
+        self._deadlines = DeadlineHeap()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, entry: QueuedTask) -> None:
+        self._size += 1
+        if entry.deadline is not None:
+            self._deadlines.add(entry)
+            return
+        ordering = self._ordering
+        level = self._levels[entry.priority]
+        if level is None:
+            level = self._levels[entry.priority] = _Level()
+        group_key = entry.group_key = ordering.group_key(entry)
+        bucket = level.buckets.get(group_key)
+        if bucket is None:
+            bucket = level.buckets[group_key] = _Bucket()
+            heapq.heappush(level.groups, group_key)
+        lane = (
+            bucket.deprioritised
+            if entry.provider == ordering.deprioritised
+            else bucket.other
+        )
+        heapq.heappush(lane, (*ordering.lane_key(entry), entry.generation, entry))
+        bucket.size += 1
+        level.size += 1
+        self._occupied |= 1 << entry.priority
+
+    def discard(self, entry: QueuedTask) -> None:
+        entry.generation += 1
+        self._size -= 1
+        if entry.deadline is not None:
+            self._deadlines.discard(entry)
+            return
+        level = self._levels[entry.priority]
+        assert level is not None
+        level.size -= 1
+        if not level.size:
+            # Every item left in the level is stale, so drop them all at once.
+            self._levels[entry.priority] = None
+            self._occupied &= ~(1 << entry.priority)
+            return
+        bucket = level.buckets[entry.group_key]
+        bucket.size -= 1
+        if len(bucket.other) + len(bucket.deprioritised) > 2 * bucket.size + 64:
+            bucket.compact()
+
+    def peek(self, boost_cutoff: datetime) -> QueuedTask | None:
+        if self._deadlines:
+            return self._deadlines.peek()
+        occupied = self._occupied
+        if not occupied:
+            return None
+        level = self._levels[(occupied & -occupied).bit_length() - 1]
+        assert level is not None
+        groups = level.groups
+        while True:
+            bucket = level.buckets[groups[0]]
+            if bucket.size:
+                return bucket.best(self._ordering, boost_cutoff)
+            del level.buckets[heapq.heappop(groups)]
+
+    def pop(self, boost_cutoff: datetime) -> QueuedTask | None:
+        entry = self.peek(boost_cutoff)
+        if entry is not None:
+            self.discard(entry)
+        return entry
+
+    def snapshot(self) -> tuple:
+        """Ordering here depends only on task keys, so there is nothing to save."""
+        return ()
+
+    def restore(self, state: tuple) -> None:
+        pass
+
+
+class TimestampRange:
+    """Oldest and newest timestamps of the live tasks, with lazy deletion."""
+
+    def __init__(self) -> None:
+        self._oldest: list[tuple[int, int, QueuedTask]] = []
+        self._newest: list[tuple[int, int, QueuedTask]] = []
+        self._size = 0
+
+    def add(self, entry: QueuedTask) -> None:
+        micros = (entry.timestamp - _EPOCH) // _MICROSECOND
+        heapq.heappush(self._oldest, (micros, entry.seq, entry))
+        heapq.heappush(self._newest, (-micros, entry.seq, entry))
+        self._size += 1
+
+    def discard(self, entry: QueuedTask) -> None:
+        """Account for ``entry`` having been marked as no longer live."""
+        self._size -= 1
+        if len(self._oldest) > 2 * self._size + 64:
+            for heap in (self._oldest, self._newest):
+                heap[:] = [item for item in heap if item[2].live]
+                heapq.heapify(heap)
+
+    @staticmethod
+    def _head(heap: list) -> QueuedTask | None:
+        while heap:
+            entry = heap[0][2]
+            if entry.live:
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def newest_first(self) -> Iterator[QueuedTask]:
+        """Yield live tasks from newest to oldest without popping the heap."""
+        heap = self._newest
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            item, position = heapq.heappop(frontier)
+            if item[2].live:
+                yield item[2]
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    @property
+    def oldest(self) -> datetime | None:
+        entry = self._head(self._oldest)
+        return None if entry is None else entry.timestamp
+
+    @property
+    def newest(self) -> datetime | None:
+        entry = self._head(self._newest)
+        return None if entry is None else entry.timestamp
+
+    def clear(self) -> None:
+        self._oldest.clear()
+        self._newest.clear()
+        self._size = 0
+
+
+__all__ = [
+    "BOOST_AGE",
+    "DEPRIORITISED_PROVIDER",
+    "PRIORITY_LEVELS",
+    "DeadlineHeap",
+    "OrderingIndex",
+    "QueuedTask",
+    "TimestampRange",
+    "priority_level",
+]
@@ -0,0 +1,177 @@
+"""Declarative dequeue ordering, compiled once into precomputed task keys.
+
+An ``OrderingPolicy`` lists clauses from most to least significant.  The
+legacy order is::
+
+    OrderingPolicy(
+        [
+            ByPriority(),
+            ByGroup(),
+            Deprioritise("bank_statements", boost_after=timedelta(minutes=5)),
+            ByTimestamp(),
+            BoostedWinsTies(),
+        ]
+    )
+
+``compile`` turns the clauses into a ``CompiledOrdering``: the key clauses
+before ``Deprioritise`` become the group key and those after it the lane key,
+each read with a single ``attrgetter``.  ``OrderingIndex`` computes both keys
+once per task when the task is (re)inserted, i.e. when its priority or group
+changes, and never per comparison.  The only rule that depends on the rest of
+the queue, the age boost of the deprioritised provider, is applied when the
+heads of the two lanes of a group are compared.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import timedelta
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from solutions.IWC.ordering_index import QueuedTask
+
+DEPRIORITISED_PROVIDER = "bank_statements"
+BOOST_AGE = timedelta(minutes=5)
+
+
+@dataclass(frozen=True)
+class ByPriority:
+    """Lower priority levels first; must lead, as it indexes the bucket queue."""
+
+    attribute = "priority"
+
+
+@dataclass(frozen=True)
+class ByGroup:
+    """Earlier rule-of-3 groups first; ungrouped tasks share the latest group."""
+
+    attribute = "group_timestamp"
+
+
+@dataclass(frozen=True)
+class ByTimestamp:
+    """Older submissions first."""
+
+    attribute = "timestamp"
+
+
+@dataclass(frozen=True)
+class Deprioritise:
+    """Serve ``provider`` after everything else in its group.
+
+    Once it is ``boost_after`` older than the newest queued task it ranks with
+    the other tasks on the remaining lane clauses instead.
+    """
+
+    provider: str = DEPRIORITISED_PROVIDER
+    boost_after: timedelta = BOOST_AGE
+
+
+@dataclass(frozen=True)
+class BoostedWinsTies:
+    """A boosted deprioritised task wins ties on the preceding lane clauses."""
+
+
+KeyClause = ByPriority | ByGroup | ByTimestamp
+Clause = KeyClause | Deprioritise | BoostedWinsTies
+
+
+def _key_getter(attributes: Sequence[str]) -> Callable[[object], object]:
+    """One C-level call reading every attribute; a bare value if only one."""
+    if not attributes:
+        return lambda entry: None
+    return attrgetter(*attributes)
+
+
+def _lane_key_getter(attributes: Sequence[str]) -> Callable[[QueuedTask], tuple]:
+    """Like ``_key_getter`` but always a tuple, ending with the sequence number."""
+    if not attributes:
+        return _sequence_only
+    return attrgetter(*attributes, "seq")
+
+
+def _sequence_only(entry: QueuedTask) -> tuple:
+    return (entry.seq,)
+
+
+@dataclass(frozen=True)
+class CompiledOrdering:
+    """Key functions and boost rule produced by ``OrderingPolicy.compile``.
+
+    ``group_key`` returns a bare value when a single clause forms the group.
+    ``lane_key`` always returns a tuple ending with the task's sequence
+    number, so keys are unique and equal inputs keep their submission order.
+    """
+
+    group_key: Callable[[object], object]
+    lane_key: Callable[[QueuedTask], tuple]
+    deprioritised: str | None
+    boost_after: timedelta
+    boosted_wins_ties: bool
+
+    def boost_wins(self, boosted_key: tuple, other_key: tuple) -> bool:
+        if self.boosted_wins_ties:
+            return boosted_key[:-1] <= other_key[:-1]
+        return boosted_key < other_key
+
+
+@dataclass(frozen=True)
+class OrderingPolicy:
+    clauses: Sequence[Clause]
+
+    def compile(self) -> CompiledOrdering:
+        """Validate the clauses and build the key functions; raises ``ValueError``."""
+        clauses = list(self.clauses)
+        if not clauses or not isinstance(clauses[0], ByPriority):
+            raise ValueError("an ordering policy must start with ByPriority")
+        deprioritise = [c for c in clauses if isinstance(c, Deprioritise)]
+        if len(deprioritise) > 1:
+            raise ValueError("at most one Deprioritise clause is supported")
+        ties = [i for i, c in enumerate(clauses) if isinstance(c, BoostedWinsTies)]
+        if ties and (not deprioritise or ties != [len(clauses) - 1]):
+            raise ValueError(
+                "BoostedWinsTies must be the last clause, after Deprioritise"
+            )
+
+        split = clauses.index(deprioritise[0]) if deprioritise else len(clauses)
+        group = [c.attribute for c in clauses[1:split] if hasattr(c, "attribute")]
+        lane = [c.attribute for c in clauses[split:] if hasattr(c, "attribute")]
+        if len(set(group + lane)) != len(group + lane) or "priority" in group + lane:
+            raise ValueError("each key clause may appear only once")
+        return CompiledOrdering(
+            group_key=_key_getter(group),
+            lane_key=_lane_key_getter(lane),
+            deprioritised=deprioritise[0].provider if deprioritise else None,
+            boost_after=deprioritise[0].boost_after if deprioritise else timedelta(),
+            boosted_wins_ties=bool(ties),
+        )
+
+
+LEGACY_ORDERING = OrderingPolicy(
+    [
+        ByPriority(),
+        ByGroup(),
+        Deprioritise(DEPRIORITISED_PROVIDER, BOOST_AGE),
+        ByTimestamp(),
+        BoostedWinsTies(),
+    ]
+)
+COMPILED_LEGACY_ORDERING = LEGACY_ORDERING.compile()
+
+
+__all__ = [
+    "BOOST_AGE",
+    "COMPILED_LEGACY_ORDERING",
+    "DEPRIORITISED_PROVIDER",
+    "LEGACY_ORDERING",
+    "BoostedWinsTies",
+    "ByGroup",
+    "ByPriority",
+    "ByTimestamp",
+    "CompiledOrdering",
+    "Deprioritise",
+    "OrderingPolicy",
+]
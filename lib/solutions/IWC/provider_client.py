@@ -0,0 +1,185 @@
+"""Pooled keep-alive HTTP connections to provider endpoints.
+
+Connections are opened per ``Provider.base_url`` on first use and go back to
+an idle stack after each request, so executing many dispatches for one
+provider reuses a handful of sockets instead of paying a TCP (and TLS)
+handshake per task.  A pool holds at most ``Provider.pool_size`` connections;
+callers beyond that wait up to ``Provider.timeout_seconds`` for one to be
+released, and the same timeout applies to each socket operation.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Provider
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+@dataclass
+class ProviderResponse:
+    status: int
+    body: bytes
+    elapsed_seconds: float
+
+
+@dataclass
+class ConnectionPoolStats:
+    requests: int = 0
+    connections_opened: int = 0
+    reused: int = 0
+    stale_retries: int = 0
+    wait_timeouts: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+
+class ConnectionPool:
+    """Keep-alive connections to one base URL; safe to share between threads."""
+
+    def __init__(self, base_url: str, size: int = 4, timeout: float = 10.0) -> None:
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        parts = urlsplit(base_url)
+        if parts.scheme == "https":
+            self._connection_class: type[HTTPConnection] = HTTPSConnection
+        elif parts.scheme == "http":
+            self._connection_class = HTTPConnection
+        else:
+            raise ValueError(f"unsupported provider URL: {base_url!r}")
+        self._host = parts.hostname or ""
+        self._port = parts.port
+        self._path_prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: list[HTTPConnection] = []
+        self._lock = threading.Lock()
+        self.stats = ConnectionPoolStats()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> ProviderResponse:
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self._timeout):
+            self.stats.wait_timeouts += 1
+            raise PoolTimeout(f"no free connection to {self._host} in {self._timeout}s")
+        try:
+            connection, reused = self._checkout()
+            try:
+                status, data = self._send(connection, method, path, body, headers)
+            except ConnectionError:
+                connection.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection before this
+                # request reached it; retry once on a fresh connection.
+                self.stats.stale_retries += 1
+                connection, reused = self._open(), False
+                status, data = self._send(connection, method, path, body, headers)
+            with self._lock:
+                self.stats.requests += 1
+                self.stats.reused += reused
+        finally:
+            self._slots.release()
+        return ProviderResponse(status, data, time.perf_counter() - started)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _checkout(self) -> tuple[HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._open(), False
+
+    def _open(self) -> HTTPConnection:
+        with self._lock:
+            self.stats.connections_opened += 1
+        return self._connection_class(self._host, self._port, timeout=self._timeout)
+
+    def _send(
+        self,
+        connection: HTTPConnection,
+        method: str,
+        path: str,
+        body: bytes | None,
+        headers: dict[str, str] | None,
+    ) -> tuple[int, bytes]:
+        try:
+            connection.request(
+                method, self._path_prefix + path, body=body, headers=headers or {}
+            )
+            response = connection.getresponse()
+            data = response.read()
+        except BaseException:
+            connection.close()
+            raise
+        if response.will_close:
+            connection.close()
+        else:
+            with self._lock:
+                self._idle.append(connection)
+        return response.status, data
+
+
+class ProviderClients:
+    """One ``ConnectionPool`` per distinct provider base URL, opened lazily."""
+
+    def __init__(self, providers: list[Provider] | None = None) -> None:
+        self._providers = {
+            provider.name: provider
+            for provider in (REGISTERED_PROVIDERS if providers is None else providers)
+        }
+        self._pools: dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def pool_for(self, provider_name: str) -> ConnectionPool:
+        provider = self._providers[provider_name]
+        with self._lock:
+            pool = self._pools.get(provider.base_url)
+            if pool is None:
+                pool = self._pools[provider.base_url] = ConnectionPool(
+                    provider.base_url, provider.pool_size, provider.timeout_seconds
+                )
+            return pool
+
+    def request(
+        self,
+        provider_name: str,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> ProviderResponse:
+        return self.pool_for(provider_name).request(method, path, body, headers)
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+
+__all__ = [
+    "ConnectionPool",
+    "ConnectionPoolStats",
+    "PoolTimeout",
+    "ProviderClients",
+    "ProviderResponse",
+]
@@ -0,0 +1,163 @@
+"""Adaptive per-provider concurrency and circuit breaking for the worker.
+
+Each provider gets a concurrency limit adjusted by additive increase,
+multiplicative decrease: every fast, successful call raises the limit by
+``additive_increase / limit`` (about one slot per round of calls), and every
+failed or slow call multiplies it by ``multiplicative_decrease``.  After
+``failure_threshold`` consecutive failures the provider's circuit opens for
+``cooldown_seconds``; it then half-opens to let a single probe through, which
+closes the circuit on success or opens it again on failure.
+
+Limits are enforced through ``pause_provider``: a provider that is at its
+limit or whose circuit is open stays queued, and the rest of the queue keeps
+moving.  Given ``TenantQueues`` the provider is paused in every tenant, since
+they share its clients.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.tenancy import TenantQueues
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class ConcurrencyPolicy:
+    initial_limit: float = 4.0
+    min_limit: float = 1.0
+    max_limit: float = 64.0
+    additive_increase: float = 1.0
+    multiplicative_decrease: float = 0.5
+    slow_call_seconds: float = 2.0
+    failure_threshold: int = 5
+    cooldown_seconds: float = 30.0
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.min_limit <= self.initial_limit <= self.max_limit:
+            raise ValueError("limits must satisfy 1 <= min <= initial <= max")
+        if not 0 < self.multiplicative_decrease < 1:
+            raise ValueError("multiplicative_decrease must be between 0 and 1")
+        if self.failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+
+
+@dataclass
+class ProviderHealth:
+    limit: float
+    in_flight: int = 0
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    reopen_at: datetime | None = None
+    successes: int = 0
+    failures: int = 0
+    slow_calls: int = 0
+    trips: int = 0
+
+    @property
+    def allowed(self) -> int:
+        """Calls that may be in flight right now."""
+        if self.state == OPEN:
+            return 0
+        if self.state == HALF_OPEN:
+            return 1
+        return int(self.limit)
+
+
+class ProviderConcurrencyController:
+    """Tracks provider health and pauses the queue's providers accordingly.
+
+    The worker reports every call with ``on_dispatch`` and ``on_complete`` and
+    calls ``poll`` regularly so that open circuits can half-open on time.
+    """
+
+    def __init__(
+        self,
+        queue: Queue | TenantQueues,
+        policy: ConcurrencyPolicy | None = None,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        self._queue = queue
+        self.policy = policy or ConcurrencyPolicy()
+        self._clock = clock
+        self._health: dict[str, ProviderHealth] = {}
+        self._paused: set[str] = set()
+
+    def health(self, provider: str) -> ProviderHealth:
+        health = self._health.get(provider)
+        if health is None:
+            health = self._health[provider] = ProviderHealth(self.policy.initial_limit)
+        return health
+
+    def poll(self) -> None:
+        now = self._clock()
+        for provider, health in self._health.items():
+            reopen_at = health.reopen_at
+            if health.state == OPEN and reopen_at is not None and reopen_at <= now:
+                health.state = HALF_OPEN
+                self._sync(provider)
+
+    def on_dispatch(self, provider: str) -> None:
+        self.health(provider).in_flight += 1
+        self._sync(provider)
+
+    def on_complete(self, provider: str, latency_seconds: float, success: bool) -> None:
+        policy = self.policy
+        health = self.health(provider)
+        health.in_flight -= 1
+        slow = latency_seconds > policy.slow_call_seconds
+        if success:
+            health.successes += 1
+            health.consecutive_failures = 0
+            if health.state == HALF_OPEN:
+                health.state = CLOSED
+        else:
+            health.failures += 1
+            health.consecutive_failures += 1
+        health.slow_calls += slow
+
+        if success and not slow:
+            health.limit = min(
+                policy.max_limit, health.limit + policy.additive_increase / health.limit
+            )
+        else:
+            health.limit = max(
+                policy.min_limit, health.limit * policy.multiplicative_decrease
+            )
+
+        if not success and (
+            health.state == HALF_OPEN
+            or health.consecutive_failures >= policy.failure_threshold
+        ):
+            health.state = OPEN
+            health.reopen_at = self._clock() + timedelta(
+                seconds=policy.cooldown_seconds
+            )
+            health.trips += 1
+        self._sync(provider)
+
+    def _sync(self, provider: str) -> None:
+        health = self.health(provider)
+        if health.in_flight >= health.allowed:
+            if provider not in self._paused:
+                self._paused.add(provider)
+                self._queue.pause_provider(provider)
+        elif provider in self._paused:
+            self._paused.discard(provider)
+            self._queue.resume_provider(provider)
+
+
+__all__ = [
+    "CLOSED",
+    "HALF_OPEN",
+    "OPEN",
+    "ConcurrencyPolicy",
+    "ProviderConcurrencyController",
+    "ProviderHealth",
+]
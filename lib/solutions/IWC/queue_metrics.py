@@ -0,0 +1,108 @@
+"""Counters reported by ``Queue`` alongside its dispatch results."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass
+class DeadlineStats:
+    """Deadline outcomes for tasks dispatched with ``metadata['deadline']``.
+
+    Slack is the time left before the deadline at dispatch; it is negative for
+    a miss.
+    """
+
+    dispatched: int = 0
+    misses: int = 0
+    total_slack_seconds: float = 0.0
+    min_slack_seconds: float | None = None
+
+    def record(self, slack_seconds: float) -> None:
+        self.dispatched += 1
+        if slack_seconds < 0:
+            self.misses += 1
+        self.total_slack_seconds += slack_seconds
+        if self.min_slack_seconds is None or slack_seconds < self.min_slack_seconds:
+            self.min_slack_seconds = slack_seconds
+
+    @property
+    def miss_ratio(self) -> float:
+        return self.misses / self.dispatched if self.dispatched else 0.0
+
+    @property
+    def mean_slack_seconds(self) -> float | None:
+        if not self.dispatched:
+            return None
+        return self.total_slack_seconds / self.dispatched
+
+
+@dataclass
+class AdmissionStats:
+    """Outcome counts for ``Queue.enqueue`` under admission control."""
+
+    admitted: int = 0
+    rejected_queue_full: int = 0
+    rejected_user_limit: int = 0
+    rejected_invalid_priority: int = 0
+    shed: int = 0
+    high_water_mark: int = 0
+
+    @property
+    def rejected(self) -> int:
+        return (
+            self.rejected_queue_full
+            + self.rejected_user_limit
+            + self.rejected_invalid_priority
+        )
+
+
+@dataclass
+class ResultCacheStats:
+    """Lookups against the recently-completed fetch cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class RetryStats:
+    """Outcomes of ``Queue.retry`` calls."""
+
+    scheduled: int = 0
+    released: int = 0
+    exhausted: int = 0
+    unknown: int = 0
+
+
+@dataclass
+class QueueSummary:
+    """Point-in-time view of the queue for monitoring.
+
+    ``busiest_users`` holds ``(user_id, pending_tasks)`` pairs, most tasks
+    first.  ``published_at`` is set when the summary was read back from a
+    shared-memory snapshot.
+    """
+
+    depth: int
+    age_seconds: int
+    tasks_by_provider: dict[str, int]
+    busiest_users: list[tuple[int, int]]
+    user_count: int
+    published_at: float | None = None
+
+
+__all__ = [
+    "AdmissionStats",
+    "DeadlineStats",
+    "QueueSummary",
+    "ResultCacheStats",
+    "RetryStats",
+]
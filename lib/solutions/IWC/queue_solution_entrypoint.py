@@ -2,25 +2,43 @@
 
 from __future__ import annotations
 
+from solutions.IWC.change_feed import EventSubscription
 from solutions.IWC.queue_solution_legacy import Queue
-from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+from solutions.IWC.task_types import EnqueueRejection, TaskDispatch, TaskSubmission
 
 
 class QueueSolutionEntrypoint:
-    def __init__(self) -> None:
-        self._queue: Queue = Queue()
+    def __init__(self, queue: Queue | None = None) -> None:
+        self._queue: Queue = Queue() if queue is None else queue
 
-    def enqueue(self, task: TaskSubmission) -> int:
+    def enqueue(self, task: TaskSubmission) -> int | EnqueueRejection:
         return self._queue.enqueue(task)
 
     def dequeue(self) -> TaskDispatch | None:
         return self._queue.dequeue()
 
+    def complete(self, user_id: int, provider: str) -> None:
+        self._queue.complete(user_id, provider)
+
+    def retry(self, dispatch: TaskDispatch, delay: float | None = None) -> bool:
+        return self._queue.retry(dispatch, delay)
+
+    def peek(self, k: int = 1) -> list[TaskDispatch]:
+        return self._queue.peek(k)
+
+    def events(self, max_buffer: int = 1024) -> EventSubscription:
+        return self._queue.events(max_buffer)
+
     def size(self) -> int:
         return self._queue.size
 
     def age(self) -> int:
         return self._queue.age
 
-    def purge(self) -> bool:
-        return self._queue.purge()
+    def cancel(self, user_id: int, provider: str) -> int:
+        return self._queue.cancel(user_id, provider)
+
+    def purge(
+        self, user_id: int | None = None, provider: str | None = None
+    ) -> bool | int:
+        return self._queue.purge(user_id=user_id, provider=provider)
@@ -1,14 +1,67 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import IntEnum
 
 # LEGACY CODE ASSET
 # RESOLVED on deploy
-from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+from solutions.IWC.admission import (
+    INVALID_PRIORITY,
+    QUEUE_FULL,
+    AdmissionController,
+    AdmissionPolicy,
+)
+from solutions.IWC.change_feed import (
+    CANCELLED,
+    DISPATCHED,
+    ENQUEUED,
+    EXPIRED,
+    PROMOTED,
+    PURGED,
+    REPLACED,
+    SHED,
+    EventSubscription,
+    QueueEvent,
+)
+from solutions.IWC.fair_scheduling import FairnessPolicy, FairOrderingIndex
+from solutions.IWC.ordering_index import (
+    OrderingIndex,
+    QueuedTask,
+    TimestampRange,
+    priority_level,
+)
+from solutions.IWC.ordering_policy import LEGACY_ORDERING, OrderingPolicy
+from solutions.IWC.queue_metrics import (
+    AdmissionStats,
+    DeadlineStats,
+    QueueSummary,
+    ResultCacheStats,
+    RetryStats,
+)
+from solutions.IWC.result_cache import RecentResultCache
+from solutions.IWC.retry import RetryPolicy
+from solutions.IWC.task_types import (
+    EnqueueRejection,
+    TaskDispatch,
+    TaskSubmission,
+    normalise_timestamp,
+    normalise_ttl,
+)
+from solutions.IWC.timing_wheel import TimingWheel
+from solutions.IWC.tracing import LifecycleTracer
 
 
 class Priority(IntEnum):
-    """Represents the queue ordering tiers observed in the legacy system."""
+    """Represents the queue ordering tiers observed in the legacy system.
+
+    Any other level in ``range(PRIORITY_LEVELS)`` may be given in
+    ``metadata['priority']``; lower levels are dispatched first.
+    """
 
     HIGH = 1
     NORMAL = 2
@@ -19,6 +72,12 @@ class Provider:
     name: str
     base_url: str
     depends_on: list[str]
+    ttl_seconds: float | None = None
+    freshness_seconds: float | None = None
+    pool_size: int = 4
+    timeout_seconds: float = 10.0
+    batch_size: int = 1
+    batch_window_seconds: float = 0.0
 
 
 MAX_TIMESTAMP = datetime.max.replace(tzinfo=None)
@@ -28,10 +87,15 @@ COMPANIES_HOUSE_PROVIDER = Provider(
 )
 
 
+# credit_check and id_verification accept many users per call.  A short window
+# keeps the added latency well under a typical fetch while still filling
+# batches when the queue is busy.
 CREDIT_CHECK_PROVIDER = Provider(
     name="credit_check",
     base_url="https://fake.creditcheck.co.uk",
     depends_on=["companies_house"],
+    batch_size=50,
+    batch_window_seconds=0.05,
 )
 
 
@@ -40,7 +104,11 @@ BANK_STATEMENTS_PROVIDER = Provider(
 )
 
 ID_VERIFICATION_PROVIDER = Provider(
-    name="id_verification", base_url="https://fake.idv.co.uk", depends_on=[]
+    name="id_verification",
+    base_url="https://fake.idv.co.uk",
+    depends_on=[],
+    batch_size=50,
+    batch_window_seconds=0.05,
 )
 
 
@@ -53,13 +121,97 @@ REGISTERED_PROVIDERS: list[Provider] = [
 
 
 class Queue:
-    def __init__(self):
-        self._queue = []
+    def __init__(
+        self,
+        fairness: FairnessPolicy | None = None,
+        clock: Callable[[], datetime] = datetime.now,
+        admission: AdmissionPolicy | None = None,
+        providers: list[Provider] | None = None,
+        on_expire: Callable[[TaskSubmission], None] | None = None,
+        result_cache: RecentResultCache | None = None,
+        retry: RetryPolicy | None = None,
+        ordering: OrderingPolicy | None = None,
+        tracer: LifecycleTracer | None = None,
+    ):
+        self._fairness = fairness
+        self._ordering = (LEGACY_ORDERING if ordering is None else ordering).compile()
+        self._clock = clock
+        self._providers = {
+            provider.name: provider
+            for provider in (REGISTERED_PROVIDERS if providers is None else providers)
+        }
+        self._dependants = self._index_dependants(self._providers)
+        self._dependencies: dict[str, list[str]] = {}
+        for name, dependants in self._dependants.items():
+            for dependant in dependants:
+                self._dependencies.setdefault(dependant, []).append(name)
+        self._on_expire = on_expire
+        self._tracer = tracer
+        self._result_cache = (
+            RecentResultCache() if result_cache is None else result_cache
+        )
+        self._freshness = {
+            provider.name: timedelta(seconds=provider.freshness_seconds)
+            for provider in self._providers.values()
+            if provider.freshness_seconds is not None
+        }
+        self._expiry_wheel: TimingWheel[QueuedTask] | None = None
+        self.expired_count = 0
+        self._admission = AdmissionController(admission)
+        self.deadline_stats = DeadlineStats()
+        self._retry_policy = retry or RetryPolicy()
+        self.retry_stats = RetryStats()
+        # Recent dispatches by (user_id, provider), oldest first, so that a
+        # failed one can be put back with its original ordering keys.
+        self._dispatched: OrderedDict[tuple[int, str], QueuedTask] = OrderedDict()
+        self._retry_heap: list[tuple[datetime, int, QueuedTask]] = []
+        self._delayed_retries: dict[tuple[int, str], QueuedTask] = {}
+        # Secondary indexes over the delayed retries, for filtered purges.
+        self._delayed_by_user: dict[int, set[str]] = {}
+        self._delayed_by_provider: dict[str, set[int]] = {}
+        self._tasks_by_user: dict[int, dict[str, QueuedTask]] = {}
+        self._tasks_by_provider: dict[str, dict[int, QueuedTask]] = {}
+        self._order = self._create_order_index()
+        self._timestamps = TimestampRange()
+        self._pending_rule_of_3: set[int] = set()
+        self._paused_providers: set[str] = set()
+        # Tasks held back by paused providers, keyed by their own provider.
+        self._parked: dict[str, set[QueuedTask]] = {}
+        self._listeners: list[Callable[[], None]] = []
+        self._subscriptions: list[EventSubscription] = []
+        self._sequence = itertools.count()
+        self._size = 0
+
+    def _create_order_index(self) -> OrderingIndex | FairOrderingIndex:
+        if self._fairness is None:
+            return OrderingIndex(self._ordering)
+        return FairOrderingIndex(self._fairness, self._ordering)
+
+    @staticmethod
+    def _index_dependants(providers: dict[str, Provider]) -> dict[str, list[str]]:
+        """Map each provider to every provider that depends on it, transitively."""
+        direct: dict[str, list[str]] = {}
+        for provider in providers.values():
+            for dependency in provider.depends_on:
+                direct.setdefault(dependency, []).append(provider.name)
+
+        dependants: dict[str, list[str]] = {}
+        for name, direct_dependants in direct.items():
+            found: list[str] = []
+            pending = list(direct_dependants)
+            while pending:
+                dependant = pending.pop()
+                if dependant not in found:
+                    found.append(dependant)
+                    pending.extend(direct.get(dependant, []))
+            dependants[name] = found
+        return dependants
+
+    def _now(self) -> datetime:
+        return self._clock().replace(tzinfo=None)
 
     def _collect_dependencies(self, task: TaskSubmission) -> list[TaskSubmission]:
-        provider = next(
-            (p for p in REGISTERED_PROVIDERS if p.name == task.provider), None
-        )
+        provider = self._providers.get(task.provider)
         if provider is None:
             return []
 
@@ -70,167 +222,795 @@ class Queue:
                 user_id=task.user_id,
                 timestamp=task.timestamp,
             )
+            # A dependency has to finish before its dependant can start, so it
+            # inherits the dependant's deadline and priority.
+            for key in ("deadline", "priority"):
+                if key in task.metadata:
+                    dependency_task.metadata[key] = task.metadata[key]
             tasks.extend(self._collect_dependencies(dependency_task))
             tasks.append(dependency_task)
         return tasks
 
     @staticmethod
-    def _priority_for_task(task):
-        metadata = task.metadata
-        raw_priority = metadata.get("priority", Priority.NORMAL)
-        try:
-            return Priority(raw_priority)
-        except (TypeError, ValueError):
+    def _priority_for_task(task: TaskSubmission) -> int:
+        """The requested level, ``NORMAL`` if none.
+
+        Raises ``TypeError`` or ``ValueError`` if the level is invalid.
+        """
+        raw_priority = task.metadata.get("priority")
+        if raw_priority is None:
             return Priority.NORMAL
+        return priority_level(raw_priority)
 
     @staticmethod
-    def _earliest_group_timestamp_for_task(task):
-        metadata = task.metadata
-        return metadata.get("group_earliest_timestamp", MAX_TIMESTAMP)
+    def _timestamp_for_task(task):
+        return normalise_timestamp(task.timestamp)
 
     @staticmethod
-    def _timestamp_for_task(task):
-        timestamp = task.timestamp
-        if isinstance(timestamp, datetime):
-            return timestamp.replace(tzinfo=None)
-        if isinstance(timestamp, str):
-            return datetime.fromisoformat(timestamp).replace(tzinfo=None)
-        return timestamp
-
-    def _add_task(self, task: TaskSubmission) -> None:
-        task.metadata["priority"] = Priority.NORMAL
-        task.metadata["group_earliest_timestamp"] = MAX_TIMESTAMP
-        self._queue.append(task)
-
-    def enqueue(self, item: TaskSubmission) -> int:
+    def _deadline_for_task(task) -> datetime | None:
+        deadline = task.metadata.get("deadline")
+        if deadline is None:
+            return None
+        return normalise_timestamp(deadline)
+
+    def _ttl_for_task(self, task: TaskSubmission) -> float | None:
+        ttl_seconds = task.metadata.get("ttl_seconds")
+        if ttl_seconds is None:
+            provider = self._providers.get(task.provider)
+            return None if provider is None else provider.ttl_seconds
+        return normalise_ttl(ttl_seconds)
+
+    def _schedule_expiry(self, entry: QueuedTask, ttl_seconds: float) -> None:
+        now = self._now()
+        if self._expiry_wheel is None:
+            self._expiry_wheel = TimingWheel(start=now)
+        entry.expiry = self._expiry_wheel.schedule(
+            entry, now + timedelta(seconds=ttl_seconds)
+        )
+
+    def _advance_timers(self) -> None:
+        before = (self.expired_count, self.retry_stats.released)
+        self._release_due_retries()
+        self._expire_stale_tasks()
+        if self._listeners and before != (
+            self.expired_count,
+            self.retry_stats.released,
+        ):
+            self._notify()
+
+    def subscribe(self, listener: Callable[[], None]) -> None:
+        """Call ``listener`` after every change to the queued tasks."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[], None]) -> None:
+        self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in self._listeners:
+            listener()
+
+    def events(self, max_buffer: int = 1024) -> EventSubscription:
+        """Subscribe to a feed of ``QueueEvent`` consumed with ``async for``.
+
+        Each subscription buffers at most ``max_buffer`` events and drops the
+        oldest when full, so the queue never waits for a slow consumer.
+        ``close()`` the subscription to stop it.
+        """
+        subscription = EventSubscription(max_buffer, self._subscriptions.remove)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def _emit(
+        self, kind: str, provider: str | None, user_id: int | None, count: int = 1
+    ) -> None:
+        event = QueueEvent(kind, provider, user_id, self._now(), count)
+        for subscription in self._subscriptions:
+            subscription.publish(event)
+
+    def _expire_stale_tasks(self) -> None:
+        """Drop tasks whose TTL has elapsed; amortised O(1) per expired task."""
+        if self._expiry_wheel is None or not self._expiry_wheel:
+            return
+        for entry in self._expiry_wheel.advance(self._now()):
+            entry.expiry = None
+            self._remove_task(entry)
+            self.expired_count += 1
+            if self._subscriptions:
+                self._emit(EXPIRED, entry.provider, entry.user_id)
+            if self._on_expire is not None:
+                self._on_expire(entry.task)
+
+    def _add_task(
+        self,
+        task: TaskSubmission,
+        priority: int = Priority.NORMAL,
+        group_timestamp: datetime = MAX_TIMESTAMP,
+    ) -> QueuedTask:
+        task.metadata["priority"] = priority
+        task.metadata["group_earliest_timestamp"] = group_timestamp
+        entry = QueuedTask(
+            task,
+            timestamp=self._timestamp_for_task(task),
+            seq=next(self._sequence),
+            priority=priority,
+            group_timestamp=group_timestamp,
+            deadline=self._deadline_for_task(task),
+        )
+        if self._tracer is not None:
+            entry.trace = self._tracer.start(task.provider, task.user_id, self._now())
+        self._tasks_by_user.setdefault(task.user_id, {})[task.provider] = entry
+        self._tasks_by_provider.setdefault(task.provider, {})[task.user_id] = entry
+        if self._paused_providers and self._is_held(entry):
+            self._parked.setdefault(entry.provider, set()).add(entry)
+        else:
+            self._order.add(entry)
+        self._timestamps.add(entry)
+        self._pending_rule_of_3.add(task.user_id)
+        if entry.deadline is None:
+            self._admission.track(entry)
+        ttl_seconds = self._ttl_for_task(task)
+        if ttl_seconds is not None:
+            self._schedule_expiry(entry, ttl_seconds)
+        self._size += 1
+        admission_stats = self._admission.stats
+        admission_stats.high_water_mark = max(
+            admission_stats.high_water_mark, self._size
+        )
+        return entry
+
+    def _remove_task(self, entry: QueuedTask, *, ordered: bool = True) -> None:
+        """Drop ``entry`` from every index; ``ordered=False`` if already popped."""
+        if self._is_parked(entry):
+            self._unpark(entry)
+        elif ordered:
+            self._order.discard(entry)
+        self._admission.untrack(entry)
+        if entry.expiry is not None and self._expiry_wheel is not None:
+            self._expiry_wheel.cancel(entry.expiry)
+        entry.live = False
+        self._timestamps.discard(entry)
+        user_tasks = self._tasks_by_user[entry.user_id]
+        del user_tasks[entry.provider]
+        if not user_tasks:
+            del self._tasks_by_user[entry.user_id]
+        provider_tasks = self._tasks_by_provider[entry.provider]
+        del provider_tasks[entry.user_id]
+        if not provider_tasks:
+            del self._tasks_by_provider[entry.provider]
+        self._size -= 1
+
+    def enqueue(self, item: TaskSubmission) -> int | EnqueueRejection:
+        self._advance_timers()
+        rejection = self._enqueue_one(item)
+        if rejection is not None:
+            return rejection
+        if self._listeners:
+            self._notify()
+        return self.size
+
+    def enqueue_many(
+        self,
+        items: Iterable[TaskSubmission],
+        on_error: Callable[[TaskSubmission, Exception], None] | None = None,
+    ) -> list[EnqueueRejection]:
+        """Enqueue a chunk of submissions and return the rejected ones.
+
+        Each submission is handled exactly as by ``enqueue``, but timers are
+        advanced and listeners notified once for the whole chunk.  A submission
+        with malformed metadata raises ``TypeError`` or ``ValueError``; if
+        ``on_error`` is given it is passed the submission and the error and the
+        rest of the chunk is still applied.
+        """
+        self._advance_timers()
+        rejections = []
+        for item in items:
+            try:
+                rejection = self._enqueue_one(item)
+            except (TypeError, ValueError) as error:
+                if on_error is None:
+                    raise
+                on_error(item, error)
+                continue
+            if rejection is not None:
+                rejections.append(rejection)
+        if self._listeners:
+            self._notify()
+        return rejections
+
+    def _enqueue_one(self, item: TaskSubmission) -> EnqueueRejection | None:
+        try:
+            priority = self._priority_for_task(item)
+        except (TypeError, ValueError):
+            self._admission.stats.rejected_invalid_priority += 1
+            return EnqueueRejection(
+                reason=INVALID_PRIORITY,
+                provider=item.provider,
+                user_id=item.user_id,
+                size=self._size,
+            )
+        # Parse the rest of the metadata before anything changes, so that a
+        # malformed submission raises without being partly applied.
+        self._timestamp_for_task(item)
+        self._deadline_for_task(item)
+        self._ttl_for_task(item)
         tasks = [*self._collect_dependencies(item), item]
+        if self._freshness:
+            tasks = [task for task in tasks if not self._has_fresh_result(task)]
+        user_tasks = self._tasks_by_user.get(item.user_id, {})
+        new_tasks = sum(1 for task in tasks if task.provider not in user_tasks)
+
+        rejection = self._admit(item, tasks, new_tasks, len(user_tasks))
+        if rejection is not None:
+            return rejection
 
         for task in tasks:
-            existing = next(
-                (
-                    t
-                    for t in self._queue
-                    if t.user_id == task.user_id and t.provider == task.provider
-                ),
-                None,
-            )
+            existing = self._tasks_by_user.get(task.user_id, {}).get(task.provider)
 
             if existing:
-                if self._timestamp_for_task(task) < self._timestamp_for_task(existing):
-                    self._queue.remove(existing)
-                    self._add_task(task)
+                if self._timestamp_for_task(task) < existing.timestamp:
+                    self._remove_task(existing)
+                    replacement = self._add_task(task, priority)
+                    if self._tracer is not None:
+                        replacement.trace = existing.trace
+                    if self._subscriptions:
+                        self._emit(REPLACED, task.provider, task.user_id)
+                elif task is not item:
+                    self._tighten_dependency(existing, task, priority)
             else:
-                self._add_task(task)
+                self._add_task(task, priority)
+                if self._subscriptions:
+                    self._emit(ENQUEUED, task.provider, task.user_id)
+        return None
+
+    def _tighten_dependency(
+        self, entry: QueuedTask, task: TaskSubmission, priority: int
+    ) -> None:
+        """Give a dependency that was already queued its new dependant's urgency.
+
+        It takes the stricter deadline and the higher priority of the two;
+        otherwise the dependant could be dispatched ahead of the dependency it
+        waits for.
+        """
+        deadline = self._deadline_for_task(task)
+        if deadline is not None and (
+            entry.deadline is not None and entry.deadline <= deadline
+        ):
+            deadline = None
+        if deadline is None and priority >= entry.priority:
+            return
+        priority = min(priority, entry.priority)
+        entry.task.metadata["priority"] = priority
+        if deadline is not None:
+            entry.task.metadata["deadline"] = deadline
+        self._reposition(entry, priority, entry.group_timestamp, entry.seq, deadline)
+        if entry.deadline is None:
+            self._admission.track(entry)
+        else:
+            self._admission.untrack(entry)
+
+    def _has_fresh_result(self, task: TaskSubmission) -> bool:
+        freshness = self._freshness.get(task.provider)
+        if freshness is None:
+            return False
+        return self._result_cache.is_fresh(
+            task.user_id, task.provider, freshness, self._now()
+        )
 
-        return self.size
+    @property
+    def providers(self) -> list[Provider]:
+        return list(self._providers.values())
+
+    @property
+    def result_cache_stats(self) -> ResultCacheStats:
+        return self._result_cache.stats
 
-    def _provider_priority(
-        self, task: TaskSubmission, newest_timestamp: datetime
-    ) -> int:
-        """Bank statements priority based on age.
+    def cancel(self, user_id: int, provider: str) -> int:
+        """Withdraw a pending task and return how many tasks were removed.
 
-        - If age >= 5 minutes from newest: return 0 (normal priority, boosted)
-        - If age < 5 minutes: return 1 (deprioritised)
-        - other providers: return 0 (normal priority)
+        Tasks that depend on the cancelled provider for the same user (for
+        example credit_check on companies_house) cannot run without it and are
+        withdrawn too; cancelling a dependant leaves its dependencies queued.
+        Retries still waiting out their backoff are withdrawn the same way.
         """
-        if task.provider != "bank_statements":
+        self._advance_timers()
+        user_tasks = self._tasks_by_user.get(user_id, {})
+        delayed = self._delayed_retries
+        if provider not in user_tasks and (user_id, provider) not in delayed:
             return 0
 
-        task_timestamp = self._timestamp_for_task(task)
-        age_seconds = (newest_timestamp - task_timestamp).total_seconds()
+        removed = 0
+        for name in (provider, *self._dependants.get(provider, ())):
+            entry = user_tasks.get(name)
+            if entry is not None:
+                self._remove_task(entry)
+                removed += 1
+            if self._pop_delayed((user_id, name)) is not None:
+                removed += 1
+            elif entry is None:
+                continue
+            if self._subscriptions:
+                self._emit(CANCELLED, name, user_id)
+        if removed and self._listeners:
+            self._notify()
+        return removed
+
+    def _admit(
+        self,
+        item: TaskSubmission,
+        tasks: list[TaskSubmission],
+        new_tasks: int,
+        user_size: int,
+    ) -> EnqueueRejection | None:
+        admission = self._admission
+        reason = admission.rejection_reason(new_tasks, user_size, self._size)
+        if reason == QUEUE_FULL and admission.policy.shed_lower_priority:
+            victims = self._shedding_victims(item, tasks, new_tasks)
+            if victims is not None:
+                for victim in victims:
+                    self._remove_task(victim)
+                    if self._subscriptions:
+                        self._emit(SHED, victim.provider, victim.user_id)
+                admission.stats.shed += len(victims)
+                reason = None
+
+        if reason is None:
+            admission.stats.admitted += 1
+            return None
+        if reason == QUEUE_FULL:
+            admission.stats.rejected_queue_full += 1
+        else:
+            admission.stats.rejected_user_limit += 1
+        return EnqueueRejection(
+            reason=reason,
+            provider=item.provider,
+            user_id=item.user_id,
+            size=self._size,
+        )
 
-        return 0 if age_seconds >= 300 else 1
+    def _shedding_victims(
+        self, item: TaskSubmission, tasks: list[TaskSubmission], new_tasks: int
+    ) -> list[QueuedTask] | None:
+        """Tasks to shed so that ``item`` fits, or ``None`` if it cannot.
 
-    def _provider_tiebreaker(
-        self, task: TaskSubmission, newest_timestamp: datetime
-    ) -> int:
-        """Tiebreaker when timestamps are equal - boosted bank_statements wins"""
-        if task.provider != "bank_statements":
-            return 1
+        A task is shed together with its queued dependants (credit_check goes
+        with companies_house), so it is skipped if ``item`` does not outrank
+        all of them or if any belongs to ``item`` itself.
+        """
+        admission = self._admission
+        max_size = admission.policy.max_size
+        assert max_size is not None
+        overflow = self._size + new_tasks - max_size
+        rank = (
+            -1
+            if self._deadline_for_task(item) is not None
+            else self._priority_for_task(item)
+        )
+        protected = {(task.user_id, task.provider) for task in tasks}
+        victims: dict[QueuedTask, None] = {}
+        for candidate in admission.shedding_candidates(rank):
+            if candidate in victims:
+                continue
+            user_tasks = self._tasks_by_user[candidate.user_id]
+            group = [candidate]
+            for name in self._dependants.get(candidate.provider, ()):
+                dependant = user_tasks.get(name)
+                if dependant is not None:
+                    group.append(dependant)
+            if any(
+                (entry.user_id, entry.provider) in protected
+                or not admission.can_shed(entry, rank)
+                for entry in group
+            ):
+                continue
+            victims.update(dict.fromkeys(group))
+            if len(victims) >= overflow:
+                return list(victims)
+        return None
 
-        # If bank_statements is boosted, it wins ties (returns 0)
-        task_timestamp = self._timestamp_for_task(task)
-        age_seconds = (newest_timestamp - task_timestamp).total_seconds()
+    @property
+    def admission_stats(self) -> AdmissionStats:
+        return self._admission.stats
 
-        return 0 if age_seconds >= 300 else 1
+    def _rule_of_3_promotions(self) -> list[tuple[QueuedTask, datetime]]:
+        """Tasks that the next dequeue promotes, in their current order.
+
+        Only users touched by ``enqueue`` since the last dequeue can newly
+        qualify, and promotion is sticky: a promoted task keeps its group
+        timestamp until dispatched.
+        """
+        promotions: list[tuple[QueuedTask, datetime]] = []
+        for user_id in self._pending_rule_of_3:
+            user_tasks = self._tasks_by_user.get(user_id)
+            if not user_tasks or len(user_tasks) < 3:
+                continue
+            earliest_timestamp = min(entry.timestamp for entry in user_tasks.values())
+            for entry in user_tasks.values():
+                if entry.priority == Priority.NORMAL and entry.deadline is None:
+                    promotions.append((entry, earliest_timestamp))
+        # Re-sequencing in previous order mirrors the legacy stable sort for
+        # tasks that end up with identical keys.
+        promotions.sort(key=lambda promotion: promotion[0].seq)
+        return promotions
+
+    def _reposition(
+        self,
+        entry: QueuedTask,
+        priority: int,
+        group_timestamp: datetime,
+        seq: int,
+        deadline: datetime | None = None,
+    ) -> None:
+        """Move ``entry`` to its new place; a ``deadline`` replaces its own."""
+        parked = self._is_parked(entry)
+        if not parked:
+            self._order.discard(entry)
+        if deadline is not None:
+            entry.deadline = deadline
+        entry.priority = priority
+        entry.group_timestamp = group_timestamp
+        entry.seq = seq
+        if not parked:
+            self._order.add(entry)
+
+    def _apply_rule_of_3(self) -> None:
+        for entry, earliest_timestamp in self._rule_of_3_promotions():
+            self._reposition(
+                entry, Priority.HIGH, earliest_timestamp, next(self._sequence)
+            )
+            self._admission.track(entry)
+            entry.task.metadata["priority"] = Priority.HIGH
+            entry.task.metadata["group_earliest_timestamp"] = earliest_timestamp
+            if entry.trace is not None:
+                entry.trace.promoted_at = self._now()
+            if self._subscriptions:
+                self._emit(PROMOTED, entry.provider, entry.user_id)
+        self._pending_rule_of_3.clear()
 
     def dequeue(self):
-        if self.size == 0:
+        self._advance_timers()
+        if self._size == 0:
             return None
 
-        # Calculate newest timestamp in current queue
-        newest_timestamp = max(self._timestamp_for_task(t) for t in self._queue)
-
-        user_ids = {task.user_id for task in self._queue}
-        task_count = {}
-        priority_timestamps = {}
-        for user_id in user_ids:
-            user_tasks = [t for t in self._queue if t.user_id == user_id]
-            earliest_timestamp = sorted(user_tasks, key=lambda t: t.timestamp)[
-                0
-            ].timestamp
-            priority_timestamps[user_id] = earliest_timestamp
-            task_count[user_id] = len(user_tasks)
-
-        for task in self._queue:
-            metadata = task.metadata
-            current_earliest = metadata.get("group_earliest_timestamp", MAX_TIMESTAMP)
-            raw_priority = metadata.get("priority")
-            try:
-                priority_level = Priority(raw_priority)
-            except (TypeError, ValueError):
-                priority_level = None
-
-            if priority_level is None or priority_level == Priority.NORMAL:
-                metadata["group_earliest_timestamp"] = MAX_TIMESTAMP
-                if task_count[task.user_id] >= 3:
-                    metadata["group_earliest_timestamp"] = priority_timestamps[
-                        task.user_id
-                    ]
-                    metadata["priority"] = Priority.HIGH
-                else:
-                    metadata["priority"] = Priority.NORMAL
-            else:
-                metadata["group_earliest_timestamp"] = current_earliest
-                metadata["priority"] = priority_level
-
-        self._queue.sort(
-            key=lambda i: (
-                self._priority_for_task(i),
-                self._earliest_group_timestamp_for_task(i),
-                self._provider_priority(i, newest_timestamp),
-                self._timestamp_for_task(i),
-                self._provider_tiebreaker(i, newest_timestamp),
-            )
+        self._apply_rule_of_3()
+        boost_cutoff = self._timestamps.newest - self._ordering.boost_after
+        entry = self._order.pop(boost_cutoff)
+        if entry is None:
+            return None
+        self._remove_task(entry, ordered=False)
+        if self._subscriptions:
+            self._emit(DISPATCHED, entry.provider, entry.user_id)
+        if entry.deadline is not None:
+            slack = entry.deadline - self._now()
+            self.deadline_stats.record(slack.total_seconds())
+        dispatched = self._dispatched
+        dispatched[entry.user_id, entry.provider] = entry
+        dispatched.move_to_end((entry.user_id, entry.provider))
+        if len(dispatched) > self._retry_policy.ledger_size:
+            dispatched.popitem(last=False)
+        if entry.trace is not None:
+            self._tracer.finish(entry.trace, self._now())
+        if self._listeners:
+            self._notify()
+
+        return TaskDispatch(
+            provider=entry.provider,
+            user_id=entry.user_id,
         )
 
-        task = self._queue.pop(0)
+    def complete(self, user_id: int, provider: str) -> None:
+        """Record that a dispatched fetch succeeded.
 
-        return TaskDispatch(
-            provider=task.provider,
-            user_id=task.user_id,
+        Only a completed fetch counts as a fresh result, so a provider with a
+        freshness window skips resubmissions from here on, not from dispatch.
+        """
+        if provider in self._freshness:
+            self._result_cache.record(user_id, provider, self._now())
+
+    def retry(self, dispatch: TaskDispatch, delay: float | None = None) -> bool:
+        """Put a failed dispatch back in the queue after a backoff.
+
+        The task keeps its original timestamp, priority and group, so once
+        ``delay`` seconds (by default the policy's exponential backoff for
+        this attempt) have passed it is inserted straight back into its old
+        place in the ordering.  Until then it waits in a delay heap and is not
+        counted by ``size``, and when it is released it goes through admission
+        control like a new arrival, so a full queue may reject it.  Returns
+        ``False`` if the dispatch is not among the recent dispatches or has
+        used up its attempts.
+        """
+        self._advance_timers()
+        # The fetch failed, so it must not count as a fresh result, whether
+        # or not it is retried.
+        self._result_cache.discard(dispatch.user_id, dispatch.provider)
+        key = (dispatch.user_id, dispatch.provider)
+        entry = self._dispatched.pop(key, None)
+        if entry is None:
+            self.retry_stats.unknown += 1
+            return False
+        attempts = entry.task.metadata.get("attempts", 0)
+        attempt = (attempts if isinstance(attempts, int) else 0) + 1
+        if attempt > self._retry_policy.max_attempts:
+            self.retry_stats.exhausted += 1
+            return False
+
+        entry.task.metadata["attempts"] = attempt
+        if delay is None:
+            delay = self._retry_policy.backoff_seconds(attempt)
+        heapq.heappush(
+            self._retry_heap,
+            (self._now() + timedelta(seconds=delay), next(self._sequence), entry),
         )
+        self._delayed_retries[key] = entry
+        self._delayed_by_user.setdefault(key[0], set()).add(key[1])
+        self._delayed_by_provider.setdefault(key[1], set()).add(key[0])
+        self.retry_stats.scheduled += 1
+        return True
+
+    @property
+    def pending_retries(self) -> int:
+        return len(self._delayed_retries)
+
+    def _release_due_retries(self) -> None:
+        heap = self._retry_heap
+        if not heap:
+            return
+        now = self._now()
+        while heap and heap[0][0] <= now:
+            _, _, entry = heapq.heappop(heap)
+            key = (entry.user_id, entry.provider)
+            if self._delayed_retries.get(key) is not entry:
+                continue
+            self._pop_delayed(key)
+            self.retry_stats.released += 1
+            user_tasks = self._tasks_by_user.get(entry.user_id, {})
+            existing = user_tasks.get(entry.provider)
+            if existing is not None and existing.timestamp <= entry.timestamp:
+                continue
+            # The retry comes back as a new arrival, so it is subject to the
+            # same admission limits; a rejected one is dropped.
+            new_tasks = 0 if existing is not None else 1
+            rejection = self._admit(
+                entry.task, [entry.task], new_tasks, len(user_tasks)
+            )
+            if rejection is not None:
+                continue
+            if existing is not None:
+                self._remove_task(existing)
+            self._add_task(entry.task, entry.priority, entry.group_timestamp)
+            if self._subscriptions:
+                self._emit(ENQUEUED, entry.provider, entry.user_id)
+
+    def _pop_delayed(self, key: tuple[int, str]) -> QueuedTask | None:
+        entry = self._delayed_retries.pop(key, None)
+        if entry is None:
+            return None
+        user_id, provider = key
+        providers = self._delayed_by_user[user_id]
+        providers.discard(provider)
+        if not providers:
+            del self._delayed_by_user[user_id]
+        user_ids = self._delayed_by_provider[provider]
+        user_ids.discard(user_id)
+        if not user_ids:
+            del self._delayed_by_provider[provider]
+        return entry
+
+    def peek(self, k: int = 1) -> list[TaskDispatch]:
+        """Return the next ``k`` dispatches in dequeue order without taking them.
+
+        The dequeues are rehearsed on the ordering index and then undone:
+        pending rule-of-3 promotions are applied to the index only, ``k``
+        tasks are popped while the newest timestamp is tracked from a
+        read-only walk of the timestamp heap, and everything is put back.
+        Queue contents, promotions, task metadata and counters are unchanged.
+        This costs O(k log n), plus O(U) to snapshot the scheduler in fair mode.
+        """
+        self._advance_timers()
+        order_state = self._order.snapshot()
+        promotions = []
+        for entry, earliest_timestamp in self._rule_of_3_promotions():
+            promotions.append((entry, entry.priority, entry.group_timestamp, entry.seq))
+            self._reposition(
+                entry, Priority.HIGH, earliest_timestamp, next(self._sequence)
+            )
+
+        popped: list[QueuedTask] = []
+        popped_set: set[QueuedTask] = set()
+        newest_first = self._timestamps.newest_first()
+        newest = None
+        for _ in range(min(k, len(self._order))):
+            while newest is None or newest in popped_set:
+                newest = next(newest_first)
+            upcoming = self._order.pop(newest.timestamp - self._ordering.boost_after)
+            if upcoming is None:
+                break
+            popped.append(upcoming)
+            popped_set.add(upcoming)
+
+        for entry in popped:
+            self._order.add(entry)
+        for entry, priority, group_timestamp, seq in promotions:
+            self._reposition(entry, priority, group_timestamp, seq)
+        self._order.restore(order_state)
+
+        return [
+            TaskDispatch(provider=entry.provider, user_id=entry.user_id)
+            for entry in popped
+        ]
 
     @property
     def size(self):
-        return len(self._queue)
+        self._advance_timers()
+        return self._size
 
     @property
     def age(self) -> int:
         if self.size == 0:
             return 0
+        return self._age_seconds()
 
-        timestamps = [self._timestamp_for_task(task) for task in self._queue]
+    def _age_seconds(self) -> int:
+        oldest = self._timestamps.oldest
+        newest = self._timestamps.newest
+        if oldest is None or newest is None:
+            return 0
+        return int((newest - oldest).total_seconds())
 
-        oldest = min(timestamps)
-        newest = max(timestamps)
+    def summary(self, max_users: int = 16) -> QueueSummary:
+        """Depth, age and task counts as they stand, without advancing timers.
 
-        return int((newest - oldest).total_seconds())
+        Per-provider counts are O(P); the busiest users are found in
+        O(U log max_users).
+        """
+        return QueueSummary(
+            depth=self._size,
+            age_seconds=self._age_seconds() if self._size else 0,
+            tasks_by_provider={
+                name: len(tasks) for name, tasks in self._tasks_by_provider.items()
+            },
+            busiest_users=[
+                (user_id, len(tasks))
+                for user_id, tasks in heapq.nlargest(
+                    max_users,
+                    self._tasks_by_user.items(),
+                    key=lambda item: len(item[1]),
+                )
+            ],
+            user_count=len(self._tasks_by_user),
+        )
 
-    def purge(self):
-        self._queue.clear()
+    def purge(
+        self, user_id: int | None = None, provider: str | None = None
+    ) -> bool | int:
+        """Clear the queue, or only the tasks matching the given filters.
+
+        Without filters every task is dropped and ``True`` is returned, as
+        before.  With ``user_id`` and/or ``provider`` only matching tasks are
+        removed, found through the secondary indexes in O(k), and the number
+        removed is returned.  Unlike ``cancel``, dependants are not touched.
+        Retries still waiting out their backoff are purged too.
+        """
+        if user_id is not None and provider is not None:
+            entry = self._tasks_by_user.get(user_id, {}).get(provider)
+            matches = [] if entry is None else [entry]
+            delayed = [(user_id, provider)]
+        elif user_id is not None:
+            matches = list(self._tasks_by_user.get(user_id, {}).values())
+            delayed = [
+                (user_id, name) for name in self._delayed_by_user.get(user_id, ())
+            ]
+        elif provider is not None:
+            matches = list(self._tasks_by_provider.get(provider, {}).values())
+            delayed = [
+                (other, provider)
+                for other in self._delayed_by_provider.get(provider, ())
+            ]
+        else:
+            removed = self._size + len(self._delayed_retries)
+            self._purge_all()
+            if self._subscriptions:
+                self._emit(PURGED, None, None, removed)
+            if self._listeners:
+                self._notify()
+            return True
+
+        for entry in matches:
+            self._remove_task(entry)
+        removed = len(matches)
+        for key in delayed:
+            removed += self._pop_delayed(key) is not None
+        if removed and self._subscriptions:
+            self._emit(PURGED, provider, user_id, removed)
+        if matches and self._listeners:
+            self._notify()
+        return removed
+
+    def _purge_all(self) -> bool:
+        for user_tasks in self._tasks_by_user.values():
+            for entry in user_tasks.values():
+                entry.live = False
+        self._tasks_by_user.clear()
+        self._tasks_by_provider.clear()
+        self._order = self._create_order_index()
+        self._timestamps.clear()
+        self._admission.clear()
+        if self._expiry_wheel is not None:
+            self._expiry_wheel.clear()
+        self._pending_rule_of_3.clear()
+        self._parked.clear()
+        self._retry_heap.clear()
+        self._delayed_retries.clear()
+        self._delayed_by_user.clear()
+        self._delayed_by_provider.clear()
+        self._size = 0
         return True
 
+    def pause_provider(self, provider: str) -> int:
+        """Hold back ``provider``'s tasks from dispatch; return how many are held.
+
+        Held tasks stay queued (they count towards ``size`` and ``age`` and can
+        be cancelled, purged or expire) but ``dequeue`` and ``peek`` skip them.
+        A user's tasks that depend on a held task are held with it, so
+        credit_check never overtakes a paused companies_house.
+        """
+        self._paused_providers.add(provider)
+        held = 0
+        for entry in list(self._tasks_by_provider.get(provider, {}).values()):
+            user_tasks = self._tasks_by_user[entry.user_id]
+            for name in (provider, *self._dependants.get(provider, ())):
+                held += self._park(user_tasks.get(name))
+        return held
+
+    def resume_provider(self, provider: str) -> int:
+        """Release tasks held by ``pause_provider``; return how many were released."""
+        self._paused_providers.discard(provider)
+        released = 0
+        # Only this provider's tasks and their dependants can have been held
+        # by it.  Repeat until stable: a dependant is only released once its
+        # dependency has been.
+        names = (provider, *self._dependants.get(provider, ()))
+        while ready := [
+            entry
+            for name in names
+            for entry in self._parked.get(name, ())
+            if not self._is_held(entry)
+        ]:
+            for entry in sorted(ready, key=lambda entry: entry.seq):
+                self._unpark(entry)
+                self._order.add(entry)
+            released += len(ready)
+        return released
+
+    @property
+    def paused_providers(self) -> frozenset[str]:
+        return frozenset(self._paused_providers)
+
+    def _park(self, entry: QueuedTask | None) -> int:
+        if entry is None or self._is_parked(entry):
+            return 0
+        self._order.discard(entry)
+        self._parked.setdefault(entry.provider, set()).add(entry)
+        return 1
+
+    def _unpark(self, entry: QueuedTask) -> None:
+        parked = self._parked[entry.provider]
+        parked.discard(entry)
+        if not parked:
+            del self._parked[entry.provider]
+
+    def _is_parked(self, entry: QueuedTask) -> bool:
+        return entry in self._parked.get(entry.provider, ())
+
+    def _is_held(self, entry: QueuedTask) -> bool:
+        if entry.provider in self._paused_providers:
+            return True
+        user_tasks = self._tasks_by_user[entry.user_id]
+        for dependency in self._dependencies.get(entry.provider, ()):
+            dependency_entry = user_tasks.get(dependency)
+            if dependency_entry is not None and self._is_parked(dependency_entry):
+                return True
+        return False
+
 
 """
 ===================================================================================================
@@ -0,0 +1,180 @@
+"""Executes dispatched tasks against their provider endpoints."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from http.client import HTTPException
+
+from solutions.IWC.coalescing import DispatchCoalescer
+from solutions.IWC.provider_client import PoolTimeout, ProviderClients
+from solutions.IWC.provider_health import ProviderConcurrencyController
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.result_processing import ResultProcessor
+from solutions.IWC.staging import StagedQueue
+from solutions.IWC.task_types import TaskBatch, TaskDispatch, TenantDispatch
+from solutions.IWC.tenancy import TenantQueues
+
+# Statuses that count as a provider failure rather than an answer.
+FAILURE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class DispatchOutcome:
+    dispatch: TaskDispatch
+    status: int | None
+    elapsed_seconds: float
+    error: str | None = None
+    # Set when the body was handed to a ResultProcessor; one future is shared
+    # by every dispatch of a coalesced call.
+    result: Future | None = None
+
+
+def user_request_path(dispatch: TaskDispatch) -> str:
+    return f"/users/{dispatch.user_id}"
+
+
+def batch_request_path(batch: TaskBatch) -> str:
+    return "/users?ids=" + ",".join(str(user_id) for user_id in batch.user_ids)
+
+
+class QueueWorker:
+    """Dequeues tasks and fetches them through the pooled provider clients.
+
+    With a ``coalescer`` the worker fetches coalesced batches instead: ``pump``
+    releases batches that are full or whose window has elapsed, and ``drain``
+    also flushes whatever is still open once the queue is empty.
+
+    With a ``controller`` every provider call is reported to it, so slow or
+    failing providers are throttled or paused while the rest keep flowing.
+
+    Given ``TenantQueues`` instead of a ``Queue``, one worker drains every
+    tenant in weighted turn.  Given a ``StagedQueue`` it dequeues from the
+    staged queue, which applies pending submissions first.
+
+    Every successful fetch is reported back with ``complete``, so providers
+    with a freshness window only skip resubmissions once a result exists.
+
+    With a ``processor`` successful responses from providers that have a
+    registered result handler are post-processed in its process pool; the
+    worker moves on to the next dispatch while they are parsed.
+    """
+
+    def __init__(
+        self,
+        queue: Queue | TenantQueues | StagedQueue,
+        clients: ProviderClients | None = None,
+        request_path: Callable[[TaskDispatch], str] = user_request_path,
+        coalescer: DispatchCoalescer | None = None,
+        batch_path: Callable[[TaskBatch], str] = batch_request_path,
+        controller: ProviderConcurrencyController | None = None,
+        processor: ResultProcessor | None = None,
+    ) -> None:
+        self._queue = queue
+        self._clients = ProviderClients(queue.providers) if clients is None else clients
+        self._request_path = request_path
+        self._coalescer = coalescer
+        self._batch_path = batch_path
+        self._controller = controller
+        self._processor = processor
+
+    def execute(self, dispatch: TaskDispatch) -> DispatchOutcome:
+        return self._fetch(dispatch.provider, self._request_path(dispatch), [dispatch])[
+            0
+        ]
+
+    def execute_batch(self, batch: TaskBatch) -> list[DispatchOutcome]:
+        tenant = batch.tenant
+        dispatches = [
+            TaskDispatch(batch.provider, user_id)
+            if tenant is None
+            else TenantDispatch(batch.provider, user_id, tenant)
+            for user_id in batch.user_ids
+        ]
+        if len(dispatches) == 1:
+            return [self.execute(dispatches[0])]
+        return self._fetch(batch.provider, self._batch_path(batch), dispatches)
+
+    def run_once(self) -> DispatchOutcome | None:
+        if self._controller is not None:
+            self._controller.poll()
+        dispatch = self._queue.dequeue()
+        if dispatch is None:
+            return None
+        return self.execute(dispatch)
+
+    def pump(self) -> list[DispatchOutcome]:
+        if self._coalescer is None:
+            raise ValueError("pump requires a coalescer")
+        if self._controller is not None:
+            self._controller.poll()
+        outcomes = []
+        while (dispatch := self._queue.dequeue()) is not None:
+            batch = self._coalescer.add(dispatch)
+            if batch is not None:
+                outcomes.extend(self.execute_batch(batch))
+        for batch in self._coalescer.due():
+            outcomes.extend(self.execute_batch(batch))
+        return outcomes
+
+    def drain(self) -> list[DispatchOutcome]:
+        if self._coalescer is not None:
+            outcomes = self.pump()
+            for batch in self._coalescer.flush():
+                outcomes.extend(self.execute_batch(batch))
+            return outcomes
+        outcomes = []
+        while (outcome := self.run_once()) is not None:
+            outcomes.append(outcome)
+        return outcomes
+
+    def _fetch(
+        self, provider: str, path: str, dispatches: list[TaskDispatch]
+    ) -> list[DispatchOutcome]:
+        controller = self._controller
+        if controller is not None:
+            controller.on_dispatch(provider)
+        started = time.perf_counter()
+        try:
+            response = self._clients.request(provider, "GET", path)
+        except (OSError, HTTPException, PoolTimeout) as error:
+            if controller is not None:
+                controller.on_complete(provider, time.perf_counter() - started, False)
+            return [
+                DispatchOutcome(dispatch, None, 0.0, error=repr(error))
+                for dispatch in dispatches
+            ]
+        succeeded = response.status not in FAILURE_STATUSES
+        if controller is not None:
+            controller.on_complete(provider, response.elapsed_seconds, succeeded)
+        if succeeded:
+            for dispatch in dispatches:
+                self._complete(dispatch)
+        result = None
+        processor = self._processor
+        if succeeded and processor is not None and processor.handles(provider):
+            result = processor.submit(provider, response.body)
+        return [
+            DispatchOutcome(
+                dispatch, response.status, response.elapsed_seconds, result=result
+            )
+            for dispatch in dispatches
+        ]
+
+    def _complete(self, dispatch: TaskDispatch) -> None:
+        queue = self._queue
+        if isinstance(queue, TenantQueues):
+            if isinstance(dispatch, TenantDispatch):
+                queue.complete(dispatch.tenant, dispatch.user_id, dispatch.provider)
+        else:
+            queue.complete(dispatch.user_id, dispatch.provider)
+
+
+__all__ = [
+    "DispatchOutcome",
+    "QueueWorker",
+    "batch_request_path",
+    "user_request_path",
+]
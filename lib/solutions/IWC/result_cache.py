@@ -0,0 +1,56 @@
+"""Recently completed fetches, used to skip redundant provider calls.
+
+A ``(user_id, provider)`` pair is remembered when ``Queue.complete`` reports
+that its fetch succeeded.
+While the provider's freshness window has not elapsed, a new submission for
+the same pair is answered by the previous fetch and never enters the queue.
+Entries are kept in least-recently-used order and bounded by ``max_entries``.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from solutions.IWC.queue_metrics import ResultCacheStats
+
+
+class RecentResultCache:
+    def __init__(self, max_entries: int = 10_000) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[int, str], datetime] = OrderedDict()
+        self.stats = ResultCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, user_id: int, provider: str, completed_at: datetime) -> None:
+        key = (user_id, provider)
+        self._entries[key] = completed_at
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def discard(self, user_id: int, provider: str) -> None:
+        self._entries.pop((user_id, provider), None)
+
+    def is_fresh(
+        self, user_id: int, provider: str, freshness: timedelta, now: datetime
+    ) -> bool:
+        key = (user_id, provider)
+        completed_at = self._entries.get(key)
+        if completed_at is not None and now - completed_at < freshness:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True
+        if completed_at is not None:
+            del self._entries[key]
+            self.stats.expirations += 1
+        self.stats.misses += 1
+        return False
+
+
+__all__ = ["RecentResultCache"]
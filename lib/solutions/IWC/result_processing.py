@@ -0,0 +1,139 @@
+"""Runs CPU-heavy provider result handlers in a process pool.
+
+Parsing a large bank_statements document inline would stall the worker, and
+every other provider's dispatches with it.  ``ResultProcessor`` hands each
+response body to the handler registered for its provider in a
+``ProcessPoolExecutor`` instead.  Bodies of at least ``shared_memory_threshold``
+bytes are copied once into a ``multiprocessing.shared_memory`` segment and
+only its name crosses the process boundary, instead of pickling the payload
+through the pool's pipe.  At most ``max_pending`` bodies are in flight;
+``submit`` blocks beyond that, so a saturated pool slows the worker down
+rather than letting results pile up in memory.
+
+Handlers must be picklable (module-level functions).  They receive the body as
+a ``memoryview`` and must not keep a reference to it after returning.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+ResultHandler = Callable[[memoryview], object]
+
+
+@dataclass
+class ResultProcessingStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    shared_memory_payloads: int = 0
+    backpressure_waits: int = 0
+
+
+class ResultProcessor:
+    def __init__(
+        self,
+        handlers: dict[str, ResultHandler],
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        shared_memory_threshold: int = 64 * 1024,
+    ) -> None:
+        if max_pending is not None and max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        if shared_memory_threshold < 1:
+            raise ValueError("shared_memory_threshold must be at least 1")
+        self._handlers = dict(handlers)
+        workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(workers)
+        self._slots = threading.BoundedSemaphore(
+            2 * workers if max_pending is None else max_pending
+        )
+        self._threshold = shared_memory_threshold
+        self._lock = threading.Lock()
+        self.stats = ResultProcessingStats()
+
+    def handles(self, provider: str) -> bool:
+        return provider in self._handlers
+
+    def submit(self, provider: str, body: bytes) -> Future:
+        """Process ``body`` with ``provider``'s handler; blocks while saturated."""
+        handler = self._handlers[provider]
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats.backpressure_waits += 1
+            self._slots.acquire()
+        segment = None
+        try:
+            if len(body) >= self._threshold:
+                segment = shared_memory.SharedMemory(create=True, size=len(body))
+                buffer = segment.buf
+                assert buffer is not None
+                buffer[: len(body)] = body
+                future = self._executor.submit(
+                    _process_shared, handler, segment.name, len(body)
+                )
+            else:
+                future = self._executor.submit(_process_inline, handler, body)
+        except BaseException:
+            self._slots.release()
+            if segment is not None:
+                _release(segment)
+            raise
+        with self._lock:
+            self.stats.submitted += 1
+            self.stats.shared_memory_payloads += segment is not None
+        future.add_done_callback(lambda done: self._on_done(done, segment))
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _on_done(
+        self, future: Future, segment: shared_memory.SharedMemory | None
+    ) -> None:
+        if segment is not None:
+            _release(segment)
+        failed = future.cancelled() or future.exception() is not None
+        with self._lock:
+            if failed:
+                self.stats.failed += 1
+            else:
+                self.stats.completed += 1
+        self._slots.release()
+
+
+def _release(segment: shared_memory.SharedMemory) -> None:
+    segment.close()
+    segment.unlink()
+
+
+def _process_inline(handler: ResultHandler, body: bytes) -> object:
+    return handler(memoryview(body))
+
+
+def _process_shared(handler: ResultHandler, name: str, size: int) -> object:
+    # Pool processes share the parent's resource tracker, which already tracks
+    # the segment; the parent unlinks it, so it must not be unregistered here.
+    if sys.version_info >= (3, 13):
+        segment = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        segment = shared_memory.SharedMemory(name=name)
+    try:
+        buffer = segment.buf
+        assert buffer is not None
+        view = buffer[:size]
+        try:
+            return handler(view)
+        finally:
+            view.release()
+    finally:
+        segment.close()
+
+
+__all__ = ["ResultHandler", "ResultProcessingStats", "ResultProcessor"]
@@ -0,0 +1,38 @@
+"""Retry policy for dispatches handed back through ``Queue.retry``."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass
+class RetryPolicy:
+    """Attempt cap and exponential backoff for failed dispatches.
+
+    The ``n``-th retry of a task waits ``base_delay_seconds * multiplier **
+    (n - 1)`` seconds, capped at ``max_delay_seconds``.  ``ledger_size`` bounds
+    how many recent dispatches are remembered so that they can be retried.
+    """
+
+    max_attempts: int = 3
+    base_delay_seconds: float = 1.0
+    multiplier: float = 2.0
+    max_delay_seconds: float = 60.0
+    ledger_size: int = 10_000
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 0:
+            raise ValueError("max_attempts must not be negative")
+        if self.base_delay_seconds < 0 or self.max_delay_seconds < 0:
+            raise ValueError("retry delays must not be negative")
+        if self.multiplier < 1:
+            raise ValueError("multiplier must be at least 1")
+        if self.ledger_size < 1:
+            raise ValueError("ledger_size must be at least 1")
+
+    def backoff_seconds(self, attempt: int) -> float:
+        delay = self.base_delay_seconds * self.multiplier ** (attempt - 1)
+        return min(delay, self.max_delay_seconds)
+
+
+__all__ = ["RetryPolicy"]
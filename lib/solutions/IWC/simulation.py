@@ -0,0 +1,312 @@
+"""Discrete-event simulation of workers draining a ``Queue``, for capacity planning.
+
+The real ``Queue`` ordering logic runs on a virtual clock: arrivals, provider
+calls finishing and depth samples are events in a heap, and time jumps from
+one event to the next, so hours of traffic take seconds to simulate.  A
+submission is timestamped with the virtual time it arrives at, exactly as
+``fetch_customer_data`` would do, and each of ``workers`` workers takes the
+next dispatch as soon as it is free and holds it for a latency drawn from that
+provider's distribution.
+
+``simulate`` reports throughput, queue depth over time and wait-time
+percentiles (arrival to dispatch) per provider and per user.  Waits follow
+the queue's change feed: a task's wait starts when the queue reports it
+enqueued and is dropped when the queue reports it shed, expired, cancelled or
+purged.  So an arrival the queue rejects starts no wait, and one that only
+duplicates a pending task keeps the earlier start.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import random
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from solutions.IWC.change_feed import (
+    CANCELLED,
+    ENQUEUED,
+    EXPIRED,
+    PURGED,
+    SHED,
+    EventSubscription,
+)
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+
+SIMULATION_START = datetime(2025, 1, 1)
+
+_ARRIVAL, _COMPLETION, _SAMPLE = range(3)
+
+
+class VirtualClock:
+    """Clock handed to ``Queue``; only the simulation moves it forward."""
+
+    def __init__(self, start: datetime = SIMULATION_START) -> None:
+        self.start = start
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.now - self.start).total_seconds()
+
+
+@dataclass
+class FixedLatency:
+    seconds: float
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+
+@dataclass
+class ExponentialLatency:
+    mean_seconds: float
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.expovariate(1.0 / self.mean_seconds)
+
+
+@dataclass
+class LogNormalLatency:
+    """Right-skewed latency with the given median; ``sigma`` sets the tail."""
+
+    median_seconds: float
+    sigma: float = 0.5
+
+    def sample(self, rng: random.Random) -> float:
+        return rng.lognormvariate(math.log(self.median_seconds), self.sigma)
+
+
+LatencyDistribution = FixedLatency | ExponentialLatency | LogNormalLatency
+
+
+@dataclass
+class PoissonArrivals:
+    """Submissions arriving at random with ``rate_per_second`` on average.
+
+    Each one picks a provider by ``provider_weights`` and one of ``users``
+    users uniformly.
+    """
+
+    rate_per_second: float
+    provider_weights: dict[str, float]
+    users: int = 100
+
+    def __post_init__(self) -> None:
+        if self.rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        if self.users < 1:
+            raise ValueError("users must be at least 1")
+
+    def next_gap(self, rng: random.Random) -> float:
+        return rng.expovariate(self.rate_per_second)
+
+    def submission(self, rng: random.Random, now: datetime) -> TaskSubmission:
+        provider = rng.choices(
+            list(self.provider_weights), list(self.provider_weights.values())
+        )[0]
+        return TaskSubmission(provider, rng.randrange(self.users), now)
+
+
+@dataclass
+class PeriodicArrivals(PoissonArrivals):
+    """Submissions arriving exactly ``1 / rate_per_second`` apart."""
+
+    def next_gap(self, rng: random.Random) -> float:
+        return 1.0 / self.rate_per_second
+
+
+@dataclass
+class SimulationConfig:
+    arrivals: Sequence[PoissonArrivals]
+    latencies: dict[str, LatencyDistribution]
+    workers: int
+    duration_seconds: float
+    default_latency: LatencyDistribution = field(
+        default_factory=lambda: FixedLatency(1.0)
+    )
+    sample_interval_seconds: float = 60.0
+    seed: int = 0
+    queue_factory: Callable[[VirtualClock], Queue] = lambda clock: Queue(clock=clock)
+
+    def __post_init__(self) -> None:
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+        if self.duration_seconds <= 0 or self.sample_interval_seconds <= 0:
+            raise ValueError("duration and sample interval must be positive")
+
+
+@dataclass
+class WaitStats:
+    """Arrival-to-dispatch waits in seconds; percentiles are nearest-rank."""
+
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_waits(cls, waits: list[float]) -> WaitStats:
+        ordered = sorted(waits)
+
+        def percentile(q: float) -> float:
+            return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+        return cls(
+            count=len(ordered),
+            mean=sum(ordered) / len(ordered),
+            p50=percentile(0.50),
+            p95=percentile(0.95),
+            p99=percentile(0.99),
+            max=ordered[-1],
+        )
+
+
+@dataclass
+class SimulationReport:
+    duration_seconds: float
+    arrivals: int
+    dispatched: int
+    completed: int
+    final_depth: int
+    depth_samples: list[tuple[float, int]]
+    wait_by_provider: dict[str, WaitStats]
+    wait_by_user: dict[int, WaitStats]
+    busy_seconds: float
+    workers: int
+
+    @property
+    def throughput_per_second(self) -> float:
+        return self.completed / self.duration_seconds
+
+    @property
+    def utilisation(self) -> float:
+        return self.busy_seconds / (self.workers * self.duration_seconds)
+
+    @property
+    def max_depth(self) -> int:
+        return max((depth for _, depth in self.depth_samples), default=0)
+
+
+def simulate(config: SimulationConfig) -> SimulationReport:
+    """Run ``config`` for ``duration_seconds`` of virtual time."""
+    rng = random.Random(config.seed)
+    clock = VirtualClock()
+    queue = config.queue_factory(clock)
+    # Drained after every queue call, so the buffer only ever holds the
+    # events of one call; it is sized so that even a call expiring every
+    # queued task drops none.
+    feed = queue.events(max_buffer=1 << 20)
+    end = config.duration_seconds
+
+    # Only arrival events carry a payload: the process that generated them.
+    events: list[tuple[float, int, int, PoissonArrivals | None]] = []
+    sequence = 0
+
+    def schedule(at: float, kind: int, payload: PoissonArrivals | None) -> None:
+        nonlocal sequence
+        sequence += 1
+        heapq.heappush(events, (at, sequence, kind, payload))
+
+    for source in config.arrivals:
+        schedule(source.next_gap(rng), _ARRIVAL, source)
+    schedule(0.0, _SAMPLE, None)
+
+    queued_at: dict[tuple[int, str], float] = {}
+    waits_by_provider: dict[str, list[float]] = {}
+    waits_by_user: dict[int, list[float]] = {}
+    depth_samples: list[tuple[float, int]] = []
+    idle = config.workers
+    arrivals = dispatched = completed = 0
+    busy_seconds = 0.0
+
+    while events and events[0][0] <= end:
+        now, _, kind, process = heapq.heappop(events)
+        clock.now = clock.start + timedelta(seconds=now)
+        if kind == _ARRIVAL:
+            assert process is not None
+            arrivals += 1
+            queue.enqueue(process.submission(rng, clock.now))
+            _track_waits(feed, queued_at, now)
+            schedule(now + process.next_gap(rng), _ARRIVAL, process)
+        elif kind == _COMPLETION:
+            completed += 1
+            idle += 1
+        else:
+            depth_samples.append((now, queue.size))
+            _track_waits(feed, queued_at, now)
+            schedule(now + config.sample_interval_seconds, _SAMPLE, None)
+
+        while idle and (dispatch := queue.dequeue()) is not None:
+            _track_waits(feed, queued_at, now)
+            idle -= 1
+            dispatched += 1
+            wait = now - queued_at.pop((dispatch.user_id, dispatch.provider), now)
+            waits_by_provider.setdefault(dispatch.provider, []).append(wait)
+            waits_by_user.setdefault(dispatch.user_id, []).append(wait)
+            latency = config.latencies.get(dispatch.provider, config.default_latency)
+            duration = latency.sample(rng)
+            busy_seconds += min(duration, end - now)
+            schedule(now + duration, _COMPLETION, None)
+
+    return SimulationReport(
+        duration_seconds=end,
+        arrivals=arrivals,
+        dispatched=dispatched,
+        completed=completed,
+        final_depth=queue.size,
+        depth_samples=depth_samples,
+        wait_by_provider={
+            provider: WaitStats.from_waits(waits)
+            for provider, waits in sorted(waits_by_provider.items())
+        },
+        wait_by_user={
+            user_id: WaitStats.from_waits(waits)
+            for user_id, waits in sorted(waits_by_user.items())
+        },
+        busy_seconds=busy_seconds,
+        workers=config.workers,
+    )
+
+
+def _track_waits(
+    feed: EventSubscription, queued_at: dict[tuple[int, str], float], now: float
+) -> None:
+    """Start or drop waits for the tasks the queue reports added or removed."""
+    for event in feed.drain():
+        if event.kind == PURGED:
+            purged = [
+                key
+                for key in queued_at
+                if event.user_id in (None, key[0]) and event.provider in (None, key[1])
+            ]
+            for key in purged:
+                del queued_at[key]
+        elif event.user_id is not None and event.provider is not None:
+            key = (event.user_id, event.provider)
+            if event.kind == ENQUEUED:
+                queued_at[key] = now
+            elif event.kind in (SHED, EXPIRED, CANCELLED):
+                queued_at.pop(key, None)
+
+
+__all__ = [
+    "ExponentialLatency",
+    "FixedLatency",
+    "LogNormalLatency",
+    "PeriodicArrivals",
+    "PoissonArrivals",
+    "SimulationConfig",
+    "SimulationReport",
+    "VirtualClock",
+    "WaitStats",
+    "simulate",
+]
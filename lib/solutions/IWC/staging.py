@@ -0,0 +1,225 @@
+"""Staged enqueue: the request thread hands submissions over, a scheduler indexes them.
+
+``StagedQueue.enqueue`` does no index maintenance at all.  It stores the
+submission in the next slot of a preallocated ``SubmissionRing`` and publishes
+it by moving the ring's tail, without taking a lock, and a scheduler thread
+drains the ring in batches into the wrapped ``Queue`` through
+``enqueue_many``.  Everything that reads the queue (``dequeue``, ``size``,
+``peek``) first drains whatever is still pending, under the same lock the
+scheduler holds while it drains, so it never sees a submission as missing
+just because the scheduler has not got to it yet.
+
+The ring has a single producer: ``enqueue`` must only ever be called from one
+thread at a time.  When the ring is full ``enqueue`` waits for the scheduler to
+make room rather than dropping the submission; if the scheduler thread has
+died it drains the ring itself.  Rejections from admission control are only
+known once a batch is drained, so they are passed to ``on_reject`` instead of
+being returned.  A submission with malformed metadata is passed to
+``on_error`` and counted in ``StagingStats.errors``; the rest of its batch is
+still applied and the scheduler thread keeps running.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Self
+
+from solutions.IWC.queue_solution_legacy import Provider, Queue
+from solutions.IWC.task_types import EnqueueRejection, TaskDispatch, TaskSubmission
+
+
+class SubmissionRing:
+    """Fixed-size single-producer, single-consumer ring of submissions.
+
+    ``head`` and ``tail`` only ever grow; a slot is ``counter & mask``.  The
+    producer fills a slot before it advances ``tail`` and the consumer clears
+    slots before it advances ``head``, and each counter has a single writer,
+    so neither side needs a lock to see a consistent ring.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        if capacity < 1 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a positive power of two")
+        self._slots: list[TaskSubmission | None] = [None] * capacity
+        self._mask = capacity - 1
+        self._head = 0
+        self._tail = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._mask + 1
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    def push(self, submission: TaskSubmission) -> bool:
+        """Append ``submission``; ``False`` if the ring is full.  Producer only."""
+        tail = self._tail
+        if tail - self._head > self._mask:
+            return False
+        self._slots[tail & self._mask] = submission
+        self._tail = tail + 1
+        return True
+
+    def pop_batch(self, limit: int) -> list[TaskSubmission]:
+        """Remove up to ``limit`` submissions, oldest first.  Consumer only."""
+        head = self._head
+        end = min(self._tail, head + limit)
+        slots = self._slots
+        mask = self._mask
+        batch = []
+        for position in range(head, end):
+            submission = slots[position & mask]
+            assert submission is not None
+            batch.append(submission)
+            slots[position & mask] = None
+        self._head = end
+        return batch
+
+
+@dataclass
+class StagingStats:
+    staged: int = 0
+    drained: int = 0
+    batches: int = 0
+    rejected: int = 0
+    errors: int = 0
+    full_waits: int = 0
+
+
+class StagedQueue:
+    """Wraps a ``Queue`` so that ``enqueue`` only appends to a ring buffer.
+
+    Call ``start`` to run the scheduler thread (or use the ``StagedQueue`` as
+    a context manager); without it pending submissions are still drained by
+    the next ``dequeue``, ``size`` or ``flush``.
+    """
+
+    def __init__(
+        self,
+        queue: Queue | None = None,
+        capacity: int = 4096,
+        batch_size: int = 256,
+        idle_interval: float = 0.001,
+        on_reject: Callable[[EnqueueRejection], None] | None = None,
+        on_error: Callable[[TaskSubmission, Exception], None] | None = None,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.queue = Queue() if queue is None else queue
+        self._ring = SubmissionRing(capacity)
+        self._batch_size = batch_size
+        self._idle_interval = idle_interval
+        self._on_reject = on_reject
+        self._on_error = on_error
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._scheduler: threading.Thread | None = None
+        self.stats = StagingStats()
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self._scheduler is not None:
+            raise RuntimeError("scheduler thread already started")
+        self._stopping.clear()
+        self._scheduler = threading.Thread(
+            target=self._run, name="staged-queue-scheduler", daemon=True
+        )
+        self._scheduler.start()
+
+    def close(self) -> None:
+        """Stop the scheduler thread after it has drained the ring."""
+        scheduler = self._scheduler
+        if scheduler is None:
+            return
+        self._stopping.set()
+        scheduler.join()
+        self._scheduler = None
+        self.flush()
+
+    def enqueue(self, item: TaskSubmission) -> int:
+        """Stage ``item`` and return how many submissions are pending.
+
+        Waits while the ring is full, or drains it here if no scheduler thread
+        is running.  Must not be called concurrently.
+        """
+        ring = self._ring
+        if not ring.push(item):
+            self.stats.full_waits += 1
+            while not ring.push(item):
+                scheduler = self._scheduler
+                if scheduler is None or not scheduler.is_alive():
+                    self.flush()
+                else:
+                    time.sleep(self._idle_interval)
+        self.stats.staged += 1
+        return len(ring)
+
+    @property
+    def pending(self) -> int:
+        """Submissions staged but not yet applied to the queue."""
+        return len(self._ring)
+
+    def flush(self) -> int:
+        """Apply every pending submission now; returns how many were applied."""
+        with self._lock:
+            return self._drain()
+
+    def dequeue(self) -> TaskDispatch | None:
+        with self._lock:
+            self._drain()
+            return self.queue.dequeue()
+
+    def complete(self, user_id: int, provider: str) -> None:
+        with self._lock:
+            self.queue.complete(user_id, provider)
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            self._drain()
+            return self.queue.size
+
+    def peek(self, k: int = 1) -> list[TaskDispatch]:
+        with self._lock:
+            self._drain()
+            return self.queue.peek(k)
+
+    @property
+    def providers(self) -> list[Provider]:
+        return self.queue.providers
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            if not self._ring or not self.flush():
+                self._stopping.wait(self._idle_interval)
+
+    def _drain(self) -> int:
+        drained = 0
+        while batch := self._ring.pop_batch(self._batch_size):
+            rejections = self.queue.enqueue_many(batch, on_error=self._record_error)
+            drained += len(batch)
+            self.stats.batches += 1
+            self.stats.rejected += len(rejections)
+            if self._on_reject is not None:
+                for rejection in rejections:
+                    self._on_reject(rejection)
+        self.stats.drained += drained
+        return drained
+
+    def _record_error(self, submission: TaskSubmission, error: Exception) -> None:
+        self.stats.errors += 1
+        if self._on_error is not None:
+            self._on_error(submission, error)
+
+
+__all__ = ["StagedQueue", "StagingStats", "SubmissionRing"]
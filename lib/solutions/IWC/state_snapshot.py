@@ -0,0 +1,284 @@
+"""Publishes a fixed-layout queue summary into shared memory.
+
+A monitoring process can attach to the segment by name and read depth, age,
+per-provider and per-user counts without going through the runner.  The
+segment is written by a single publisher and guarded by a seqlock: the
+publisher makes the sequence number odd, rewrites the body in place and makes
+it even again, and a reader retries whenever it saw an odd number or the
+number changed while it was unpacking.  Readers never block the queue.
+
+Layout (little-endian)::
+
+    0   magic "IWCQ", version u16, provider slots u16, user slots u32,
+        name size u32
+    16  sequence u64
+    24  provider names, provider slots x name size bytes (written once)
+    ..  body: published_at f64, depth u64, age_seconds i64, user_count u32,
+        other-provider tasks u64, per-provider tasks u64 x provider slots,
+        busiest users (user_id i64, tasks u64) x user slots
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing import resource_tracker, shared_memory
+from typing import Self
+
+from solutions.IWC.queue_metrics import QueueSummary
+from solutions.IWC.queue_solution_legacy import Queue
+
+MAGIC = b"IWCQ"
+VERSION = 1
+NAME_SIZE = 32
+
+_HEADER = struct.Struct("<4sHHII")
+_SEQUENCE = struct.Struct("<Q")
+_SEQUENCE_OFFSET = _HEADER.size
+_NAMES_OFFSET = _SEQUENCE_OFFSET + _SEQUENCE.size
+
+# Segments published from this process, which its resource tracker owns.
+_owned_segments: set[str] = set()
+
+
+def _body_struct(provider_slots: int, user_slots: int) -> struct.Struct:
+    return struct.Struct(f"<dQqIQ{provider_slots}Q{2 * user_slots}q")
+
+
+class QueueStatePublisher:
+    """Writes ``Queue.summary()`` into a shared-memory segment.
+
+    A summary costs O(users), so mutations publish at most once per
+    ``interval_seconds``; one that falls inside the interval is only marked
+    pending.  ``start`` (or using the publisher as a context manager) runs a
+    flusher thread that publishes pending changes every interval, so readers
+    are never more than about one interval behind, as ``published_at``
+    shows.  The flusher reads the queue under ``lock``, so while it runs the
+    queue must only be changed with ``lock`` held; pass in the lock that
+    already guards the queue if there is one.  Without the flusher a pending
+    change waits for the next mutation after the interval or for ``flush``.
+    With ``interval_seconds=0`` every mutation is published.  ``publish``
+    forces an update.  Providers outside the queue's registry are counted
+    together.
+    """
+
+    def __init__(
+        self,
+        queue: Queue,
+        name: str | None = None,
+        max_users: int = 16,
+        interval_seconds: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        lock: threading.Lock | None = None,
+    ) -> None:
+        if interval_seconds < 0:
+            raise ValueError("interval_seconds must not be negative")
+        self._queue = queue
+        self._providers = [provider.name for provider in queue.providers]
+        self._provider_slots = {name: i for i, name in enumerate(self._providers)}
+        self._max_users = max_users
+        self._interval = interval_seconds
+        self._clock = clock
+        self._body = _body_struct(len(self._providers), max_users)
+        self._body_offset = _NAMES_OFFSET + NAME_SIZE * len(self._providers)
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=True, size=self._body_offset + self._body.size
+        )
+        _owned_segments.add(self._shm.name)
+        self._buffer = buffer = _buffer(self._shm)
+        _HEADER.pack_into(
+            buffer, 0, MAGIC, VERSION, len(self._providers), max_users, NAME_SIZE
+        )
+        for slot, provider in enumerate(self._providers):
+            struct.pack_into(
+                f"{NAME_SIZE}s",
+                buffer,
+                _NAMES_OFFSET + NAME_SIZE * slot,
+                provider.encode(),
+            )
+        self._sequence = 0
+        self._last_published = float("-inf")
+        self._pending = False
+        self.lock = threading.Lock() if lock is None else lock
+        self._stopping = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self.publish()
+        queue.subscribe(self._on_change)
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def pending(self) -> bool:
+        """Whether a mutation has happened since the last publish."""
+        return self._pending
+
+    def publish(self) -> None:
+        summary = self._queue.summary(self._max_users)
+        provider_counts = [0] * len(self._providers)
+        other = 0
+        for provider, count in summary.tasks_by_provider.items():
+            slot = self._provider_slots.get(provider)
+            if slot is None:
+                other += count
+            else:
+                provider_counts[slot] = count
+        users = [0, 0] * self._max_users
+        for slot, (user_id, count) in enumerate(summary.busiest_users):
+            users[2 * slot : 2 * slot + 2] = user_id, count
+
+        buffer = self._buffer
+        self._sequence += 1
+        _SEQUENCE.pack_into(buffer, _SEQUENCE_OFFSET, self._sequence)
+        self._body.pack_into(
+            buffer,
+            self._body_offset,
+            time.time(),
+            summary.depth,
+            summary.age_seconds,
+            summary.user_count,
+            other,
+            *provider_counts,
+            *users,
+        )
+        self._sequence += 1
+        _SEQUENCE.pack_into(buffer, _SEQUENCE_OFFSET, self._sequence)
+        self._last_published = self._clock()
+        self._pending = False
+
+    def flush(self) -> bool:
+        """Publish a pending mutation now; returns whether there was one."""
+        if not self._pending:
+            return False
+        self.publish()
+        return True
+
+    def start(self) -> None:
+        """Run the flusher thread; needs a non-zero ``interval_seconds``."""
+        if self._flusher is not None:
+            raise RuntimeError("flusher thread already started")
+        if not self._interval:
+            raise ValueError("a flusher needs a non-zero interval_seconds")
+        self._stopping.clear()
+        self._flusher = threading.Thread(
+            target=self._run, name="queue-state-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def close(self) -> None:
+        """Stop publishing and remove the segment."""
+        flusher = self._flusher
+        if flusher is not None:
+            self._stopping.set()
+            flusher.join()
+            self._flusher = None
+        self._queue.unsubscribe(self._on_change)
+        self._shm.close()
+        self._shm.unlink()
+        _owned_segments.discard(self._shm.name)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self._interval):
+            with self.lock:
+                self.flush()
+
+    def _on_change(self) -> None:
+        if self._clock() - self._last_published >= self._interval:
+            self.publish()
+        else:
+            self._pending = True
+
+
+class QueueStateReader:
+    """Reads summaries published by ``QueueStatePublisher`` in another process."""
+
+    def __init__(self, name: str) -> None:
+        self._shm = _attach(name)
+        self._buffer = buffer = _buffer(self._shm)
+        magic, version, provider_slots, user_slots, name_size = _HEADER.unpack_from(
+            buffer, 0
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{name!r} is not a queue state segment")
+        self._providers = [
+            bytes(buffer[offset : offset + name_size]).rstrip(b"\0").decode()
+            for offset in range(
+                _NAMES_OFFSET, _NAMES_OFFSET + name_size * provider_slots, name_size
+            )
+        ]
+        self._body = _body_struct(provider_slots, user_slots)
+        self._body_offset = _NAMES_OFFSET + name_size * provider_slots
+
+    def read(self, max_attempts: int = 1000) -> QueueSummary:
+        buffer = self._buffer
+        for _ in range(max_attempts):
+            (before,) = _SEQUENCE.unpack_from(buffer, _SEQUENCE_OFFSET)
+            if before % 2:
+                continue
+            values = self._body.unpack_from(buffer, self._body_offset)
+            (after,) = _SEQUENCE.unpack_from(buffer, _SEQUENCE_OFFSET)
+            if before == after:
+                return self._summary(values)
+        raise TimeoutError("queue state kept changing while being read")
+
+    def close(self) -> None:
+        self._shm.close()
+
+    def _summary(self, values: tuple) -> QueueSummary:
+        published_at, depth, age, user_count, other, *rest = values
+        provider_counts = rest[: len(self._providers)]
+        users = rest[len(self._providers) :]
+        tasks_by_provider = {
+            provider: count
+            for provider, count in zip(self._providers, provider_counts, strict=True)
+            if count
+        }
+        if other:
+            tasks_by_provider["other"] = other
+        return QueueSummary(
+            depth=depth,
+            age_seconds=age,
+            tasks_by_provider=tasks_by_provider,
+            busiest_users=[
+                (users[i], users[i + 1])
+                for i in range(0, len(users), 2)
+                if users[i + 1]
+            ],
+            user_count=user_count,
+            published_at=published_at,
+        )
+
+
+def _buffer(shm: shared_memory.SharedMemory) -> memoryview:
+    buffer = shm.buf
+    if buffer is None:
+        raise ValueError(f"shared memory segment {shm.name!r} is closed")
+    return buffer
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Before 3.13 attaching registers the segment with this process's resource
+    # tracker, which would unlink it when the reader exits.  Only POSIX
+    # segments are tracked, under the name with its leading slash.  A segment
+    # published by this same process stays registered for its publisher.
+    if os.name == "posix" and shm.name not in _owned_segments:
+        resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+    return shm
+
+
+__all__ = ["QueueStatePublisher", "QueueStateReader"]
@@ -24,4 +24,57 @@ class TaskDispatch:
     user_id: int
 
 
-__all__ = ["TaskSubmission", "TaskDispatch"]
+@dataclass
+class TenantDispatch(TaskDispatch):
+    """A dispatch taken from one tenant's queue by ``TenantQueues.dequeue``."""
+
+    tenant: str
+
+
+@dataclass
+class TaskBatch:
+    """Dispatches for one provider coalesced into a single bulk call.
+
+    ``tenant`` is set when the dispatches came from one tenant's queue.
+    """
+
+    provider: str
+    user_ids: list[int]
+    tenant: str | None = None
+
+
+@dataclass
+class EnqueueRejection:
+    """Returned by ``Queue.enqueue`` when admission control refuses a task."""
+
+    reason: str
+    provider: str
+    user_id: int
+    size: int
+
+
+def normalise_timestamp(value: datetime | str) -> datetime:
+    """Return ``value`` as a naive datetime, parsing ISO strings if needed."""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    return value
+
+
+def normalise_ttl(value: object) -> float:
+    """Return a ``ttl_seconds`` value as a float; raises ``TypeError`` if invalid."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"ttl_seconds must be a number, not {value!r}")
+    return float(value)
+
+
+__all__ = [
+    "EnqueueRejection",
+    "TaskBatch",
+    "TaskDispatch",
+    "TaskSubmission",
+    "TenantDispatch",
+    "normalise_timestamp",
+    "normalise_ttl",
+]
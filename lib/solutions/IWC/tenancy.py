@@ -0,0 +1,163 @@
+"""Named queues for several tenants drained by one shared set of workers.
+
+Each tenant (business unit) owns a ``Queue`` with its own provider registry,
+so its dependencies, rule of 3 and admission limits apply to its own
+customers only.  ``TenantQueues.dequeue`` decides whose turn it is with
+start-time fair queueing: every backlogged tenant carries a virtual start
+tag, the one whose next turn finishes first (start tag plus ``1 / weight``)
+is served, and its start tag moves on to that finish.  A tenant that was idle
+restarts from the current virtual time, so it cannot bank credit while empty,
+and a tenant with a huge backlog only ever receives its weighted share while
+others wait.
+
+Provider health is shared by provider name, so ``pause_provider`` and
+``resume_provider`` apply to every tenant's queue, including tenants added
+while the provider is paused.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from solutions.IWC.queue_solution_legacy import Provider, Queue
+from solutions.IWC.task_types import EnqueueRejection, TaskSubmission, TenantDispatch
+
+
+@dataclass
+class Tenant:
+    name: str
+    queue: Queue
+    weight: float = 1.0
+    start_tag: float = 0.0
+    active: bool = False
+
+
+class TenantQueues:
+    """Registry of tenant queues with a weighted cross-tenant ``dequeue``.
+
+    It exposes ``dequeue`` and ``providers`` like a ``Queue``, so a single
+    ``QueueWorker`` can drain every tenant.  Provider clients are shared by
+    name, so two tenants may only register the same provider name with the
+    same base URL.
+    """
+
+    def __init__(self) -> None:
+        self._tenants: dict[str, Tenant] = {}
+        self._virtual_time = 0.0
+        self._paused_providers: set[str] = set()
+
+    def add_tenant(
+        self,
+        name: str,
+        queue: Queue | None = None,
+        weight: float = 1.0,
+        providers: list[Provider] | None = None,
+    ) -> Queue:
+        """Register ``name`` with ``queue`` or a new ``Queue(providers=...)``."""
+        if name in self._tenants:
+            raise ValueError(f"tenant {name!r} already exists")
+        if weight <= 0:
+            raise ValueError("tenant weight must be positive")
+        if queue is None:
+            queue = Queue(providers=providers)
+        elif providers is not None:
+            raise ValueError("pass either a queue or providers, not both")
+        known = {provider.name: provider for provider in self.providers}
+        for provider in queue.providers:
+            other = known.get(provider.name)
+            if other is not None and other.base_url != provider.base_url:
+                raise ValueError(
+                    f"provider {provider.name!r} is already registered with "
+                    f"base URL {other.base_url!r}"
+                )
+        for provider_name in self._paused_providers:
+            queue.pause_provider(provider_name)
+        self._tenants[name] = Tenant(name, queue, weight)
+        return queue
+
+    def remove_tenant(self, name: str) -> Queue:
+        """Unregister ``name`` and return its queue with whatever it still holds."""
+        tenant = self._tenant(name)
+        del self._tenants[name]
+        return tenant.queue
+
+    def queue(self, name: str) -> Queue:
+        return self._tenant(name).queue
+
+    @property
+    def tenants(self) -> list[str]:
+        return list(self._tenants)
+
+    @property
+    def providers(self) -> list[Provider]:
+        """Every tenant's providers, one entry per provider name."""
+        providers: dict[str, Provider] = {}
+        for tenant in self._tenants.values():
+            for provider in tenant.queue.providers:
+                providers.setdefault(provider.name, provider)
+        return list(providers.values())
+
+    def enqueue(self, tenant: str, item: TaskSubmission) -> int | EnqueueRejection:
+        return self._tenant(tenant).queue.enqueue(item)
+
+    def dequeue(self) -> TenantDispatch | None:
+        """Take the next task from the tenant whose turn it is.
+
+        Choosing the tenant is O(T log T) in the number of tenants.  A tenant
+        whose queued tasks are all held back (paused providers) is skipped
+        without being charged for a turn.
+        """
+        candidates = []
+        for position, tenant in enumerate(self._tenants.values()):
+            if not tenant.queue.size:
+                tenant.active = False
+                continue
+            if not tenant.active:
+                tenant.start_tag = max(tenant.start_tag, self._virtual_time)
+                tenant.active = True
+            finish_tag = tenant.start_tag + 1.0 / tenant.weight
+            candidates.append((finish_tag, position, tenant))
+        candidates.sort()
+        for finish_tag, _, tenant in candidates:
+            dispatch = tenant.queue.dequeue()
+            if dispatch is None:
+                continue
+            self._virtual_time = max(self._virtual_time, tenant.start_tag)
+            tenant.start_tag = finish_tag
+            return TenantDispatch(dispatch.provider, dispatch.user_id, tenant.name)
+        return None
+
+    def pause_provider(self, provider: str) -> int:
+        """Hold back ``provider`` in every tenant; return how many tasks are held."""
+        self._paused_providers.add(provider)
+        return sum(
+            tenant.queue.pause_provider(provider) for tenant in self._tenants.values()
+        )
+
+    def resume_provider(self, provider: str) -> int:
+        """Release ``provider`` in every tenant; return how many tasks are released."""
+        self._paused_providers.discard(provider)
+        return sum(
+            tenant.queue.resume_provider(provider) for tenant in self._tenants.values()
+        )
+
+    @property
+    def paused_providers(self) -> frozenset[str]:
+        return frozenset(self._paused_providers)
+
+    def complete(self, tenant: str, user_id: int, provider: str) -> None:
+        self._tenant(tenant).queue.complete(user_id, provider)
+
+    def size(self, tenant: str | None = None) -> int:
+        if tenant is not None:
+            return self._tenant(tenant).queue.size
+        return sum(tenant.queue.size for tenant in self._tenants.values())
+
+    def _tenant(self, name: str) -> Tenant:
+        tenant = self._tenants.get(name)
+        if tenant is None:
+            raise KeyError(f"unknown tenant {name!r}")
+        return tenant
+
+
+__all__ = ["Tenant", "TenantQueues"]
@@ -0,0 +1,132 @@
+"""Hierarchical timing wheel used to expire queued tasks.
+
+Timers are bucketed by expiry tick into a small number of wheels, each
+``slots`` times coarser than the one below it.  Scheduling and cancelling are
+O(1); advancing the clock visits one slot per elapsed tick and re-files the
+timers of a coarser slot only when the finer wheel wraps, so expiry is
+amortised O(1) per timer and never scans the pending set.  Stretches with no
+timers at all are skipped outright.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class TimerHandle(Generic[T]):
+    __slots__ = ("cancelled", "expire_tick", "item")
+
+    def __init__(self, item: T, expire_tick: int) -> None:
+        self.item = item
+        self.expire_tick = expire_tick
+        self.cancelled = False
+
+
+class TimingWheel(Generic[T]):
+    def __init__(
+        self,
+        start: datetime,
+        resolution: timedelta = timedelta(seconds=1),
+        slots: int = 64,
+        levels: int = 4,
+    ) -> None:
+        if slots < 2 or levels < 1:
+            raise ValueError("a timing wheel needs at least 2 slots and 1 level")
+        self._origin = start
+        self._resolution = resolution
+        self._slots = slots
+        self._wheels: list[list[list[TimerHandle[T]]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._due: list[TimerHandle[T]] = []
+        self._tick = 0
+        self._stored = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, item: T, expires_at: datetime) -> TimerHandle[T]:
+        # Round up so a timer never fires before its expiry time.
+        expire_tick = -((self._origin - expires_at) // self._resolution)
+        handle = TimerHandle(item, expire_tick)
+        self._size += 1
+        self._stored += 1
+        if expire_tick <= self._tick:
+            self._due.append(handle)
+        else:
+            self._place(handle)
+        return handle
+
+    def cancel(self, handle: TimerHandle[T]) -> None:
+        if not handle.cancelled:
+            handle.cancelled = True
+            self._size -= 1
+
+    def advance(self, now: datetime) -> list[T]:
+        """Move the wheel forward to ``now`` and return the expired items."""
+        target = (now - self._origin) // self._resolution
+        expired = self._collect(self._due)
+        self._due = []
+        slots = self._slots
+        while self._tick < target:
+            if self._stored == 0:
+                self._tick = target
+                break
+            self._tick += 1
+            tick = self._tick
+            span = slots ** (len(self._wheels) - 1)
+            for level in range(len(self._wheels) - 1, -1, -1):
+                if tick % span == 0:
+                    self._cascade(level, (tick // span) % slots, expired)
+                span //= slots
+        return expired
+
+    def clear(self) -> None:
+        for wheel in self._wheels:
+            for slot in wheel:
+                slot.clear()
+        self._due.clear()
+        self._stored = 0
+        self._size = 0
+
+    def _place(self, handle: TimerHandle[T]) -> None:
+        slots = self._slots
+        delta = handle.expire_tick - self._tick
+        span = 1
+        for wheel in self._wheels:
+            if delta < span * slots:
+                wheel[(handle.expire_tick // span) % slots].append(handle)
+                return
+            span *= slots
+        # Beyond the horizon: park in the farthest top-level slot and re-file
+        # when that slot cascades.
+        span //= slots
+        self._wheels[-1][(self._tick // span + slots - 1) % slots].append(handle)
+
+    def _cascade(self, level: int, slot: int, expired: list[T]) -> None:
+        handles = self._wheels[level][slot]
+        self._wheels[level][slot] = []
+        for handle in handles:
+            if handle.cancelled:
+                self._stored -= 1
+            elif handle.expire_tick <= self._tick:
+                expired.extend(self._collect([handle]))
+            else:
+                self._place(handle)
+
+    def _collect(self, handles: list[TimerHandle[T]]) -> list[T]:
+        items = []
+        for handle in handles:
+            self._stored -= 1
+            if not handle.cancelled:
+                handle.cancelled = True
+                self._size -= 1
+                items.append(handle.item)
+        return items
+
+
+__all__ = ["TimerHandle", "TimingWheel"]
@@ -0,0 +1,283 @@
+"""Per-task lifecycle tracing and wait-time histograms.
+
+A ``Queue`` given a ``LifecycleTracer`` attaches a ``TaskTrace`` to each task
+it samples when the task is enqueued, stamps it if the rule of 3 promotes the
+task, and completes it on dispatch.  A task that is replaced by an older
+submission keeps its trace; one that is cancelled, expired, shed or purged is
+never recorded.  ``TaskDispatch`` stays a plain wire payload, so completed
+traces are looked up with ``LifecycleTracer.last_trace``.
+
+Completed waits (enqueue to dispatch) go into fixed-bucket histograms per
+provider and per user.  Memory is bounded: only the ``max_users`` most
+recently dispatched users keep a histogram, and only the last ``max_traces``
+traces are kept for ``last_trace``.  With ``sample_rate`` below 1 the
+histograms count sampled tasks only.
+
+``LifecycleTracer.render_openmetrics`` formats the histograms as OpenMetrics
+text, which ``write_openmetrics`` writes to a file (for a node exporter's
+textfile collector, say) and ``serve_openmetrics`` serves over HTTP.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_WAIT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+@dataclass
+class TaskTrace:
+    """Lifecycle of one sampled task, timed by the queue's clock.
+
+    ``promoted_at`` is set if the rule of 3 promoted the task while it waited.
+    """
+
+    provider: str
+    user_id: int
+    enqueued_at: datetime
+    promoted_at: datetime | None = None
+    dispatched_at: datetime | None = None
+
+    @property
+    def wait_seconds(self) -> float | None:
+        if self.dispatched_at is None:
+            return None
+        return (self.dispatched_at - self.enqueued_at).total_seconds()
+
+
+class WaitHistogram:
+    """Counts of waits per bucket; ``counts[-1]`` holds waits above every bound."""
+
+    __slots__ = ("bounds", "count", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def copy(self) -> WaitHistogram:
+        histogram = WaitHistogram(self.bounds)
+        histogram.counts = self.counts.copy()
+        histogram.count = self.count
+        histogram.sum = self.sum
+        return histogram
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """``(upper bound, waits at or below it)`` pairs, ending with infinity."""
+        total = 0
+        buckets = []
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+class LifecycleTracer:
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        buckets: Sequence[float] = DEFAULT_WAIT_BUCKETS,
+        max_users: int = 1024,
+        max_traces: int = 1024,
+        seed: int | None = None,
+    ) -> None:
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        bounds = tuple(float(bound) for bound in buckets)
+        if not bounds or list(bounds) != sorted(set(bounds)) or bounds[0] < 0:
+            raise ValueError("buckets must be distinct, ascending and non-negative")
+        if max_users < 1 or max_traces < 1:
+            raise ValueError("max_users and max_traces must be at least 1")
+        self._sample_rate = sample_rate
+        self._rng = random.Random(seed)
+        self._bounds = bounds
+        self._max_users = max_users
+        self._by_provider: dict[str, WaitHistogram] = {}
+        self._by_user: OrderedDict[int, WaitHistogram] = OrderedDict()
+        self._recent: deque[TaskTrace] = deque(maxlen=max_traces)
+        # Exports may run on another thread while the queue records waits.
+        self._lock = threading.Lock()
+        self.traced = 0
+        self.evicted_users = 0
+
+    def start(self, provider: str, user_id: int, now: datetime) -> TaskTrace | None:
+        """A new trace if this task is sampled, else ``None``."""
+        if self._sample_rate < 1 and self._rng.random() >= self._sample_rate:
+            return None
+        return TaskTrace(provider, user_id, now)
+
+    def finish(self, trace: TaskTrace, now: datetime) -> None:
+        trace.dispatched_at = now
+        wait = max(0.0, (now - trace.enqueued_at).total_seconds())
+        with self._lock:
+            self.traced += 1
+            histogram = self._by_provider.get(trace.provider)
+            if histogram is None:
+                histogram = self._by_provider[trace.provider] = WaitHistogram(
+                    self._bounds
+                )
+            histogram.observe(wait)
+            by_user = self._by_user
+            histogram = by_user.get(trace.user_id)
+            if histogram is None:
+                histogram = by_user[trace.user_id] = WaitHistogram(self._bounds)
+                if len(by_user) > self._max_users:
+                    by_user.popitem(last=False)
+                    self.evicted_users += 1
+            else:
+                by_user.move_to_end(trace.user_id)
+            histogram.observe(wait)
+            self._recent.append(trace)
+
+    def last_trace(self, user_id: int, provider: str) -> TaskTrace | None:
+        """The most recent retained trace of ``provider`` for ``user_id``."""
+        with self._lock:
+            for trace in reversed(self._recent):
+                if (trace.user_id, trace.provider) == (user_id, provider):
+                    return trace
+        return None
+
+    def provider_histogram(self, provider: str) -> WaitHistogram | None:
+        """A copy of ``provider``'s histogram, safe to read while waits are recorded."""
+        with self._lock:
+            histogram = self._by_provider.get(provider)
+            return None if histogram is None else histogram.copy()
+
+    def user_histogram(self, user_id: int) -> WaitHistogram | None:
+        """A copy of ``user_id``'s histogram, or ``None`` if it was evicted."""
+        with self._lock:
+            histogram = self._by_user.get(user_id)
+            return None if histogram is None else histogram.copy()
+
+    def render_openmetrics(self) -> str:
+        with self._lock:
+            lines = [
+                *_histogram_family(
+                    "queue_wait_seconds",
+                    "Time from enqueue to dispatch, by provider.",
+                    "provider",
+                    self._by_provider.items(),
+                ),
+                *_histogram_family(
+                    "queue_user_wait_seconds",
+                    "Time from enqueue to dispatch, by recently dispatched user.",
+                    "user_id",
+                    self._by_user.items(),
+                ),
+                *_counter_family(
+                    "queue_traced_dispatches",
+                    "Dispatches of sampled tasks.",
+                    self.traced,
+                ),
+                *_counter_family(
+                    "queue_wait_evicted_users",
+                    "Per-user histograms dropped to stay within max_users.",
+                    self.evicted_users,
+                ),
+            ]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_family(
+    name: str,
+    help_text: str,
+    label: str,
+    histograms: Iterable[tuple[object, WaitHistogram]],
+) -> list[str]:
+    lines = [
+        f"# TYPE {name} histogram",
+        f"# UNIT {name} seconds",
+        f"# HELP {name} {help_text}",
+    ]
+    for key, histogram in histograms:
+        value = _escape_label(str(key))
+        for bound, count in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{label}="{value}",le="{le}"}} {count}')
+        lines.append(f'{name}_count{{{label}="{value}"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{label}="{value}"}} {histogram.sum!r}')
+    return lines
+
+
+def _counter_family(name: str, help_text: str, value: int) -> list[str]:
+    return [
+        f"# TYPE {name} counter",
+        f"# HELP {name} {help_text}",
+        f"{name}_total {value}",
+    ]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_openmetrics(tracer: LifecycleTracer, path: str | os.PathLike[str]) -> None:
+    """Replace ``path`` atomically, so a collector never reads half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(tracer.render_openmetrics())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def serve_openmetrics(
+    tracer: LifecycleTracer, host: str = "127.0.0.1", port: int = 0
+) -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` on a daemon thread; ``shutdown()`` the server to stop.
+
+    ``port=0`` picks a free port, read back from ``server.server_address``.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.render_openmetrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(
+        target=server.serve_forever, name="openmetrics-exporter", daemon=True
+    ).start()
+    return server
+
+
+__all__ = [
+    "DEFAULT_WAIT_BUCKETS",
+    "OPENMETRICS_CONTENT_TYPE",
+    "LifecycleTracer",
+    "TaskTrace",
+    "WaitHistogram",
+    "serve_openmetrics",
+    "write_openmetrics",
+]
@@ -0,0 +1,49 @@
+import os
+
+from runner.credentials_config_file import CredentialsConfigFile
+
+
+def write_config(path, content, mtime_ns):
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestCredentialsConfigFile:
+    def test_parses_typed_values(self, tmp_path) -> None:
+        path = tmp_path / "credentials.config"
+        write_config(
+            path,
+            "# comment\n"
+            "tdl_journey_id=abc\\=\n"
+            'tdl_hostname="example.com"\n'
+            "tdl_use_coloured_output=false\n",
+            1_000_000_000,
+        )
+        config = CredentialsConfigFile(str(path), environ={}).get()
+
+        assert config.journey_id == "abc="
+        assert config.hostname == "example.com"
+        assert config.use_coloured_output is False
+        assert config.require_rec is True
+
+    def test_parses_once_until_mtime_changes(self, tmp_path) -> None:
+        path = tmp_path / "credentials.config"
+        write_config(path, "tdl_hostname=first\n", 1_000_000_000)
+        config_file = CredentialsConfigFile(str(path), environ={})
+
+        first = config_file.get()
+        assert config_file.get() is first
+
+        write_config(path, "tdl_hostname=second\n", 2_000_000_000)
+        assert config_file.get().hostname == "second"
+
+    def test_environment_overrides_file(self, tmp_path) -> None:
+        path = tmp_path / "credentials.config"
+        write_config(path, "tdl_hostname=file\ntdl_require_rec=true\n", 1_000_000_000)
+        environ = {"TDL_HOSTNAME": "env", "TDL_REQUIRE_REC": "false", "HOME": "/"}
+
+        config = CredentialsConfigFile(str(path), environ=environ).get()
+
+        assert config.hostname == "env"
+        assert config.require_rec is False
+        assert "home" not in config
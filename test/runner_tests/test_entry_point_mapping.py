@@ -0,0 +1,21 @@
+import sys
+
+from entry_point_mapping import EntryPointMapping
+
+
+class TestEntryPointMapping:
+    def test_solution_is_imported_on_first_access(self, monkeypatch) -> None:
+        monkeypatch.delitem(sys.modules, "solutions.SUM.sum_solution", raising=False)
+        mapping = EntryPointMapping()
+
+        assert "solutions.SUM.sum_solution" not in sys.modules
+        assert mapping.sum(1, 2) == 3
+        assert "solutions.SUM.sum_solution" in sys.modules
+
+    def test_solution_instance_is_cached(self) -> None:
+        mapping = EntryPointMapping()
+        solution = mapping.sum_solution
+
+        assert vars(mapping)["sum_solution"] is solution
+        assert mapping.sum_solution is solution
+        assert EntryPointMapping().sum_solution is not solution
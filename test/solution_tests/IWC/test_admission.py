@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from entry_point_mapping import EntryPointMapping
+from solutions.IWC.admission import AdmissionPolicy
+from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import EnqueueRejection, TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+
+def submission(provider: str, user_id: int, delta_minutes: int = 0, **metadata):
+    return TaskSubmission(
+        provider, user_id, iso_ts(delta_minutes=delta_minutes), metadata=metadata
+    )
+
+
+def test_global_limit_rejects_whole_submission() -> None:
+    # GIVEN: A queue capped at 2 tasks with 1 pending
+    # WHEN: credit_check (2 tasks with its dependency) is submitted
+    # THEN: Nothing is added and the rejection explains why
+    queue = Queue(admission=AdmissionPolicy(max_size=2))
+    assert queue.enqueue(submission("id_verification", 1)) == 1
+
+    rejection = queue.enqueue(submission("credit_check", 2))
+
+    assert rejection == EnqueueRejection(
+        reason="queue_full", provider="credit_check", user_id=2, size=1
+    )
+    assert queue.size == 1
+
+
+def test_duplicates_do_not_count_against_limits() -> None:
+    queue = Queue(admission=AdmissionPolicy(max_size=1))
+    assert queue.enqueue(submission("bank_statements", 1, 5)) == 1
+    assert queue.enqueue(submission("bank_statements", 1, 0)) == 1
+    assert queue.admission_stats.rejected == 0
+
+
+def test_per_user_limit() -> None:
+    queue = Queue(admission=AdmissionPolicy(max_per_user=2))
+    queue.enqueue(submission("companies_house", 1))
+    queue.enqueue(submission("id_verification", 1))
+
+    rejection = queue.enqueue(submission("bank_statements", 1))
+
+    assert rejection.reason == "user_limit"
+    assert queue.enqueue(submission("bank_statements", 2)) == 3
+    assert queue.admission_stats.rejected_user_limit == 1
+
+
+def test_deadline_task_sheds_newest_best_effort_bank_statements_first() -> None:
+    queue = Queue(admission=AdmissionPolicy(max_size=3, shed_lower_priority=True))
+    queue.enqueue(submission("bank_statements", 1, 0))
+    queue.enqueue(submission("bank_statements", 2, 1))
+    queue.enqueue(submission("companies_house", 3, 2))
+
+    assert queue.enqueue(submission("companies_house", 4, 3)).reason == "queue_full"
+    assert queue.enqueue(submission("id_verification", 5, 3, deadline=iso_ts())) == 3
+
+    remaining = [queue.dequeue().user_id for _ in range(3)]
+    assert remaining == [5, 3, 1]
+    stats = queue.admission_stats
+    assert (stats.admitted, stats.shed, stats.rejected_queue_full) == (4, 1, 1)
+    assert stats.high_water_mark == 3
+
+
+def test_entry_point_mapping_returns_rejection_as_dict() -> None:
+    mapping = EntryPointMapping()
+    mapping.queue_solution_entrypoint = QueueSolutionEntrypoint(
+        Queue(admission=AdmissionPolicy(max_size=1))
+    )
+    task = {"provider": "id_verification", "user_id": 1, "timestamp": iso_ts()}
+
+    assert mapping.enqueue(task) == 1
+    assert mapping.enqueue({**task, "user_id": 2}) == {
+        "reason": "queue_full",
+        "provider": "id_verification",
+        "user_id": 2,
+        "size": 1,
+    }
+
+
+def test_higher_priority_submission_sheds_lower_priority_work() -> None:
+    # GIVEN: A full queue of tasks at priority levels 5 and 2
+    # WHEN: A level 1 task arrives, then another level 5 task
+    # THEN: The level 1 task sheds the level 5 task even though it is older;
+    #       the level 5 task outranks nothing and is rejected
+    queue = Queue(admission=AdmissionPolicy(max_size=2, shed_lower_priority=True))
+    queue.enqueue(submission("id_verification", 1, 0, priority=5))
+    queue.enqueue(submission("id_verification", 2, 1))
+
+    assert queue.enqueue(submission("id_verification", 3, 2, priority=1)) == 2
+    assert queue.enqueue(submission("id_verification", 4, 3, priority=5)).reason == (
+        "queue_full"
+    )
+
+    assert [queue.dequeue().user_id for _ in range(2)] == [3, 2]
+    assert queue.admission_stats.shed == 1
+
+
+def test_shedding_a_dependency_sheds_its_dependant() -> None:
+    queue = Queue(admission=AdmissionPolicy(max_size=2, shed_lower_priority=True))
+    queue.enqueue(submission("credit_check", 1, 5))
+    # A newer submission of the dependency makes it the most recent candidate.
+    queue.enqueue(submission("companies_house", 1, 0))
+
+    assert queue.enqueue(submission("id_verification", 2, 6, deadline=iso_ts())) == 1
+
+    assert queue.dequeue() == TaskDispatch("id_verification", 2)
+    assert queue.dequeue() is None
+    assert queue.admission_stats.shed == 2
+
+
+def test_dependency_is_kept_when_its_dependant_outranks_the_submission() -> None:
+    queue = Queue(admission=AdmissionPolicy(max_size=2, shed_lower_priority=True))
+    queue.enqueue(submission("companies_house", 1, 0, priority=5))
+    queue.enqueue(submission("credit_check", 1, 1, priority=0))
+
+    rejection = queue.enqueue(submission("id_verification", 2, 2, priority=1))
+
+    assert rejection.reason == "queue_full"
+    assert queue.size == 2
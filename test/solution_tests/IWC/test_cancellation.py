@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from .utils import (
+    call_cancel,
+    call_dequeue,
+    call_enqueue,
+    call_size,
+    iso_ts,
+    run_queue,
+)
+
+
+def test_cancel_withdraws_single_task() -> None:
+    # GIVEN: Two users with pending tasks
+    # WHEN: One user's task is cancelled
+    # THEN: Only that task disappears and the rest keep their order
+    run_queue(
+        [
+            call_enqueue("id_verification", 1, iso_ts(delta_minutes=0)).expect(1),
+            call_enqueue("companies_house", 2, iso_ts(delta_minutes=1)).expect(2),
+            call_enqueue("id_verification", 2, iso_ts(delta_minutes=2)).expect(3),
+            call_cancel(1, "id_verification").expect(1),
+            call_size().expect(2),
+            call_dequeue().expect("companies_house", 2),
+            call_dequeue().expect("id_verification", 2),
+            call_size().expect(0),
+        ]
+    )
+
+
+def test_cancel_unknown_task_is_a_no_op() -> None:
+    run_queue(
+        [
+            call_enqueue("id_verification", 1, iso_ts()).expect(1),
+            call_cancel(1, "bank_statements").expect(0),
+            call_cancel(2, "id_verification").expect(0),
+            call_size().expect(1),
+        ]
+    )
+
+
+def test_cancelling_dependency_withdraws_dependant() -> None:
+    # GIVEN: credit_check queued with its companies_house dependency
+    # WHEN: companies_house is cancelled
+    # THEN: credit_check is withdrawn too, since it cannot run without it
+    run_queue(
+        [
+            call_enqueue("credit_check", 1, iso_ts()).expect(2),
+            call_cancel(1, "companies_house").expect(2),
+            call_size().expect(0),
+        ]
+    )
+
+
+def test_cancelling_dependant_keeps_dependency() -> None:
+    run_queue(
+        [
+            call_enqueue("credit_check", 1, iso_ts()).expect(2),
+            call_cancel(1, "credit_check").expect(1),
+            call_dequeue().expect("companies_house", 1),
+            call_size().expect(0),
+        ]
+    )
+
+
+def test_cancel_drops_user_below_rule_of_3() -> None:
+    run_queue(
+        [
+            call_enqueue("companies_house", 2, iso_ts(delta_minutes=0)).expect(1),
+            call_enqueue("companies_house", 1, iso_ts(delta_minutes=1)).expect(2),
+            call_enqueue("id_verification", 1, iso_ts(delta_minutes=1)).expect(3),
+            call_enqueue("bank_statements", 1, iso_ts(delta_minutes=1)).expect(4),
+            call_cancel(1, "bank_statements").expect(1),
+            call_dequeue().expect("companies_house", 2),
+        ]
+    )
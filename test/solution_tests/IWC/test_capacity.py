@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+from solutions.IWC.capacity import (
+    FootprintReport,
+    WorkloadMix,
+    measure_footprint,
+    synthetic_submissions,
+)
+from solutions.IWC.fair_scheduling import FairnessPolicy
+from solutions.IWC.queue_solution_legacy import Queue
+
+
+def test_synthetic_submissions_follow_the_mix() -> None:
+    mix = WorkloadMix(provider_weights={"id_verification": 1.0}, users=5)
+
+    submissions = list(synthetic_submissions(50, mix, seed=1))
+
+    assert submissions == list(synthetic_submissions(50, mix, seed=1))
+    assert {submission.provider for submission in submissions} == {"id_verification"}
+    assert {submission.user_id for submission in submissions} <= set(range(5))
+
+
+def test_footprint_counts_metadata_and_indexes() -> None:
+    # GIVEN: The same workload with and without deadline/TTL metadata
+    # WHEN: Each is measured on the legacy and the fair engine
+    # THEN: Metadata and the fair scheduler's extra indexes both cost bytes
+    plain = WorkloadMix(deadline_share=0, ttl_share=0)
+    tagged = WorkloadMix(deadline_share=1, ttl_share=1)
+
+    legacy = measure_footprint(600, Queue, plain)
+    with_metadata = measure_footprint(600, Queue, tagged)
+    fair = measure_footprint(
+        600, lambda: Queue(fairness=FairnessPolicy()), plain, name="fair"
+    )
+
+    assert legacy.tasks == fair.tasks > 0
+    assert legacy.engine == "Queue" and fair.engine == "fair"
+    assert 0 < legacy.bytes_per_task < with_metadata.bytes_per_task
+    assert legacy.bytes_per_task < fair.bytes_per_task
+    assert legacy.peak_bytes >= legacy.retained_bytes - legacy.baseline_bytes
+
+
+def test_max_backlog_projects_linearly_past_the_baseline() -> None:
+    report = FootprintReport(
+        engine="legacy",
+        submissions=100,
+        tasks=100,
+        baseline_bytes=1_000,
+        retained_bytes=101_000,
+        peak_bytes=120_000,
+    )
+
+    assert report.bytes_per_task == 1_000
+    assert report.max_backlog(1_000_000) == 999
+    assert report.max_backlog(500) == 0
+
+
+def test_mix_rejects_invalid_shares() -> None:
+    with pytest.raises(ValueError):
+        WorkloadMix(deadline_share=1.5)
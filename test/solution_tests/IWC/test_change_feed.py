@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from solutions.IWC.change_feed import EventSubscription, QueueEvent
+from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+def drain(subscription: EventSubscription) -> list[tuple[str, str | None, int | None]]:
+    async def collect() -> list[QueueEvent]:
+        subscription.close()
+        return [event async for event in subscription]
+
+    return [
+        (event.kind, event.provider, event.user_id) for event in asyncio.run(collect())
+    ]
+
+
+def test_feed_reports_each_transition() -> None:
+    # GIVEN: A subscriber on the entrypoint
+    # WHEN: Tasks are enqueued, replaced, promoted, dispatched and purged
+    # THEN: The subscriber sees one event per transition, in order
+    entrypoint = QueueSolutionEntrypoint()
+    subscription = entrypoint.events()
+    entrypoint.enqueue(TaskSubmission("credit_check", 1, iso_ts(delta_minutes=2)))
+    entrypoint.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=1)))
+    entrypoint.enqueue(TaskSubmission("companies_house", 1, iso_ts(delta_minutes=0)))
+    entrypoint.enqueue(TaskSubmission("bank_statements", 2, iso_ts(delta_minutes=5)))
+    entrypoint.dequeue()
+    entrypoint.cancel(1, "credit_check")
+    entrypoint.purge()
+
+    assert drain(subscription) == [
+        ("enqueued", "companies_house", 1),
+        ("enqueued", "credit_check", 1),
+        ("enqueued", "id_verification", 1),
+        ("replaced", "companies_house", 1),
+        ("enqueued", "bank_statements", 2),
+        ("promoted", "credit_check", 1),
+        ("promoted", "id_verification", 1),
+        ("promoted", "companies_house", 1),
+        ("dispatched", "companies_house", 1),
+        ("cancelled", "credit_check", 1),
+        ("purged", None, None),
+    ]
+
+
+def test_slow_subscriber_drops_oldest_events() -> None:
+    queue = Queue()
+    subscription = queue.events(max_buffer=2)
+    for user_id in range(5):
+        queue.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+
+    assert subscription.dropped == 3
+    assert drain(subscription) == [
+        ("enqueued", "id_verification", 3),
+        ("enqueued", "id_verification", 4),
+    ]
+    queue.enqueue(TaskSubmission("id_verification", 9, iso_ts()))
+    assert len(subscription) == 0
+
+
+def test_buffered_events_can_be_drained_without_an_event_loop() -> None:
+    queue = Queue()
+    subscription = queue.events()
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    queue.dequeue()
+
+    assert [event.kind for event in subscription.drain()] == ["enqueued", "dispatched"]
+    assert subscription.drain() == []
+
+
+def test_waiting_subscriber_is_woken_from_another_thread() -> None:
+    # GIVEN: A consumer awaiting the next event on its own loop
+    # WHEN: A worker thread dispatches a task
+    # THEN: The consumer receives the dispatch without polling
+    queue = Queue()
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    subscription = queue.events()
+
+    async def next_event() -> QueueEvent:
+        worker = threading.Timer(0.01, queue.dequeue)
+        worker.start()
+        event = await asyncio.wait_for(anext(subscription), timeout=5)
+        worker.join()
+        return event
+
+    event = asyncio.run(next_event())
+
+    assert (event.kind, event.user_id) == ("dispatched", 1)
+    subscription.close()
+    assert queue._subscriptions == []
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from solutions.IWC.coalescing import DispatchCoalescer
+from solutions.IWC.queue_solution_legacy import (
+    CREDIT_CHECK_PROVIDER,
+    ID_VERIFICATION_PROVIDER,
+    REGISTERED_PROVIDERS,
+)
+from solutions.IWC.task_types import TaskBatch, TaskDispatch, TenantDispatch
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += timedelta(**kwargs)
+
+
+def batching(name: str, size: int, window: float) -> list:
+    return [
+        replace(p, batch_size=size, batch_window_seconds=window)
+        if p.name == name
+        else p
+        for p in REGISTERED_PROVIDERS
+    ]
+
+
+def test_batch_is_released_when_full() -> None:
+    coalescer = DispatchCoalescer(batching("id_verification", 3, 60), FakeClock())
+
+    assert coalescer.add(TaskDispatch("id_verification", 1)) is None
+    assert coalescer.add(TaskDispatch("id_verification", 2)) is None
+    assert coalescer.add(TaskDispatch("id_verification", 3)) == TaskBatch(
+        "id_verification", [1, 2, 3]
+    )
+    assert len(coalescer) == 0
+
+
+def test_batch_is_released_when_window_elapses() -> None:
+    # GIVEN: id_verification batches up to 10 users within 2 seconds
+    # WHEN: Only two users arrive before the window closes
+    # THEN: They are released together once the window has elapsed
+    clock = FakeClock()
+    coalescer = DispatchCoalescer(batching("id_verification", 10, 2), clock)
+    coalescer.add(TaskDispatch("id_verification", 1))
+    clock.advance(seconds=1)
+    coalescer.add(TaskDispatch("id_verification", 2))
+    coalescer.add(TaskDispatch("id_verification", 2))
+
+    assert coalescer.due() == []
+    assert coalescer.next_due == datetime(2025, 1, 1, 12, 0, 2)
+
+    clock.advance(seconds=1)
+    assert coalescer.due() == [TaskBatch("id_verification", [1, 2])]
+
+
+def test_unbatched_providers_pass_straight_through() -> None:
+    coalescer = DispatchCoalescer(batching("id_verification", 10, 2), FakeClock())
+
+    assert coalescer.add(TaskDispatch("companies_house", 1)) == TaskBatch(
+        "companies_house", [1]
+    )
+    coalescer.add(TaskDispatch("id_verification", 1))
+    assert coalescer.flush() == [TaskBatch("id_verification", [1])]
+
+
+def test_registered_bulk_providers_are_batched() -> None:
+    # GIVEN: The default provider registry
+    # WHEN: A full batch of id_verification checks and one credit_check arrive
+    # THEN: id_verification goes out as one call, credit_check once its window
+    #       elapses, and companies_house is not batched
+    clock = FakeClock()
+    coalescer = DispatchCoalescer(clock=clock)
+    batch_size = ID_VERIFICATION_PROVIDER.batch_size
+    users = list(range(batch_size))
+    released = [coalescer.add(TaskDispatch("id_verification", u)) for u in users]
+
+    assert released == [None] * (batch_size - 1) + [TaskBatch("id_verification", users)]
+    assert coalescer.add(TaskDispatch("companies_house", 1)) == TaskBatch(
+        "companies_house", [1]
+    )
+    assert coalescer.add(TaskDispatch("credit_check", 1)) is None
+    clock.advance(seconds=CREDIT_CHECK_PROVIDER.batch_window_seconds)
+    assert coalescer.due() == [TaskBatch("credit_check", [1])]
+
+
+def test_tenants_are_never_batched_together() -> None:
+    # GIVEN: id_verification batches up to 2 users
+    # WHEN: Two tenants each dispatch id_verification for user 1 and then 2
+    # THEN: Each tenant's users are released in a batch of their own
+    coalescer = DispatchCoalescer(batching("id_verification", 2, 60), FakeClock())
+
+    assert coalescer.add(TenantDispatch("id_verification", 1, "lending")) is None
+    assert coalescer.add(TenantDispatch("id_verification", 1, "insurance")) is None
+    assert coalescer.add(TenantDispatch("id_verification", 2, "lending")) == (
+        TaskBatch("id_verification", [1, 2], "lending")
+    )
+    assert coalescer.flush() == [TaskBatch("id_verification", [1], "insurance")]
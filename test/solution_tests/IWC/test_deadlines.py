@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from solutions.IWC.fair_scheduling import FairnessPolicy
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import DEFAULT_SCENARIO_BASE, iso_ts
+
+
+def fixed_clock(delta_minutes: int):
+    now = datetime.fromisoformat(iso_ts(delta_minutes=delta_minutes))
+    return lambda: now
+
+
+def submission(provider: str, user_id: int, delta_minutes: int, **metadata):
+    return TaskSubmission(
+        provider, user_id, iso_ts(delta_minutes=delta_minutes), metadata=metadata
+    )
+
+
+def test_deadline_tasks_dispatch_earliest_deadline_first() -> None:
+    # GIVEN: Best-effort work and two tasks with deadlines
+    # WHEN: Dequeued
+    # THEN: Deadline tasks go first, earliest deadline first, then legacy order
+    queue = Queue(clock=fixed_clock(0))
+    queue.enqueue(submission("companies_house", 1, 0))
+    queue.enqueue(
+        submission("id_verification", 2, 5, deadline=iso_ts(delta_minutes=60))
+    )
+    queue.enqueue(
+        submission("id_verification", 3, 6, deadline=iso_ts(delta_minutes=30))
+    )
+
+    assert [queue.dequeue().user_id for _ in range(3)] == [3, 2, 1]
+
+
+def test_queued_dependency_takes_on_its_dependants_deadline() -> None:
+    # GIVEN: companies_house already queued for user 1 and older work for user 2
+    # WHEN: User 1's credit_check arrives with a deadline
+    # THEN: companies_house gets the deadline too and dispatches before it
+    queue = Queue(clock=fixed_clock(0))
+    queue.enqueue(submission("bank_statements", 2, -10))
+    queue.enqueue(submission("companies_house", 1, 0))
+    queue.enqueue(submission("credit_check", 1, 5, deadline=iso_ts(delta_minutes=30)))
+
+    assert [queue.dequeue().provider for _ in range(3)] == [
+        "companies_house",
+        "credit_check",
+        "bank_statements",
+    ]
+
+
+def test_fair_mode_serves_deadline_tasks_before_any_users_turn() -> None:
+    # GIVEN: Fair mode with two users' best-effort work already queued
+    # WHEN: A third user submits a task with a deadline
+    # THEN: It is dispatched next, without waiting for its user's turn
+    queue = Queue(fairness=FairnessPolicy(), clock=fixed_clock(0))
+    for user_id in (1, 2):
+        queue.enqueue(submission("companies_house", user_id, 0))
+        queue.enqueue(submission("id_verification", user_id, 1))
+    assert queue.dequeue().user_id == 1
+
+    queue.enqueue(submission("bank_statements", 3, 9, deadline=iso_ts(delta_minutes=5)))
+    queue.enqueue(submission("id_verification", 4, 9, deadline=iso_ts(delta_minutes=2)))
+
+    assert [queue.dequeue().user_id for _ in range(5)] == [4, 3, 2, 1, 2]
+    assert queue.peek(1) == []
+
+
+def test_dependency_inherits_deadline_and_goes_first() -> None:
+    queue = Queue(clock=fixed_clock(0))
+    queue.enqueue(submission("id_verification", 1, 0))
+    queue.enqueue(submission("credit_check", 2, 1, deadline=iso_ts(delta_minutes=10)))
+
+    assert [queue.dequeue().provider for _ in range(3)] == [
+        "companies_house",
+        "credit_check",
+        "id_verification",
+    ]
+
+
+def test_deadline_misses_and_slack_are_recorded() -> None:
+    queue = Queue(clock=fixed_clock(20))
+    queue.enqueue(
+        submission("id_verification", 1, 0, deadline=iso_ts(delta_minutes=10))
+    )
+    queue.enqueue(
+        submission(
+            "bank_statements", 2, 0, deadline=DEFAULT_SCENARIO_BASE.replace(hour=13)
+        )
+    )
+    queue.enqueue(submission("companies_house", 3, 0))
+
+    while queue.dequeue() is not None:
+        pass
+
+    stats = queue.deadline_stats
+    assert stats.dispatched == 2
+    assert stats.misses == 1
+    assert stats.min_slack_seconds == -600
+    assert stats.mean_slack_seconds == (-600 + 2400) / 2
+    assert stats.miss_ratio == 0.5
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+from solutions.IWC.fair_scheduling import FairnessPolicy
+from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+def drain(queue: Queue) -> list[tuple[str, int]]:
+    dispatched = []
+    while (dispatch := queue.dequeue()) is not None:
+        dispatched.append((dispatch.provider, dispatch.user_id))
+    return dispatched
+
+
+def test_rule_of_3_user_no_longer_starves_others() -> None:
+    # GIVEN: User 1 reaches the rule-of-3 threshold while user 2 waits
+    # WHEN: The queue runs in fair mode with one dispatch per turn
+    # THEN: Users alternate, each keeping their own legacy ordering
+    queue = Queue(fairness=FairnessPolicy(max_consecutive=1))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("bank_statements", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("companies_house", 2, iso_ts(delta_minutes=1)))
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts(delta_minutes=2)))
+
+    assert drain(queue) == [
+        ("companies_house", 1),
+        ("companies_house", 2),
+        ("id_verification", 1),
+        ("id_verification", 2),
+        ("bank_statements", 1),
+    ]
+
+
+def test_max_consecutive_caps_heavier_user() -> None:
+    # GIVEN: User 1 carries a much larger weight than user 2
+    # WHEN: Both users have work pending
+    # THEN: User 1 never takes more than max_consecutive dispatches in a row
+    queue = Queue(fairness=FairnessPolicy(weights={1: 10.0}, max_consecutive=2))
+    for provider in ("companies_house", "id_verification", "bank_statements"):
+        queue.enqueue(TaskSubmission(provider, 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("companies_house", 2, iso_ts(delta_minutes=0)))
+
+    assert [user_id for _, user_id in drain(queue)] == [1, 1, 2, 1]
+
+
+def test_weights_share_dispatches_proportionally() -> None:
+    # GIVEN: Three users with weights 2:1:1 and plenty of work
+    # WHEN: Four dispatches are made
+    # THEN: The double-weight user receives two of them
+    queue = Queue(fairness=FairnessPolicy(weights={1: 2.0}, max_consecutive=4))
+    for user_id in (1, 2, 3):
+        for provider in ("companies_house", "id_verification"):
+            queue.enqueue(TaskSubmission(provider, user_id, iso_ts(delta_minutes=0)))
+
+    served = [queue.dequeue().user_id for _ in range(4)]
+
+    assert sorted(served) == [1, 1, 2, 3]
+
+
+def test_fair_mode_through_entrypoint_keeps_size_and_age() -> None:
+    entrypoint = QueueSolutionEntrypoint(Queue(fairness=FairnessPolicy()))
+    entrypoint.enqueue(TaskSubmission("credit_check", 1, iso_ts(delta_minutes=0)))
+    entrypoint.enqueue(TaskSubmission("id_verification", 2, iso_ts(delta_minutes=5)))
+
+    assert entrypoint.size() == 3
+    assert entrypoint.age() == 300
+    assert entrypoint.dequeue().provider == "companies_house"
+    assert entrypoint.purge() is True
+    assert entrypoint.dequeue() is None
+
+
+def test_invalid_policy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        FairnessPolicy(max_consecutive=0)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from solutions.IWC.admission import AdmissionPolicy
+from solutions.IWC.ingest import ingest_file, ingest_lines
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+def row(provider: str, user_id: int, delta_minutes: int) -> str:
+    return json.dumps(
+        {
+            "provider": provider,
+            "user_id": user_id,
+            "timestamp": iso_ts(delta_minutes=delta_minutes),
+        }
+    )
+
+
+def drain(queue: Queue) -> list[tuple[str, int]]:
+    dispatched = []
+    while (dispatch := queue.dequeue()) is not None:
+        dispatched.append((dispatch.provider, dispatch.user_id))
+    return dispatched
+
+
+def test_chunked_ingest_matches_enqueueing_one_by_one() -> None:
+    # GIVEN: Rows spanning several chunks, including dependants and rule of 3
+    # WHEN: They are streamed in chunks of 2
+    # THEN: The queue dispatches exactly as if each row had been enqueued
+    rows = [
+        ("bank_statements", 1, 0),
+        ("credit_check", 2, 1),
+        ("id_verification", 1, 2),
+        ("companies_house", 1, 3),
+        ("id_verification", 3, 1),
+    ]
+    expected = Queue()
+    for provider, user_id, delta in rows:
+        expected.enqueue(TaskSubmission(provider, user_id, iso_ts(delta_minutes=delta)))
+
+    queue = Queue()
+    report = ingest_lines(queue, (row(*r) for r in rows), chunk_size=2)
+
+    assert (report.rows, report.enqueued, report.malformed) == (5, 5, 0)
+    assert drain(queue) == drain(expected)
+
+
+def test_malformed_lines_are_counted_and_skipped() -> None:
+    lines = [
+        row("companies_house", 1, 0),
+        "{not json",
+        "",
+        json.dumps({"provider": "companies_house", "user_id": "2"}),
+        json.dumps({"provider": "companies_house", "user_id": 3, "timestamp": "soon"}),
+        "[1, 2]",
+        row("id_verification", 4, 1),
+    ]
+    queue = Queue()
+
+    report = ingest_lines(queue, lines)
+
+    assert (report.rows, report.enqueued, report.malformed) == (6, 2, 4)
+    assert report.malformed_lines == [2, 4, 5, 6]
+    assert queue.size == 2
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [
+        {"deadline": "tomorrow"},
+        {"deadline": 1760000000},
+        {"ttl_seconds": "5"},
+        {"ttl_seconds": True},
+    ],
+)
+def test_bad_deadline_or_ttl_is_malformed_not_fatal(metadata: dict) -> None:
+    # GIVEN: A row whose deadline or ttl_seconds the queue could not use
+    # WHEN: It is ingested between two good rows
+    # THEN: It is counted as malformed and the rest of the chunk is queued
+    bad = json.loads(row("bank_statements", 2, 0))
+    bad["metadata"] = metadata
+    lines = [
+        row("companies_house", 1, 0),
+        json.dumps(bad),
+        row("id_verification", 3, 0),
+    ]
+    queue = Queue()
+
+    report = ingest_lines(queue, lines)
+
+    assert (report.enqueued, report.malformed, report.malformed_lines) == (2, 1, [2])
+    assert queue.size == 2
+
+
+def test_ingest_file_reports_rejections(tmp_path) -> None:
+    path = tmp_path / "backfill.jsonl"
+    path.write_text("\n".join(row("id_verification", u, u) for u in range(5)) + "\n")
+    queue = Queue(admission=AdmissionPolicy(max_size=3))
+
+    report = ingest_file(queue, path, chunk_size=4)
+
+    assert (report.enqueued, report.rejected) == (3, 2)
+    assert report.rows_per_second > 0
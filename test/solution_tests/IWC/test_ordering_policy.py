@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from solutions.IWC.ordering_policy import (
+    BoostedWinsTies,
+    ByGroup,
+    ByPriority,
+    ByTimestamp,
+    Deprioritise,
+    OrderingPolicy,
+)
+from solutions.IWC.queue_solution_legacy import MAX_TIMESTAMP, Queue
+from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+PROVIDERS = ["bank_statements", "companies_house", "credit_check", "id_verification"]
+
+
+class ReferenceQueue:
+    """The original queue: every dequeue re-sorts all tasks by the full key."""
+
+    def __init__(self) -> None:
+        self._tasks: list[dict] = []
+
+    def enqueue(self, provider: str, user_id: int, timestamp: datetime) -> None:
+        providers = ["companies_house"] if provider == "credit_check" else []
+        for name in [*providers, provider]:
+            existing = next(
+                (
+                    t
+                    for t in self._tasks
+                    if (t["provider"], t["user_id"]) == (name, user_id)
+                ),
+                None,
+            )
+            if existing is not None:
+                if timestamp >= existing["timestamp"]:
+                    continue
+                self._tasks.remove(existing)
+            self._tasks.append(
+                {
+                    "provider": name,
+                    "user_id": user_id,
+                    "timestamp": timestamp,
+                    "priority": 2,
+                    "group": MAX_TIMESTAMP,
+                }
+            )
+
+    def dequeue(self) -> TaskDispatch | None:
+        if not self._tasks:
+            return None
+        newest = max(t["timestamp"] for t in self._tasks)
+        for task in self._tasks:
+            user_tasks = [t for t in self._tasks if t["user_id"] == task["user_id"]]
+            if task["priority"] == 2 and len(user_tasks) >= 3:
+                task["priority"] = 1
+                task["group"] = min(t["timestamp"] for t in user_tasks)
+
+        def key(task: dict) -> tuple:
+            boosted = newest - task["timestamp"] >= timedelta(minutes=5)
+            deprioritised = task["provider"] == "bank_statements"
+            return (
+                task["priority"],
+                task["group"],
+                int(deprioritised and not boosted),
+                task["timestamp"],
+                0 if deprioritised and boosted else 1,
+            )
+
+        self._tasks.sort(key=key)
+        task = self._tasks.pop(0)
+        return TaskDispatch(task["provider"], task["user_id"])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_legacy_policy_matches_full_resort(seed: int) -> None:
+    # GIVEN: A random mix of enqueues and dequeues across users and providers
+    # WHEN: It is replayed on the queue and on the original re-sorting queue
+    # THEN: Every dequeue returns the same task
+    rng = random.Random(seed)
+    queue = Queue()
+    reference = ReferenceQueue()
+    for _ in range(120):
+        if rng.random() < 0.6:
+            provider = rng.choice(PROVIDERS)
+            user_id = rng.randrange(6)
+            timestamp = datetime.fromisoformat(iso_ts(delta_minutes=rng.randrange(20)))
+            queue.enqueue(TaskSubmission(provider, user_id, timestamp))
+            reference.enqueue(provider, user_id, timestamp.replace(tzinfo=None))
+        else:
+            assert queue.dequeue() == reference.dequeue()
+    while (dispatch := reference.dequeue()) is not None:
+        assert queue.dequeue() == dispatch
+    assert queue.dequeue() is None
+
+
+def test_custom_policy_without_deprioritisation() -> None:
+    queue = Queue(ordering=OrderingPolicy([ByPriority(), ByGroup(), ByTimestamp()]))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=1)))
+    queue.enqueue(TaskSubmission("bank_statements", 2, iso_ts(delta_minutes=0)))
+
+    assert queue.dequeue() == TaskDispatch("bank_statements", 2)
+
+
+@pytest.mark.parametrize(
+    "clauses",
+    [
+        [],
+        [ByTimestamp(), ByPriority()],
+        [ByPriority(), ByTimestamp(), ByTimestamp()],
+        [ByPriority(), Deprioritise(), Deprioritise()],
+        [ByPriority(), BoostedWinsTies(), Deprioritise(), ByTimestamp()],
+    ],
+)
+def test_invalid_policies_are_rejected(clauses: list) -> None:
+    with pytest.raises(ValueError):
+        OrderingPolicy(clauses).compile()
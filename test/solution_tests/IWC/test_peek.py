@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
+from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+
+def test_peek_matches_dequeue_order_without_consuming() -> None:
+    # GIVEN: A queue where the next dequeue applies the rule of 3
+    # WHEN: The next dispatches are peeked
+    # THEN: They match what dequeue returns and nothing is removed
+    queue = QueueSolutionEntrypoint()
+    queue.enqueue(TaskSubmission("bank_statements", 2, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts(delta_minutes=10)))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=20)))
+    queue.enqueue(TaskSubmission("bank_statements", 1, iso_ts(delta_minutes=30)))
+
+    peeked = queue.peek(3)
+
+    assert peeked == [
+        TaskDispatch("companies_house", 1),
+        TaskDispatch("id_verification", 1),
+        TaskDispatch("bank_statements", 1),
+    ]
+    assert queue.size() == 4
+    assert queue.peek(3) == peeked
+    assert [queue.dequeue() for _ in range(3)] == peeked
+
+
+def test_peek_does_not_apply_rule_of_3_early() -> None:
+    # GIVEN: User 1 qualifies for the rule of 3 and is peeked at
+    # WHEN: An earlier-timestamped duplicate for user 1 arrives before dequeue
+    # THEN: All of user 1's tasks are grouped under the earliest timestamp at
+    #       dequeue time, ahead of user 2's already promoted group
+    queue = QueueSolutionEntrypoint()
+    for provider in ("companies_house", "id_verification", "bank_statements"):
+        queue.enqueue(TaskSubmission(provider, 2, iso_ts(delta_minutes=5)))
+    assert queue.dequeue() == TaskDispatch("companies_house", 2)
+    for provider in ("companies_house", "id_verification", "bank_statements"):
+        queue.enqueue(TaskSubmission(provider, 1, iso_ts(delta_minutes=10)))
+
+    queue.peek(4)
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts(delta_minutes=0)))
+
+    assert [queue.dequeue() for _ in range(2)] == [
+        TaskDispatch("companies_house", 1),
+        TaskDispatch("id_verification", 1),
+    ]
+
+
+def test_peek_past_the_end_returns_what_is_queued() -> None:
+    queue = QueueSolutionEntrypoint()
+    assert queue.peek(5) == []
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts()))
+    assert [dispatch.provider for dispatch in queue.peek(5)] == [
+        "companies_house",
+        "credit_check",
+    ]
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from solutions.IWC.admission import INVALID_PRIORITY
+from solutions.IWC.ingest import ingest_lines
+from solutions.IWC.ordering_index import PRIORITY_LEVELS
+from solutions.IWC.queue_solution_legacy import Priority, Queue
+from solutions.IWC.task_types import EnqueueRejection, TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+PREMIUM = 0
+RECHECK = 5
+
+
+def submit(queue: Queue, provider: str, user_id: int, delta: int, **metadata) -> None:
+    queue.enqueue(
+        TaskSubmission(provider, user_id, iso_ts(delta_minutes=delta), metadata)
+    )
+
+
+def drain(queue: Queue) -> list[tuple[str, int]]:
+    dispatched = []
+    while (dispatch := queue.dequeue()) is not None:
+        dispatched.append((dispatch.provider, dispatch.user_id))
+    return dispatched
+
+
+def test_numeric_priorities_are_served_lowest_first() -> None:
+    # GIVEN: A premium task, a normal task and an internal re-check
+    # WHEN: They are enqueued newest first
+    # THEN: They are dispatched by level, then by timestamp within a level
+    queue = Queue()
+    submit(queue, "id_verification", 1, 3, priority=RECHECK)
+    submit(queue, "id_verification", 2, 2)
+    submit(queue, "id_verification", 3, 1, priority=PREMIUM)
+    submit(queue, "id_verification", 4, 0, priority=RECHECK)
+
+    assert drain(queue) == [
+        ("id_verification", 3),
+        ("id_verification", 2),
+        ("id_verification", 4),
+        ("id_verification", 1),
+    ]
+
+
+def test_rule_of_3_still_promotes_normal_tasks_only() -> None:
+    # GIVEN: User 1 reaches three tasks, one of them a re-check
+    # WHEN: The queue is drained
+    # THEN: The normal tasks are promoted to HIGH, the re-check keeps its level
+    #   and premium work still comes first
+    queue = Queue()
+    submit(queue, "bank_statements", 2, 0)
+    submit(queue, "companies_house", 1, 1)
+    submit(queue, "id_verification", 1, 2)
+    submit(queue, "bank_statements", 1, 3, priority=RECHECK)
+    submit(queue, "id_verification", 3, 4, priority=PREMIUM)
+
+    assert drain(queue) == [
+        ("id_verification", 3),
+        ("companies_house", 1),
+        ("id_verification", 1),
+        ("bank_statements", 2),
+        ("bank_statements", 1),
+    ]
+
+
+def test_dependencies_inherit_the_dependant_priority() -> None:
+    queue = Queue()
+    submit(queue, "id_verification", 1, 0)
+    submit(queue, "credit_check", 2, 5, priority=PREMIUM)
+
+    assert queue.peek(2) == [
+        TaskDispatch("companies_house", 2),
+        TaskDispatch("credit_check", 2),
+    ]
+
+
+def test_queued_dependency_is_raised_to_its_dependants_priority() -> None:
+    # GIVEN: companies_house already queued at NORMAL for user 1
+    # WHEN: User 1's credit_check arrives as premium
+    # THEN: companies_house is raised with it and still dispatches first
+    queue = Queue()
+    submit(queue, "id_verification", 2, 0)
+    submit(queue, "companies_house", 1, 1)
+    submit(queue, "credit_check", 1, 2, priority=PREMIUM)
+
+    assert drain(queue) == [
+        ("companies_house", 1),
+        ("credit_check", 1),
+        ("id_verification", 2),
+    ]
+
+
+@pytest.mark.parametrize("priority", [-1, PRIORITY_LEVELS, "high", True, 1.5])
+def test_invalid_priorities_are_rejected(priority: object) -> None:
+    queue = Queue()
+
+    rejection = queue.enqueue(
+        TaskSubmission("credit_check", 1, iso_ts(), {"priority": priority})
+    )
+
+    assert rejection == EnqueueRejection(INVALID_PRIORITY, "credit_check", 1, 0)
+    assert queue.size == 0
+    assert queue.admission_stats.rejected_invalid_priority == 1
+
+
+def test_ingest_counts_invalid_priorities_as_malformed() -> None:
+    lines = [
+        json.dumps(
+            {
+                "provider": "id_verification",
+                "user_id": 1,
+                "timestamp": iso_ts(),
+                "metadata": {"priority": priority},
+            }
+        )
+        for priority in (Priority.HIGH, PRIORITY_LEVELS)
+    ]
+
+    report = ingest_lines(Queue(), lines)
+
+    assert (report.enqueued, report.malformed) == (1, 1)
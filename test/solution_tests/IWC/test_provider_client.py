@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from solutions.IWC.coalescing import DispatchCoalescer
+from solutions.IWC.provider_client import ConnectionPool, ProviderClients
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Queue
+from solutions.IWC.queue_worker import QueueWorker
+from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+
+def test_pool_reuses_one_connection_for_sequential_requests(
+    stub_server, base_url
+) -> None:
+    pool = ConnectionPool(base_url + "/v1", size=2, timeout=5)
+    responses = [pool.request("GET", f"/users/{user}") for user in range(5)]
+    pool.close()
+
+    assert [response.status for response in responses] == [200] * 5
+    assert stub_server.paths == [f"/v1/users/{user}" for user in range(5)]
+    assert stub_server.connections == 1
+    assert (pool.stats.connections_opened, pool.stats.reused) == (1, 4)
+
+
+def test_pool_reconnects_when_idle_connection_was_dropped(base_url) -> None:
+    pool = ConnectionPool(base_url, size=1, timeout=5)
+    pool.request("GET", "/users/1/drop")
+
+    assert pool.request("GET", "/users/2").status == 200
+    assert pool.stats.stale_retries == 1
+    assert pool.stats.connections_opened == 2
+    pool.close()
+
+
+def test_worker_drains_queue_through_pooled_clients(stub_server, base_url) -> None:
+    # GIVEN: Two providers sharing one stub endpoint
+    # WHEN: The worker drains three dispatches
+    # THEN: Every dispatch is fetched over a single kept-alive connection
+    providers = [replace(p, base_url=base_url) for p in REGISTERED_PROVIDERS]
+    queue = Queue(providers=providers)
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts()))
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts(delta_minutes=1)))
+    clients = ProviderClients(providers)
+
+    outcomes = QueueWorker(queue, clients).drain()
+    clients.close()
+
+    assert [outcome.dispatch for outcome in outcomes] == [
+        TaskDispatch("companies_house", 1),
+        TaskDispatch("credit_check", 1),
+        TaskDispatch("id_verification", 2),
+    ]
+    assert all(outcome.status == 200 for outcome in outcomes)
+    assert stub_server.connections == 1
+
+
+def test_worker_coalesces_batched_provider_into_one_call(stub_server, base_url) -> None:
+    # GIVEN: id_verification accepts up to 2 users per call
+    # WHEN: Three users' checks are drained
+    # THEN: They are fetched with one bulk call and one single call
+    providers = [
+        replace(p, base_url=base_url, batch_size=2, batch_window_seconds=5)
+        for p in REGISTERED_PROVIDERS
+    ]
+    queue = Queue(providers=providers)
+    for user_id in (1, 2, 3):
+        queue.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+    clients = ProviderClients(providers)
+    worker = QueueWorker(queue, clients, coalescer=DispatchCoalescer(providers))
+
+    outcomes = worker.drain()
+    clients.close()
+
+    assert stub_server.paths == ["/users?ids=1,2", "/users/3"]
+    assert [outcome.dispatch.user_id for outcome in outcomes] == [1, 2, 3]
+    assert all(outcome.status == 200 for outcome in outcomes)
+
+
+def test_worker_reports_successful_fetches_as_complete(base_url) -> None:
+    # GIVEN: companies_house results stay fresh for a minute
+    # WHEN: The worker fetches a user's companies_house task successfully
+    # THEN: Resubmitting it is answered by the fresh result
+    providers = [
+        replace(p, base_url=base_url, freshness_seconds=60)
+        for p in REGISTERED_PROVIDERS
+    ]
+    queue = Queue(providers=providers)
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+    clients = ProviderClients(providers)
+
+    QueueWorker(queue, clients).drain()
+    clients.close()
+
+    assert queue.enqueue(TaskSubmission("companies_house", 1, iso_ts())) == 0
+    assert queue.result_cache_stats.hits == 1
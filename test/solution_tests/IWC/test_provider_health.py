@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from solutions.IWC.provider_health import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    ConcurrencyPolicy,
+    ProviderConcurrencyController,
+)
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+from solutions.IWC.tenancy import TenantQueues
+
+from .utils import iso_ts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += timedelta(**kwargs)
+
+
+def test_paused_provider_holds_its_dependants() -> None:
+    # GIVEN: companies_house is paused
+    # WHEN: credit_check (which depends on it) and id_verification are queued
+    # THEN: Only id_verification dispatches until companies_house resumes
+    queue = Queue()
+    queue.pause_provider("companies_house")
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts()))
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts(delta_minutes=1)))
+
+    assert queue.peek(3) == [TaskDispatch("id_verification", 2)]
+    assert queue.dequeue() == TaskDispatch("id_verification", 2)
+    assert queue.dequeue() is None
+    assert queue.size == 2
+
+    assert queue.resume_provider("companies_house") == 2
+    assert queue.dequeue() == TaskDispatch("companies_house", 1)
+    assert queue.dequeue() == TaskDispatch("credit_check", 1)
+
+
+def test_resuming_one_provider_leaves_other_paused_providers_held() -> None:
+    # GIVEN: companies_house and bank_statements are both paused
+    # WHEN: companies_house resumes
+    # THEN: Its tasks and their dependants are released; bank_statements stays held
+    queue = Queue()
+    queue.pause_provider("companies_house")
+    queue.pause_provider("bank_statements")
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts()))
+    queue.enqueue(TaskSubmission("bank_statements", 2, iso_ts()))
+
+    assert queue.resume_provider("companies_house") == 2
+    assert queue.peek(3) == [
+        TaskDispatch("companies_house", 1),
+        TaskDispatch("credit_check", 1),
+    ]
+    assert queue.resume_provider("bank_statements") == 1
+    assert queue.size == 3
+
+
+def test_concurrency_limit_grows_and_shrinks() -> None:
+    # GIVEN: id_verification starts with a limit of 2 concurrent calls
+    # WHEN: Two calls are in flight
+    # THEN: Its tasks are held until a call completes; fast calls raise the
+    #       limit and slow calls halve it
+    queue = Queue()
+    controller = ProviderConcurrencyController(
+        queue, ConcurrencyPolicy(initial_limit=2, slow_call_seconds=1)
+    )
+    for user_id in (1, 2, 3):
+        queue.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+
+    for _ in range(2):
+        controller.on_dispatch(queue.dequeue().provider)
+    assert queue.dequeue() is None
+
+    controller.on_complete("id_verification", 0.1, success=True)
+    assert controller.health("id_verification").limit == 2.5
+    assert queue.dequeue() == TaskDispatch("id_verification", 3)
+
+    controller.on_complete("id_verification", 5.0, success=True)
+    assert controller.health("id_verification").limit == 1.25
+
+
+def test_circuit_opens_then_probes_and_closes() -> None:
+    clock = FakeClock()
+    queue = Queue()
+    controller = ProviderConcurrencyController(
+        queue, ConcurrencyPolicy(failure_threshold=2, cooldown_seconds=30), clock
+    )
+    for user_id in (1, 2, 3):
+        queue.enqueue(TaskSubmission("bank_statements", user_id, iso_ts()))
+    queue.enqueue(TaskSubmission("companies_house", 4, iso_ts(delta_minutes=1)))
+
+    for _ in range(2):
+        controller.on_dispatch("bank_statements")
+        controller.on_complete("bank_statements", 0.1, success=False)
+    health = controller.health("bank_statements")
+    assert (health.state, health.trips) == (OPEN, 1)
+    assert queue.dequeue() == TaskDispatch("companies_house", 4)
+    assert queue.dequeue() is None
+
+    clock.advance(seconds=30)
+    controller.poll()
+    assert health.state == HALF_OPEN
+    controller.on_dispatch(queue.dequeue().provider)
+    assert queue.dequeue() is None
+
+    controller.on_complete("bank_statements", 0.1, success=True)
+    assert health.state == CLOSED
+    assert queue.dequeue() == TaskDispatch("bank_statements", 2)
+
+
+def test_open_circuit_pauses_the_provider_for_every_tenant() -> None:
+    # GIVEN: Two tenants sharing bank_statements, and a controller over both
+    # WHEN: bank_statements fails until its circuit opens
+    # THEN: Neither tenant dispatches it, nor does a tenant added afterwards,
+    #       until the probe succeeds
+    clock = FakeClock()
+    tenants = TenantQueues()
+    for name in ("lending", "insurance"):
+        tenants.add_tenant(name).enqueue(TaskSubmission("bank_statements", 1, iso_ts()))
+    controller = ProviderConcurrencyController(
+        tenants, ConcurrencyPolicy(failure_threshold=1, cooldown_seconds=30), clock
+    )
+
+    controller.on_dispatch("bank_statements")
+    controller.on_complete("bank_statements", 0.1, success=False)
+    tenants.add_tenant("savings").enqueue(
+        TaskSubmission("bank_statements", 1, iso_ts())
+    )
+    assert tenants.paused_providers == {"bank_statements"}
+    assert tenants.dequeue() is None
+
+    clock.advance(seconds=30)
+    controller.poll()
+    controller.on_dispatch(tenants.dequeue().provider)
+    controller.on_complete("bank_statements", 0.1, success=True)
+    assert tenants.paused_providers == frozenset()
+    assert tenants.size() == 2
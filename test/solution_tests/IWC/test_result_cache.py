@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Queue
+from solutions.IWC.result_cache import RecentResultCache
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += timedelta(**kwargs)
+
+
+def fresh_for(seconds: float, *names: str) -> list:
+    return [
+        replace(p, freshness_seconds=seconds) if p.name in names else p
+        for p in REGISTERED_PROVIDERS
+    ]
+
+
+def test_recently_completed_task_is_skipped_until_stale() -> None:
+    # GIVEN: companies_house results stay fresh for 60 seconds
+    # WHEN: The same user's task is resubmitted inside and then outside the window
+    # THEN: Only the resubmission after the window is queued
+    clock = FakeClock()
+    queue = Queue(clock=clock, providers=fresh_for(60, "companies_house"))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+    assert queue.dequeue().user_id == 1
+    queue.complete(1, "companies_house")
+
+    clock.advance(seconds=30)
+    assert queue.enqueue(TaskSubmission("companies_house", 1, iso_ts())) == 0
+    assert queue.enqueue(TaskSubmission("companies_house", 2, iso_ts())) == 1
+
+    clock.advance(seconds=31)
+    assert queue.enqueue(TaskSubmission("companies_house", 1, iso_ts())) == 2
+
+    stats = queue.result_cache_stats
+    assert (stats.hits, stats.misses, stats.expirations) == (1, 3, 1)
+    assert stats.hit_ratio == 0.25
+
+
+def test_fresh_dependency_is_not_fetched_again() -> None:
+    # GIVEN: A fresh companies_house result for user 1
+    # WHEN: credit_check, which depends on companies_house, is submitted
+    # THEN: Only credit_check is queued
+    clock = FakeClock()
+    queue = Queue(clock=clock, providers=fresh_for(300, "companies_house"))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+    queue.dequeue()
+    queue.complete(1, "companies_house")
+
+    assert queue.enqueue(TaskSubmission("credit_check", 1, iso_ts())) == 1
+    assert queue.dequeue().provider == "credit_check"
+
+
+def test_dispatched_but_unfinished_fetch_is_not_a_fresh_result() -> None:
+    # GIVEN: A companies_house fetch that has been dispatched but not completed
+    # WHEN: The same user's task is resubmitted
+    # THEN: It is queued, since no result exists yet to reuse
+    queue = Queue(clock=FakeClock(), providers=fresh_for(60, "companies_house"))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+    queue.dequeue()
+
+    assert queue.enqueue(TaskSubmission("companies_house", 1, iso_ts())) == 1
+    assert queue.result_cache_stats.hits == 0
+
+
+def test_providers_without_freshness_are_never_cached() -> None:
+    queue = Queue(clock=FakeClock())
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    queue.dequeue()
+    queue.complete(1, "id_verification")
+
+    assert queue.enqueue(TaskSubmission("id_verification", 1, iso_ts())) == 1
+    assert queue.result_cache_stats.hits == 0
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    now = datetime(2025, 1, 1)
+    window = timedelta(minutes=5)
+    cache = RecentResultCache(max_entries=2)
+    cache.record(1, "companies_house", now)
+    cache.record(2, "companies_house", now)
+    assert cache.is_fresh(1, "companies_house", window, now)
+
+    cache.record(3, "companies_house", now)
+
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    assert not cache.is_fresh(2, "companies_house", window, now)
+    assert cache.is_fresh(1, "companies_house", window, now)
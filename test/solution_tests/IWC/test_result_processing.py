@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import replace
+
+import pytest
+from solutions.IWC.provider_client import ProviderClients
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Queue
+from solutions.IWC.queue_worker import QueueWorker
+from solutions.IWC.result_processing import ResultProcessor
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+def slow_length(body: memoryview) -> int:
+    time.sleep(0.2)
+    return len(body)
+
+
+@pytest.fixture
+def processor() -> Iterator[ResultProcessor]:
+    processor = ResultProcessor(
+        {"bank_statements": zlib.crc32, "credit_check": slow_length},
+        max_workers=1,
+        max_pending=1,
+        shared_memory_threshold=1024,
+    )
+    yield processor
+    processor.close()
+
+
+def test_large_payloads_go_through_shared_memory(processor) -> None:
+    # GIVEN: One body below and one above the shared-memory threshold
+    # WHEN: Both are processed by the bank_statements handler
+    # THEN: Both results are correct and only the large one used a segment
+    small = b"statement" * 10
+    large = bytes(range(256)) * 4096
+
+    results = [processor.submit("bank_statements", body) for body in (small, large)]
+
+    assert [future.result(timeout=10) for future in results] == [
+        zlib.crc32(small),
+        zlib.crc32(large),
+    ]
+    assert processor.stats.shared_memory_payloads == 1
+    assert processor.stats.completed == 2
+
+
+def test_submit_blocks_while_the_pool_is_saturated(processor) -> None:
+    first = processor.submit("credit_check", b"slow")
+    started = time.perf_counter()
+    second = processor.submit("credit_check", b"slower")
+
+    assert first.done()
+    assert time.perf_counter() - started > 0.05
+    assert second.result(timeout=10) == 6
+    assert processor.stats.backpressure_waits == 1
+
+
+def test_handler_errors_surface_on_the_future(processor) -> None:
+    future = processor.submit("bank_statements", "not bytes")  # type: ignore[arg-type]
+
+    with pytest.raises(TypeError):
+        future.result(timeout=10)
+    processor.close()
+    assert processor.stats.failed == 1
+
+
+def test_worker_hands_bodies_to_the_processor(base_url, processor) -> None:
+    providers = [replace(p, base_url=base_url) for p in REGISTERED_PROVIDERS]
+    queue = Queue(providers=providers)
+    queue.enqueue(TaskSubmission("bank_statements", 1, iso_ts()))
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts()))
+    clients = ProviderClients(providers)
+
+    outcomes = QueueWorker(queue, clients, processor=processor).drain()
+    clients.close()
+
+    by_provider = {outcome.dispatch.provider: outcome for outcome in outcomes}
+    assert by_provider["bank_statements"].result.result(timeout=10) == zlib.crc32(b"ok")
+    assert by_provider["id_verification"].result is None
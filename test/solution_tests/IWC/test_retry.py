@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from solutions.IWC.admission import AdmissionPolicy
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Queue
+from solutions.IWC.retry import RetryPolicy
+from solutions.IWC.task_types import TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += timedelta(**kwargs)
+
+
+def test_retry_returns_to_original_place_after_backoff() -> None:
+    # GIVEN: User 1's task was dispatched ahead of user 2's newer task
+    # WHEN: It is retried with a 10 second backoff
+    # THEN: It is held for 10 seconds and then dispatched before user 2 again
+    clock = FakeClock()
+    queue = Queue(clock=clock)
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts(delta_minutes=1)))
+    failed = queue.dequeue()
+
+    assert queue.retry(failed, delay=10)
+    assert queue.size == 1
+    assert queue.pending_retries == 1
+    assert queue.peek(2) == [TaskDispatch("id_verification", 2)]
+
+    clock.advance(seconds=10)
+    assert queue.size == 2
+    assert queue.dequeue() == failed
+    assert queue.retry_stats.released == 1
+
+
+def test_retry_keeps_rule_of_3_priority_group() -> None:
+    clock = FakeClock()
+    queue = Queue(clock=clock)
+    queue.enqueue(TaskSubmission("bank_statements", 2, iso_ts(delta_minutes=0)))
+    for provider in ("companies_house", "id_verification", "bank_statements"):
+        queue.enqueue(TaskSubmission(provider, 1, iso_ts(delta_minutes=5)))
+    failed = queue.dequeue()
+    assert failed == TaskDispatch("companies_house", 1)
+    queue.dequeue()
+
+    # User 1 is back to two tasks, but the retry was promoted when dispatched.
+    queue.retry(failed, delay=0)
+
+    assert [dispatch.user_id for dispatch in queue.peek(3)] == [1, 1, 2]
+
+
+def test_retry_released_into_a_full_queue_is_rejected() -> None:
+    # GIVEN: A queue limited to two tasks, one of them waiting to be retried
+    # WHEN: Two new tasks fill the queue before the retry is released
+    # THEN: The retry is rejected by admission control rather than overfilling
+    clock = FakeClock()
+    queue = Queue(clock=clock, admission=AdmissionPolicy(max_size=2))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    assert queue.retry(queue.dequeue(), delay=10)
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts()))
+    queue.enqueue(TaskSubmission("id_verification", 3, iso_ts()))
+
+    clock.advance(seconds=10)
+
+    assert queue.size == 2
+    assert queue.pending_retries == 0
+    assert queue.retry_stats.released == 1
+    assert queue.admission_stats.rejected_queue_full == 1
+    assert [dispatch.user_id for dispatch in queue.peek(2)] == [2, 3]
+
+
+def test_retries_back_off_exponentially_and_are_capped() -> None:
+    clock = FakeClock()
+    queue = Queue(clock=clock, retry=RetryPolicy(max_attempts=2, base_delay_seconds=1))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+
+    for backoff in (1, 2):
+        assert queue.retry(queue.dequeue())
+        clock.advance(seconds=backoff - 0.5)
+        assert queue.dequeue() is None
+        clock.advance(seconds=0.5)
+
+    assert not queue.retry(queue.dequeue())
+    stats = queue.retry_stats
+    assert (stats.scheduled, stats.released, stats.exhausted) == (2, 2, 1)
+
+
+def test_retries_exhausted_then_resubmit_is_accepted() -> None:
+    # GIVEN: companies_house results stay fresh for a minute, and a fetch
+    #        reported complete that the caller then finds was bad
+    # WHEN: Its retry is refused because the attempts are used up
+    # THEN: The failed fetch is not a fresh result, so a resubmission is queued
+    clock = FakeClock()
+    providers = [
+        replace(p, freshness_seconds=60) if p.name == "companies_house" else p
+        for p in REGISTERED_PROVIDERS
+    ]
+    queue = Queue(clock=clock, providers=providers, retry=RetryPolicy(max_attempts=0))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+    dispatch = queue.dequeue()
+    queue.complete(1, "companies_house")
+
+    assert not queue.retry(dispatch)
+    assert queue.retry_stats.exhausted == 1
+    assert queue.enqueue(TaskSubmission("companies_house", 1, iso_ts())) == 1
+
+
+def test_unknown_and_cancelled_retries() -> None:
+    clock = FakeClock()
+    queue = Queue(clock=clock)
+    assert not queue.retry(TaskDispatch("companies_house", 1))
+    assert queue.retry_stats.unknown == 1
+
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts()))
+    queue.retry(queue.dequeue(), delay=5)
+    assert queue.cancel(1, "companies_house") == 1
+
+    clock.advance(seconds=5)
+    assert queue.size == 0
+    assert queue.pending_retries == 0
+
+
+def test_filtered_purge_removes_only_matching_delayed_retries() -> None:
+    queue = Queue()
+    for user_id in (1, 2):
+        for provider in ("bank_statements", "id_verification"):
+            queue.enqueue(TaskSubmission(provider, user_id, iso_ts()))
+    while (dispatch := queue.dequeue()) is not None:
+        assert queue.retry(dispatch, delay=60)
+
+    assert queue.purge(user_id=1) == 2
+    assert queue.purge(provider="bank_statements") == 1
+    assert queue.purge(user_id=2, provider="bank_statements") == 0
+    assert queue.cancel(2, "id_verification") == 1
+    assert queue.pending_retries == 0
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from solutions.IWC.queue_solution_entrypoint import QueueSolutionEntrypoint
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+def populated_queue() -> QueueSolutionEntrypoint:
+    queue = QueueSolutionEntrypoint()
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=1)))
+    queue.enqueue(TaskSubmission("companies_house", 2, iso_ts(delta_minutes=2)))
+    queue.enqueue(TaskSubmission("bank_statements", 3, iso_ts(delta_minutes=3)))
+    return queue
+
+
+def drain(queue: QueueSolutionEntrypoint) -> list[tuple[str, int]]:
+    dispatched = []
+    while (dispatch := queue.dequeue()) is not None:
+        dispatched.append((dispatch.provider, dispatch.user_id))
+    return dispatched
+
+
+def test_purge_by_user() -> None:
+    queue = populated_queue()
+
+    assert queue.purge(user_id=1) == 3
+    assert drain(queue) == [("companies_house", 2), ("bank_statements", 3)]
+
+
+def test_purge_by_provider() -> None:
+    # GIVEN: companies_house is queued for two users
+    # WHEN: The provider is purged
+    # THEN: Only its tasks go; the credit_check depending on it stays queued
+    queue = populated_queue()
+
+    assert queue.purge(provider="companies_house") == 2
+    assert queue.size() == 3
+    assert drain(queue) == [
+        ("credit_check", 1),
+        ("id_verification", 1),
+        ("bank_statements", 3),
+    ]
+
+
+def test_purge_by_user_and_provider() -> None:
+    queue = populated_queue()
+
+    assert queue.purge(user_id=1, provider="id_verification") == 1
+    assert queue.purge(user_id=1, provider="id_verification") == 0
+    assert queue.size() == 4
+
+
+def test_purge_without_filters_clears_everything() -> None:
+    queue = populated_queue()
+
+    assert queue.purge() is True
+    assert queue.size() == 0
+    assert queue.age() == 0
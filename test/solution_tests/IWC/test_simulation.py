@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+
+import pytest
+from solutions.IWC.admission import AdmissionPolicy
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Queue
+from solutions.IWC.simulation import (
+    ExponentialLatency,
+    FixedLatency,
+    LogNormalLatency,
+    PeriodicArrivals,
+    PoissonArrivals,
+    SimulationConfig,
+    WaitStats,
+    simulate,
+)
+
+MIX = {
+    "bank_statements": 0.25,
+    "companies_house": 0.25,
+    "credit_check": 0.25,
+    "id_verification": 0.25,
+}
+
+
+def test_enough_workers_keep_up_with_arrivals() -> None:
+    # GIVEN: One task a second, each held for a second, and plenty of workers
+    # WHEN: An hour is simulated
+    # THEN: Nothing waits and throughput matches the arrival rate
+    report = simulate(
+        SimulationConfig(
+            arrivals=[PeriodicArrivals(1.0, {"id_verification": 1.0}, users=10_000)],
+            latencies={"id_verification": FixedLatency(1.0)},
+            workers=2,
+            duration_seconds=3600,
+        )
+    )
+
+    assert report.arrivals == 3600
+    assert report.throughput_per_second == pytest.approx(1.0, abs=0.01)
+    assert report.wait_by_provider["id_verification"].max == 0
+    assert report.final_depth == 0
+    assert report.utilisation == pytest.approx(0.5, abs=0.01)
+
+
+def test_under_provisioned_workers_build_a_backlog() -> None:
+    # GIVEN: Two tasks a second, but one worker that takes a second per task
+    # WHEN: Ten minutes are simulated
+    # THEN: The worker is saturated and the backlog and waits keep growing
+    report = simulate(
+        SimulationConfig(
+            arrivals=[PeriodicArrivals(2.0, {"id_verification": 1.0}, users=10_000)],
+            latencies={"id_verification": FixedLatency(1.0)},
+            workers=1,
+            duration_seconds=600,
+            sample_interval_seconds=60,
+        )
+    )
+
+    depths = [depth for _, depth in report.depth_samples]
+    assert report.utilisation == pytest.approx(1.0, abs=0.01)
+    assert depths == sorted(depths)
+    assert report.final_depth > 500
+    assert report.wait_by_provider["id_verification"].max > 250
+
+
+def test_dependencies_are_timed_from_the_original_arrival() -> None:
+    report = simulate(
+        SimulationConfig(
+            arrivals=[PoissonArrivals(0.5, {"credit_check": 1.0}, users=5)],
+            latencies={},
+            workers=1,
+            duration_seconds=600,
+            default_latency=FixedLatency(0.1),
+        )
+    )
+
+    assert set(report.wait_by_provider) == {"companies_house", "credit_check"}
+    assert report.dispatched == report.completed
+    assert set(report.wait_by_user) <= set(range(5))
+
+
+def test_rejected_arrivals_do_not_start_a_wait() -> None:
+    # GIVEN: A queue that holds one task, fed faster than its worker drains it
+    # WHEN: Most arrivals are rejected as the queue is full
+    # THEN: No task is timed from an arrival that was turned away
+    report = simulate(
+        SimulationConfig(
+            arrivals=[PeriodicArrivals(1.0, {"id_verification": 1.0}, users=5)],
+            latencies={"id_verification": FixedLatency(10.0)},
+            workers=1,
+            duration_seconds=600,
+            queue_factory=lambda clock: Queue(
+                clock=clock, admission=AdmissionPolicy(max_size=1)
+            ),
+        )
+    )
+
+    assert report.dispatched < report.arrivals / 5
+    assert report.wait_by_provider["id_verification"].max <= 10
+
+
+def test_expired_tasks_stop_their_wait() -> None:
+    # GIVEN: id_verification tasks expire after 5 seconds, and one user keeps
+    #        asking while the only worker is busy for 30 seconds
+    # WHEN: The pending task expires and is queued again by a later arrival
+    # THEN: Its wait runs from the arrival that queued it again, not the first
+    providers = [
+        replace(p, ttl_seconds=5) if p.name == "id_verification" else p
+        for p in REGISTERED_PROVIDERS
+    ]
+    report = simulate(
+        SimulationConfig(
+            arrivals=[PeriodicArrivals(1.0, {"id_verification": 1.0}, users=1)],
+            latencies={"id_verification": FixedLatency(30.0)},
+            workers=1,
+            duration_seconds=120,
+            queue_factory=lambda clock: Queue(clock=clock, providers=providers),
+        )
+    )
+
+    assert report.dispatched > 1
+    assert report.wait_by_provider["id_verification"].max <= 5
+
+
+def test_multi_hour_mixed_workload_runs_quickly_and_reproducibly() -> None:
+    config = SimulationConfig(
+        arrivals=[PoissonArrivals(2.0, MIX, users=1000)],
+        latencies={
+            "bank_statements": LogNormalLatency(2.0),
+            "credit_check": ExponentialLatency(0.5),
+        },
+        workers=6,
+        duration_seconds=4 * 3600,
+        seed=7,
+    )
+
+    started = time.perf_counter()
+    report = simulate(config)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 10
+    assert report == simulate(config)
+    stats = report.wait_by_provider["bank_statements"]
+    assert stats.p50 <= stats.p95 <= stats.p99 <= stats.max
+
+
+def test_wait_stats_use_nearest_rank() -> None:
+    stats = WaitStats.from_waits([float(i) for i in range(100, 0, -1)])
+
+    assert (stats.count, stats.mean) == (100, 50.5)
+    assert (stats.p50, stats.p95, stats.p99, stats.max) == (50, 95, 99, 100)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [{"workers": 0}, {"duration_seconds": 0}, {"sample_interval_seconds": -1}],
+)
+def test_invalid_configs_are_rejected(overrides: dict) -> None:
+    arguments = {
+        "arrivals": [PoissonArrivals(1.0, MIX)],
+        "latencies": {},
+        "workers": 1,
+        "duration_seconds": 60,
+        **overrides,
+    }
+    with pytest.raises(ValueError):
+        SimulationConfig(**arguments)
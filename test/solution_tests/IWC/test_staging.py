@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+from solutions.IWC.admission import AdmissionPolicy
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.staging import StagedQueue, SubmissionRing
+from solutions.IWC.task_types import EnqueueRejection, TaskDispatch, TaskSubmission
+
+from .utils import iso_ts
+
+
+def test_ring_wraps_and_reports_full() -> None:
+    ring = SubmissionRing(capacity=4)
+    submissions = [TaskSubmission("id_verification", i, iso_ts()) for i in range(6)]
+
+    assert all(ring.push(submission) for submission in submissions[:4])
+    assert not ring.push(submissions[4])
+    assert ring.pop_batch(3) == submissions[:3]
+    assert ring.push(submissions[4]) and ring.push(submissions[5])
+    assert ring.pop_batch(10) == submissions[3:]
+    assert len(ring) == 0
+
+
+def test_ring_capacity_must_be_a_power_of_two() -> None:
+    with pytest.raises(ValueError):
+        SubmissionRing(capacity=6)
+
+
+def test_reads_account_for_pending_submissions() -> None:
+    # GIVEN: Submissions staged with no scheduler thread running
+    # WHEN: The queue is read
+    # THEN: Pending submissions are applied first, dependencies included
+    staged = StagedQueue()
+    staged.enqueue(TaskSubmission("credit_check", 1, iso_ts(delta_minutes=0)))
+    staged.enqueue(TaskSubmission("id_verification", 2, iso_ts(delta_minutes=1)))
+
+    assert staged.pending == 2
+    assert staged.queue.size == 0
+    assert staged.size == 3
+    assert staged.pending == 0
+    assert staged.dequeue() == TaskDispatch("companies_house", 1)
+
+
+def test_staged_order_matches_direct_enqueue() -> None:
+    submissions = [
+        TaskSubmission(provider, user_id, iso_ts(delta_minutes=user_id % 7))
+        for user_id in range(40)
+        for provider in ("bank_statements", "credit_check", "id_verification")
+    ]
+    direct = Queue()
+    for submission in submissions:
+        direct.enqueue(submission)
+    staged = StagedQueue(capacity=16, batch_size=5)
+    for submission in submissions:
+        staged.enqueue(submission)
+
+    assert staged.stats.full_waits > 0
+    assert [staged.dequeue() for _ in range(direct.size + 1)] == [
+        direct.dequeue() for _ in range(direct.size + 1)
+    ]
+
+
+def test_scheduler_thread_drains_while_the_producer_enqueues() -> None:
+    # GIVEN: A running scheduler and a small ring
+    # WHEN: One thread enqueues while another dequeues concurrently
+    # THEN: Every submission is dispatched exactly once
+    dispatched: list[TaskDispatch] = []
+
+    with StagedQueue(capacity=64, batch_size=8) as staged:
+
+        def produce() -> None:
+            for user_id in range(2000):
+                staged.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        while producer.is_alive() or staged.size:
+            if (dispatch := staged.dequeue()) is not None:
+                dispatched.append(dispatch)
+        producer.join()
+
+    assert sorted(dispatch.user_id for dispatch in dispatched) == list(range(2000))
+    assert staged.stats.drained == 2000
+
+
+def test_rejections_are_reported_when_drained() -> None:
+    rejected: list[EnqueueRejection] = []
+    staged = StagedQueue(
+        Queue(admission=AdmissionPolicy(max_per_user=1)),
+        on_reject=rejected.append,
+    )
+    staged.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    staged.enqueue(TaskSubmission("bank_statements", 1, iso_ts()))
+
+    staged.flush()
+
+    assert [rejection.provider for rejection in rejected] == ["bank_statements"]
+    assert staged.stats.rejected == 1
+
+
+def test_failing_submission_is_reported_and_the_batch_still_applied() -> None:
+    # GIVEN: A running scheduler and a batch holding one unparseable deadline
+    # WHEN: The batch is drained
+    # THEN: The bad submission goes to on_error, the others are queued and the
+    #       scheduler keeps draining later submissions
+    errors: list[TaskSubmission] = []
+    bad = TaskSubmission("bank_statements", 2, iso_ts(), {"deadline": "soon"})
+
+    with StagedQueue(
+        batch_size=8, on_error=lambda submission, error: errors.append(submission)
+    ) as staged:
+        staged.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+        staged.enqueue(bad)
+        staged.enqueue(TaskSubmission("id_verification", 3, iso_ts()))
+        while staged.stats.drained < 3:
+            pass
+        staged.enqueue(TaskSubmission("id_verification", 4, iso_ts()))
+        while staged.stats.drained < 4:
+            pass
+
+    assert errors == [bad]
+    assert staged.stats.errors == 1
+    assert staged.queue.admission_stats.admitted == 3
+    assert staged.peek(3) == [
+        TaskDispatch("id_verification", user_id) for user_id in (1, 3, 4)
+    ]
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_enqueue_drains_the_ring_itself_once_the_scheduler_has_died() -> None:
+    # GIVEN: A scheduler thread killed by an on_reject callback that raises
+    # WHEN: More submissions are staged than the ring can hold
+    # THEN: enqueue applies them itself instead of waiting forever
+    def reject_once(rejection: EnqueueRejection) -> None:
+        if not rejected:
+            rejected.append(rejection)
+            raise RuntimeError("callback failed")
+
+    rejected: list[EnqueueRejection] = []
+    staged = StagedQueue(
+        Queue(admission=AdmissionPolicy(max_per_user=1)),
+        capacity=2,
+        on_reject=reject_once,
+    )
+    staged.start()
+    staged.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    staged.enqueue(TaskSubmission("bank_statements", 1, iso_ts()))
+    while not rejected:
+        pass
+
+    for user_id in range(2, 8):
+        staged.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+    staged.close()
+
+    assert staged.size == 7
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import struct
+import time
+from multiprocessing import shared_memory
+
+import pytest
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.state_snapshot import QueueStatePublisher, QueueStateReader
+from solutions.IWC.task_types import TaskSubmission
+
+from .utils import iso_ts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def queue() -> Queue:
+    return Queue()
+
+
+@pytest.fixture
+def publisher(queue):
+    publisher = QueueStatePublisher(queue, max_users=2, interval_seconds=0)
+    yield publisher
+    publisher.close()
+
+
+def test_reader_sees_every_mutation(queue, publisher) -> None:
+    # GIVEN: A reader attached to the published segment by name
+    # WHEN: The queue is changed
+    # THEN: Each read reflects the latest depth, age and counts
+    reader = QueueStateReader(publisher.name)
+    assert reader.read().depth == 0
+
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("bank_statements", 2, iso_ts(delta_minutes=3)))
+    queue.enqueue(TaskSubmission("id_verification", 3, iso_ts(delta_minutes=1)))
+    summary = reader.read()
+
+    assert (summary.depth, summary.age_seconds, summary.user_count) == (4, 180, 3)
+    assert summary.tasks_by_provider == {
+        "bank_statements": 1,
+        "companies_house": 1,
+        "credit_check": 1,
+        "id_verification": 1,
+    }
+    assert summary.busiest_users[0] == (1, 2)
+    assert len(summary.busiest_users) == 2
+    assert summary.published_at is not None
+
+    queue.dequeue()
+    assert reader.read().tasks_by_provider.get("companies_house") is None
+    reader.close()
+
+
+def test_unregistered_providers_are_counted_together(queue, publisher) -> None:
+    reader = QueueStateReader(publisher.name)
+    queue.enqueue(TaskSubmission("open_banking", 1, iso_ts()))
+
+    assert reader.read().tasks_by_provider == {"other": 1}
+    reader.close()
+
+
+def test_interval_mode_publishes_pending_changes_on_flush(queue) -> None:
+    # GIVEN: A publisher limited to one update every 10 seconds
+    # WHEN: The queue changes inside the interval and then goes quiet
+    # THEN: Readers see the last published state until flush or the next
+    #       change after the interval
+    clock = FakeClock()
+    publisher = QueueStatePublisher(queue, interval_seconds=10, clock=clock)
+    reader = QueueStateReader(publisher.name)
+    published_at = reader.read().published_at
+
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    assert publisher.pending
+    assert reader.read().depth == 0
+    assert reader.read().published_at == published_at
+
+    assert publisher.flush()
+    assert reader.read().depth == 1
+    assert not publisher.flush()
+
+    clock.now = 5.0
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts()))
+    assert reader.read().depth == 1
+    clock.now = 10.0
+    queue.enqueue(TaskSubmission("id_verification", 3, iso_ts()))
+    assert reader.read().depth == 3
+    assert not publisher.pending
+    reader.close()
+    publisher.close()
+
+
+def test_flusher_thread_publishes_the_last_change_of_a_burst(queue) -> None:
+    # GIVEN: A publisher with a running flusher thread
+    # WHEN: A burst of changes lands inside one interval and the queue goes idle
+    # THEN: The reader sees the final state without anyone calling flush
+    with QueueStatePublisher(queue, interval_seconds=0.01) as publisher:
+        reader = QueueStateReader(publisher.name)
+        with publisher.lock:
+            for user_id in range(3):
+                queue.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+
+        deadline = time.monotonic() + 5
+        while reader.read().depth != 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert reader.read().depth == 3
+        assert not publisher.pending
+        reader.close()
+
+
+def test_reader_never_returns_a_torn_write(publisher) -> None:
+    reader = QueueStateReader(publisher.name)
+    segment = shared_memory.SharedMemory(name=publisher.name)
+    buffer = segment.buf
+    assert buffer is not None
+    (sequence,) = struct.unpack_from("<Q", buffer, 16)
+    struct.pack_into("<Q", buffer, 16, sequence + 1)
+
+    with pytest.raises(TimeoutError):
+        reader.read(max_attempts=10)
+
+    struct.pack_into("<Q", buffer, 16, sequence + 2)
+    assert reader.read().depth == 0
+    del buffer
+    segment.close()
+    reader.close()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+from solutions.IWC.queue_solution_legacy import REGISTERED_PROVIDERS, Queue
+from solutions.IWC.task_types import TaskSubmission
+from solutions.IWC.timing_wheel import TimingWheel
+
+from .utils import iso_ts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += timedelta(**kwargs)
+
+
+def submission(provider: str, user_id: int, **metadata) -> TaskSubmission:
+    return TaskSubmission(provider, user_id, iso_ts(), metadata=metadata)
+
+
+def test_per_task_ttl_expires_and_reports() -> None:
+    # GIVEN: One task with a 60 second TTL and one without
+    # WHEN: The clock moves past the TTL
+    # THEN: Only the stale task is dropped, counted and passed to the callback
+    clock = FakeClock()
+    expired: list[TaskSubmission] = []
+    queue = Queue(clock=clock, on_expire=expired.append)
+    queue.enqueue(submission("id_verification", 1, ttl_seconds=60))
+    queue.enqueue(submission("companies_house", 2))
+
+    clock.advance(seconds=59)
+    assert queue.size == 2
+
+    clock.advance(seconds=2)
+    assert queue.size == 1
+    assert queue.expired_count == 1
+    assert [(task.provider, task.user_id) for task in expired] == [
+        ("id_verification", 1)
+    ]
+    assert queue.dequeue().user_id == 2
+
+
+def test_per_provider_ttl_and_rule_of_3_counts() -> None:
+    # GIVEN: bank_statements expires after 30 seconds for a user with 3 tasks
+    # WHEN: It expires before the next dequeue
+    # THEN: The user is back below the rule-of-3 threshold
+    providers = [
+        replace(p, ttl_seconds=30) if p.name == "bank_statements" else p
+        for p in REGISTERED_PROVIDERS
+    ]
+    clock = FakeClock()
+    queue = Queue(clock=clock, providers=providers)
+    queue.enqueue(TaskSubmission("companies_house", 2, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("companies_house", 1, iso_ts(delta_minutes=1)))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=1)))
+    queue.enqueue(TaskSubmission("bank_statements", 1, iso_ts(delta_minutes=1)))
+
+    clock.advance(minutes=1)
+
+    assert queue.dequeue().user_id == 2
+    assert queue.size == 2
+
+
+def test_dispatched_task_never_expires() -> None:
+    clock = FakeClock()
+    queue = Queue(clock=clock)
+    queue.enqueue(submission("id_verification", 1, ttl_seconds=10))
+    assert queue.dequeue().user_id == 1
+
+    clock.advance(hours=1)
+    assert queue.expired_count == 0
+
+
+def test_timing_wheel_handles_long_horizons_and_cancellation() -> None:
+    start = datetime(2025, 1, 1)
+    wheel: TimingWheel[str] = TimingWheel(start, slots=4, levels=2)
+    wheel.schedule("soon", start + timedelta(seconds=3))
+    wheel.schedule("late", start + timedelta(hours=2))
+    cancelled = wheel.schedule("cancelled", start + timedelta(seconds=5))
+    wheel.cancel(cancelled)
+
+    assert wheel.advance(start + timedelta(seconds=2)) == []
+    assert wheel.advance(start + timedelta(seconds=10)) == ["soon"]
+    assert wheel.advance(start + timedelta(hours=1, minutes=59)) == []
+    assert len(wheel) == 1
+    assert wheel.advance(start + timedelta(hours=2)) == ["late"]
+    assert len(wheel) == 0
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+from entry_point_mapping import EntryPointMapping
+from solutions.IWC.queue_solution_legacy import ID_VERIFICATION_PROVIDER, Provider
+from solutions.IWC.task_types import TaskSubmission, TenantDispatch
+from solutions.IWC.tenancy import TenantQueues
+
+from .utils import iso_ts
+
+INSURANCE_PROVIDERS = [
+    Provider("claims_history", "https://fake.claims.co.uk", depends_on=[]),
+    Provider("vehicle_check", "https://fake.dvla.co.uk", depends_on=["claims_history"]),
+]
+
+
+def fill(tenants: TenantQueues, tenant: str, provider: str, users: range) -> None:
+    for user_id in users:
+        tenants.enqueue(tenant, TaskSubmission(provider, user_id, iso_ts()))
+
+
+def test_tenants_are_served_by_weight() -> None:
+    # GIVEN: Lending has twice insurance's weight and both have a backlog
+    # WHEN: Six tasks are dispatched
+    # THEN: Lending gets two turns for every one of insurance's
+    tenants = TenantQueues()
+    tenants.add_tenant("lending", weight=2)
+    tenants.add_tenant("insurance", providers=INSURANCE_PROVIDERS)
+    fill(tenants, "lending", "id_verification", range(10))
+    fill(tenants, "insurance", "claims_history", range(10))
+
+    served = [tenants.dequeue().tenant for _ in range(6)]
+
+    assert served == [
+        "lending",
+        "lending",
+        "insurance",
+        "lending",
+        "lending",
+        "insurance",
+    ]
+    assert tenants.size() == 14
+    assert tenants.size("insurance") == 8
+
+
+def test_backlog_does_not_block_a_newly_active_tenant() -> None:
+    # GIVEN: Lending has a large backlog that has been draining alone
+    # WHEN: Insurance enqueues a task with its own dependency chain
+    # THEN: Insurance is served within one turn and keeps its own rules
+    tenants = TenantQueues()
+    tenants.add_tenant("lending")
+    tenants.add_tenant("insurance", providers=INSURANCE_PROVIDERS)
+    fill(tenants, "lending", "id_verification", range(100))
+    for _ in range(50):
+        tenants.dequeue()
+
+    fill(tenants, "insurance", "vehicle_check", range(1))
+
+    assert tenants.dequeue() == TenantDispatch("claims_history", 0, "insurance")
+    assert tenants.dequeue().tenant == "lending"
+    assert tenants.dequeue() == TenantDispatch("vehicle_check", 0, "insurance")
+
+
+def test_tenant_with_only_held_tasks_is_skipped() -> None:
+    tenants = TenantQueues()
+    lending = tenants.add_tenant("lending")
+    tenants.add_tenant("insurance", providers=INSURANCE_PROVIDERS)
+    fill(tenants, "lending", "id_verification", range(1))
+    fill(tenants, "insurance", "claims_history", range(2))
+    lending.pause_provider("id_verification")
+
+    assert [tenants.dequeue().tenant for _ in range(2)] == ["insurance"] * 2
+    assert tenants.dequeue() is None
+    assert tenants.size() == 1
+
+
+def test_conflicting_provider_urls_are_rejected() -> None:
+    tenants = TenantQueues()
+    tenants.add_tenant("lending")
+    moved = replace(ID_VERIFICATION_PROVIDER, base_url="https://other.idv.co.uk")
+
+    with pytest.raises(ValueError):
+        tenants.add_tenant("insurance", providers=[moved])
+    with pytest.raises(KeyError):
+        tenants.enqueue("insurance", TaskSubmission("id_verification", 1, iso_ts()))
+
+
+def test_entry_point_mapping_exposes_tenant_queues() -> None:
+    mapping = EntryPointMapping()
+    mapping.add_tenant("lending")
+    task = {"provider": "credit_check", "user_id": 7, "timestamp": iso_ts()}
+
+    assert mapping.tenant_enqueue("lending", task) == 2
+    assert mapping.tenant_dequeue() == {
+        "provider": "companies_house",
+        "user_id": 7,
+        "tenant": "lending",
+    }
+    assert mapping.tenant_size("lending") == 1
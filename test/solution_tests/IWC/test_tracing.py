@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from solutions.IWC.queue_solution_legacy import Queue
+from solutions.IWC.task_types import TaskSubmission
+from solutions.IWC.tracing import (
+    OPENMETRICS_CONTENT_TYPE,
+    LifecycleTracer,
+    serve_openmetrics,
+    write_openmetrics,
+)
+
+from .utils import iso_ts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs: float) -> None:
+        self.now += timedelta(**kwargs)
+
+
+def test_trace_records_enqueue_promotion_and_dispatch() -> None:
+    # GIVEN: A traced queue where user 1 queues three tasks
+    # WHEN: Their credit_check is dispatched 90 seconds later
+    # THEN: Its trace has the enqueue, rule of 3 promotion and dispatch times
+    clock = FakeClock()
+    tracer = LifecycleTracer()
+    queue = Queue(clock=clock, tracer=tracer)
+    enqueued_at = clock.now
+    queue.enqueue(TaskSubmission("credit_check", 1, iso_ts(delta_minutes=0)))
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=1)))
+
+    clock.advance(seconds=90)
+    while (dispatch := queue.dequeue()).provider != "credit_check":
+        pass
+
+    trace = tracer.last_trace(1, "credit_check")
+    assert trace.enqueued_at == enqueued_at
+    assert trace.promoted_at == trace.dispatched_at == clock.now
+    assert trace.wait_seconds == 90
+    assert dispatch.user_id == 1
+    assert tracer.provider_histogram("credit_check").count == 1
+    assert tracer.user_histogram(1).count == 2
+
+
+def test_replacement_keeps_the_original_enqueue_time() -> None:
+    clock = FakeClock()
+    tracer = LifecycleTracer()
+    queue = Queue(clock=clock, tracer=tracer)
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=5)))
+    clock.advance(seconds=30)
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts(delta_minutes=0)))
+    clock.advance(seconds=30)
+
+    queue.dequeue()
+
+    assert tracer.last_trace(1, "id_verification").wait_seconds == 60
+
+
+def test_sampling_skips_tasks_and_withdrawn_tasks_are_not_recorded() -> None:
+    tracer = LifecycleTracer(sample_rate=0.25, seed=3)
+    queue = Queue(tracer=tracer)
+    for user_id in range(400):
+        queue.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+    queue.cancel(0, "id_verification")
+
+    while queue.dequeue() is not None:
+        pass
+
+    assert 60 < tracer.traced < 140
+    assert tracer.last_trace(0, "id_verification") is None
+
+
+def test_per_user_histograms_are_bounded() -> None:
+    tracer = LifecycleTracer(max_users=2, max_traces=2)
+    queue = Queue(tracer=tracer)
+    for user_id in range(5):
+        queue.enqueue(TaskSubmission("id_verification", user_id, iso_ts()))
+        queue.dequeue()
+
+    assert tracer.evicted_users == 3
+    assert tracer.user_histogram(2) is None
+    assert tracer.user_histogram(4).count == 1
+    assert tracer.last_trace(2, "id_verification") is None
+    assert tracer.provider_histogram("id_verification").count == 5
+
+
+def test_histograms_are_returned_as_snapshots() -> None:
+    tracer = LifecycleTracer()
+    queue = Queue(tracer=tracer)
+    queue.enqueue(TaskSubmission("id_verification", 1, iso_ts()))
+    queue.dequeue()
+    snapshot = tracer.provider_histogram("id_verification")
+
+    queue.enqueue(TaskSubmission("id_verification", 2, iso_ts()))
+    queue.dequeue()
+
+    assert snapshot.count == 1
+    assert tracer.provider_histogram("id_verification").count == 2
+
+
+def test_openmetrics_text() -> None:
+    clock = FakeClock()
+    tracer = LifecycleTracer(buckets=[1, 10])
+    queue = Queue(clock=clock, tracer=tracer)
+    queue.enqueue(TaskSubmission("id_verification", 7, iso_ts()))
+    clock.advance(seconds=5)
+    queue.dequeue()
+
+    assert tracer.render_openmetrics() == (
+        "# TYPE queue_wait_seconds histogram\n"
+        "# UNIT queue_wait_seconds seconds\n"
+        "# HELP queue_wait_seconds Time from enqueue to dispatch, by provider.\n"
+        'queue_wait_seconds_bucket{provider="id_verification",le="1.0"} 0\n'
+        'queue_wait_seconds_bucket{provider="id_verification",le="10.0"} 1\n'
+        'queue_wait_seconds_bucket{provider="id_verification",le="+Inf"} 1\n'
+        'queue_wait_seconds_count{provider="id_verification"} 1\n'
+        'queue_wait_seconds_sum{provider="id_verification"} 5.0\n'
+        "# TYPE queue_user_wait_seconds histogram\n"
+        "# UNIT queue_user_wait_seconds seconds\n"
+        "# HELP queue_user_wait_seconds Time from enqueue to dispatch, "
+        "by recently dispatched user.\n"
+        'queue_user_wait_seconds_bucket{user_id="7",le="1.0"} 0\n'
+        'queue_user_wait_seconds_bucket{user_id="7",le="10.0"} 1\n'
+        'queue_user_wait_seconds_bucket{user_id="7",le="+Inf"} 1\n'
+        'queue_user_wait_seconds_count{user_id="7"} 1\n'
+        'queue_user_wait_seconds_sum{user_id="7"} 5.0\n'
+        "# TYPE queue_traced_dispatches counter\n"
+        "# HELP queue_traced_dispatches Dispatches of sampled tasks.\n"
+        "queue_traced_dispatches_total 1\n"
+        "# TYPE queue_wait_evicted_users counter\n"
+        "# HELP queue_wait_evicted_users Per-user histograms dropped to stay "
+        "within max_users.\n"
+        "queue_wait_evicted_users_total 0\n"
+        "# EOF\n"
+    )
+
+
+def test_export_to_file_and_endpoint(tmp_path: Path) -> None:
+    tracer = LifecycleTracer()
+    queue = Queue(tracer=tracer)
+    queue.enqueue(TaskSubmission("bank_statements", 1, iso_ts()))
+    queue.dequeue()
+    path = tmp_path / "queue.prom"
+
+    write_openmetrics(tracer, path)
+    server = serve_openmetrics(tracer)
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            content_type = response.headers["Content-Type"]
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert path.read_text() == body == tracer.render_openmetrics()
+    assert content_type == OPENMETRICS_CONTENT_TYPE
+    assert list(tmp_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [{"sample_rate": 0}, {"buckets": []}, {"buckets": [5, 1]}, {"max_users": 0}],
+)
+def test_invalid_tracer_settings_are_rejected(arguments: dict) -> None:
+    with pytest.raises(ValueError):
+        LifecycleTracer(**arguments)
@@ -41,6 +41,10 @@ def call_size() -> QueueActionBuilder:
     return QueueActionBuilder("size")
 
 
+def call_cancel(user_id: int, provider: str) -> QueueActionBuilder:
+    return QueueActionBuilder("cancel", (user_id, provider))
+
+
 def call_dequeue() -> QueueActionBuilder:
     return QueueActionBuilder(
         "dequeue",
@@ -54,7 +58,14 @@ def run_queue(actions: Iterable[dict[str, Any]]) -> None:
     queue = QueueSolutionEntrypoint()
     for position, step in enumerate(actions, start=1):
         method: Callable[..., Any] = getattr(queue, step["name"])
-        args = () if step["input"] is None else (step["input"],)
+        payload = step["input"]
+        args: tuple[Any, ...]
+        if payload is None:
+            args = ()
+        elif isinstance(payload, tuple):
+            args = payload
+        else:
+            args = (payload,)
         actual = method(*args)
         expected = step["expect"]
         if actual != expected:
@@ -71,4 +82,11 @@ def run_queue(actions: Iterable[dict[str, Any]]) -> None:
             )
 
 
-__all__ = ["iso_ts", "call_enqueue", "call_size", "call_dequeue", "run_queue"]
+__all__ = [
+    "iso_ts",
+    "call_enqueue",
+    "call_cancel",
+    "call_size",
+    "call_dequeue",
+    "run_queue",
+]